@@ -0,0 +1,250 @@
+"""Model cascade for the agents that run on MODEL_STRONG (compliance_checker, order_expert).
+
+With cascade mode on (--cascade), the agent factory builds the agent twice: on
+MODEL_FAST, with an extra instruction to end the answer with a self-assessed
+"CONFIDENZA: <0-1>" line, and on MODEL_STRONG with the normal prompt. Every run
+tries the fast agent first and keeps its answer only when
+
+- the stated confidence is at least CASCADE_MIN_CONFIDENCE, and
+- a deterministic consistency check of the answer against the data passes
+  (check_compliance / check_order below);
+
+otherwise the same task is re-run on the strong agent. The fast agent instance is
+returned with its run() and a_run() replaced (as tracing.instrument_agent does), so
+name and tools are unchanged. The orchestrator reaches it through
+registry.delegation_tool (run() on the caller's thread); a_run() covers agents
+registered with can_call(), whose tools await it. Escalations and their reasons are
+counted per agent (print_cascade_summary) and recorded as "cascade" spans.
+"""
+
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from datapizza.agents import Agent
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+from hackapizza_solution.config import CASCADE_ENABLED, CASCADE_MIN_CONFIDENCE
+from hackapizza_solution.data_preparation.menu_preparser import extract_licenses
+from hackapizza_solution.deadline import DeadlineExceeded
+from hackapizza_solution.entity_linker import LICENSE_NAMES, ORDER_ALIASES, link_entities, normalize
+from hackapizza_solution.llm.client import response_tokens
+from hackapizza_solution.tools.menu_tools import _load_menus
+from hackapizza_solution.tools.output_tools import _load_mapping
+from hackapizza_solution.tracing import span
+
+CONFIDENCE_INSTRUCTION = """
+
+AUTOVALUTAZIONE (obbligatoria):
+Termina SEMPRE la risposta con una riga nel formato esatto "CONFIDENZA: <numero tra 0 e 1>",
+che indica quanto sei sicuro che la risposta sia completa e corretta rispetto ai dati consultati.
+Usa un valore basso se mancano dati, se i calcoli sono incerti o se hai dovuto fare ipotesi."""
+
+_CONFIDENCE_RE = re.compile(
+    r"^\s*\**CONFIDENZA\**\s*[:=]\s*(\d+(?:[.,]\d+)?)\s*(%?)\s*$", re.IGNORECASE | re.MULTILINE
+)
+_DISH_LINE_RE = re.compile(r"^\s*[-*•]\s+\**(.+?)\**(?:\s+[(\[—–-].*)?$", re.MULTILINE)
+_LICENSE_CODE_BY_NAME = {name: code for code, name in LICENSE_NAMES.items()}
+
+_enabled = CASCADE_ENABLED
+_stats: dict[str, dict] = {}
+_stats_lock = threading.Lock()
+
+
+def set_enabled(enabled: bool):
+    global _enabled
+    _enabled = enabled
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+class CascadeResponse:
+    """Answer of the accepted model, with the token usage of both attempts (read like a
+    StepResult by the can_call() tool, hence the empty structured_data)."""
+
+    def __init__(self, text: str, prompt_tokens: int, completion_tokens: int, escalated: bool):
+        self.text = text
+        self.structured_data = []
+        self.prompt_tokens_used = prompt_tokens
+        self.completion_tokens_used = completion_tokens
+        self.escalated = escalated
+
+
+def parse_confidence(text: str) -> tuple[float | None, str]:
+    """(stated confidence in [0, 1] or None, text without the confidence line)."""
+    matches = list(_CONFIDENCE_RE.finditer(text or ""))
+    if not matches:
+        return None, text or ""
+    last = matches[-1]
+    value = float(last.group(1).replace(",", "."))
+    if last.group(2) or value > 1:
+        value /= 100
+    return min(1.0, max(0.0, value)), _CONFIDENCE_RE.sub("", text).strip()
+
+
+def _listed_dishes(text: str) -> list[str]:
+    return [m.group(1).strip() for m in _DISH_LINE_RE.finditer(text or "")]
+
+
+def check_compliance(task: str, answer: str) -> str | None:
+    """Deterministic checks of a compliance answer; returns the first inconsistency or None.
+    The kept dishes are the listed ("- Name") lines that are known dish names:
+    - they must be among the candidate dishes named in the task, when it names any
+    - the chef of every kept dish must hold the licenses (and grades) named in the task"""
+    known = {normalize(name) for name in _load_mapping()}
+    kept = [d for d in _listed_dishes(answer) if normalize(d) in known]
+
+    candidates = {normalize(m.name) for m in link_entities(task, kinds=("dish",), fuzzy=False)}
+    if candidates:
+        extra = [d for d in kept if normalize(d) not in candidates]
+        if extra:
+            return f"dish not among the candidates: '{extra[0]}'"
+
+    linked = {_LICENSE_CODE_BY_NAME[m.name] for m in link_entities(task, kinds=("license",), fuzzy=False)}
+    required = {code: grade for code, grade in extract_licenses(task).items() if code in linked}
+    if required and kept:
+        chef_licenses = {
+            normalize(dish["name"]): menu["chef"]["licenses"] for menu in _load_menus() for dish in menu["dishes"]
+        }
+        for dish in kept:
+            licenses = chef_licenses.get(normalize(dish), {})
+            for code, grade in required.items():
+                if licenses.get(code, 0) < grade:
+                    return f"chef of '{dish}' lacks license {code} >= {grade}"
+    return None
+
+
+def check_order(task: str, answer: str) -> str | None:
+    """Deterministic checks of an order answer: non-empty, and it addresses every order
+    named in the task (by name or alias)."""
+    if not (answer or "").strip():
+        return "empty answer"
+    normalized = normalize(answer)
+    for order in {m.name for m in link_entities(task, kinds=("order",), fuzzy=False)}:
+        aliases = ORDER_ALIASES.get(order, (normalize(order),))
+        if not any(alias in normalized for alias in aliases):
+            return f"order '{order}' not addressed"
+    return None
+
+
+def _count(name: str, key: str, amount: float = 1):
+    stats = _stats.setdefault(name, {
+        "runs": 0, "accepted": 0, "escalated": 0, "fast_s": 0.0, "strong_s": 0.0,
+        "confidence_sum": 0.0, "confidence_n": 0, "reasons": Counter(),
+    })
+    stats[key] += amount
+
+
+def cascade_agent(fast: Agent, strong: Agent, check, min_confidence: float = CASCADE_MIN_CONFIDENCE) -> Agent:
+    """Make fast.run() and fast.a_run() escalate to the strong agent on low confidence or a
+    failed check(task, answer). Both are replaced: the orchestrator's delegation tools call
+    run(), agents registered with can_call() are reached through a_run."""
+    fast_run = fast.run
+    fast_a_run = fast.a_run
+    name = getattr(fast, "name", type(fast).__name__)
+
+    def assess(task, response, attrs) -> tuple[str | None, str, tuple[int, int], float | None]:
+        """(escalation reason or None, answer without the confidence line, tokens, confidence)."""
+        tokens = response_tokens(response)
+        confidence, text = parse_confidence(response.text or "")
+        reason = None
+        if confidence is None:
+            reason = "no_confidence"
+        elif confidence < min_confidence:
+            reason = "low_confidence"
+        else:
+            inconsistency = check(str(task), text)
+            if inconsistency:
+                reason = "inconsistent"
+                attrs["inconsistency"] = inconsistency
+        return reason, text, tokens, confidence
+
+    def record(reason: str | None, confidence: float | None, fast_s: float, attrs):
+        attrs.update(confidence=confidence, escalated=reason is not None, reason=reason)
+        with _stats_lock:
+            _count(name, "runs")
+            _count(name, "fast_s", fast_s)
+            if confidence is not None:
+                _count(name, "confidence_sum", confidence)
+                _count(name, "confidence_n")
+            if reason is None:
+                _count(name, "accepted")
+            else:
+                _count(name, "escalated")
+                _stats[name]["reasons"][reason] += 1
+
+    def escalated(tokens: tuple[int, int], strong_response, strong_s: float) -> CascadeResponse:
+        with _stats_lock:
+            _count(name, "strong_s", strong_s)
+        strong_tokens = response_tokens(strong_response)
+        return CascadeResponse(
+            strong_response.text or "",
+            tokens[0] + strong_tokens[0],
+            tokens[1] + strong_tokens[1],
+            escalated=True,
+        )
+
+    def fast_failed(e: Exception, attrs):
+        attrs["error_fast"] = f"{type(e).__name__}: {e}"[:200]
+        return "fast_error", "", (0, 0), None
+
+    def run(task, *args, **kwargs):
+        with span("cascade", name) as attrs:
+            start = time.time()
+            try:
+                reason, text, tokens, confidence = assess(task, fast_run(task, *args, **kwargs), attrs)
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                reason, text, tokens, confidence = fast_failed(e, attrs)
+            record(reason, confidence, time.time() - start, attrs)
+            if reason is None:
+                return CascadeResponse(text, *tokens, escalated=False)
+            start = time.time()
+            strong_response = strong.run(task, *args, **kwargs)
+            return escalated(tokens, strong_response, time.time() - start)
+
+    async def a_run(task, *args, **kwargs):
+        with span("cascade", name) as attrs:
+            start = time.time()
+            try:
+                reason, text, tokens, confidence = assess(task, await fast_a_run(task, *args, **kwargs), attrs)
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                reason, text, tokens, confidence = fast_failed(e, attrs)
+            record(reason, confidence, time.time() - start, attrs)
+            if reason is None:
+                return CascadeResponse(text, *tokens, escalated=False)
+            start = time.time()
+            strong_response = await strong.a_run(task, *args, **kwargs)
+            return escalated(tokens, strong_response, time.time() - start)
+
+    fast.run = run
+    fast.a_run = a_run
+    return fast
+
+
+def cascade_stats() -> dict[str, dict]:
+    with _stats_lock:
+        return {name: {**s, "reasons": dict(s["reasons"])} for name, s in _stats.items()}
+
+
+def print_cascade_summary():
+    stats = cascade_stats()
+    if not stats:
+        return
+    print("\n--- MODEL CASCADE ---")
+    for name, s in sorted(stats.items()):
+        rate = s["escalated"] / s["runs"] if s["runs"] else 0.0
+        confidence = s["confidence_sum"] / s["confidence_n"] if s["confidence_n"] else 0.0
+        reasons = ", ".join(f"{r}: {n}" for r, n in sorted(s["reasons"].items(), key=lambda kv: -kv[1])) or "-"
+        print(f"  {name}: {s['runs']} runs, {s['accepted']} answered by the fast model, "
+              f"{s['escalated']} escalated ({rate:.0%}; {reasons})")
+        print(f"    mean stated confidence {confidence:.2f}, fast model {s['fast_s']:.1f}s, "
+              f"strong model {s['strong_s']:.1f}s")
@@ -4,10 +4,11 @@ import sys
 from pathlib import Path
 
 from datapizza.agents import Agent
-from datapizza.clients.openai import OpenAIClient
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
-from hackapizza_solution.config import OPENAI_API_KEY, MODEL_STRONG
+from hackapizza_solution.agents import cascade
+from hackapizza_solution.config import MODEL_FAST, MODEL_STRONG
+from hackapizza_solution.llm.client import create_client
 from hackapizza_solution.prompts.compliance_checker import SYSTEM_PROMPT
 from hackapizza_solution.tools.compliance_tools import (
     get_ingredient_percentages,
@@ -16,18 +17,25 @@ from hackapizza_solution.tools.compliance_tools import (
 from hackapizza_solution.tools.rag_tools import query_codice_galattico
 
 
-def create_agent() -> Agent:
-    client = OpenAIClient(
-        api_key=OPENAI_API_KEY,
-        model=MODEL_STRONG,
-    )
+def _build(model: str, system_prompt: str) -> Agent:
     return Agent(
         name="compliance_checker",
-        client=client,
-        system_prompt=SYSTEM_PROMPT,
+        client=create_client(model),
+        system_prompt=system_prompt,
         tools=[
             get_ingredient_percentages,
             get_substance_limits,
             query_codice_galattico,
         ],
     )
+
+
+def create_agent() -> Agent:
+    """MODEL_STRONG agent; with cascade mode, a MODEL_FAST agent that escalates to it."""
+    if not cascade.is_enabled():
+        return _build(MODEL_STRONG, SYSTEM_PROMPT)
+    return cascade.cascade_agent(
+        _build(MODEL_FAST, SYSTEM_PROMPT + cascade.CONFIDENCE_INSTRUCTION),
+        _build(MODEL_STRONG, SYSTEM_PROMPT),
+        check=cascade.check_compliance,
+    )
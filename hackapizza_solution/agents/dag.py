@@ -0,0 +1,238 @@
+"""DAG execution of the sub-agents, as an alternative to orchestrator delegation.
+
+The orchestrator calls sub-agents one at a time, so for composite
+questions independent branches (license lookup and distance lookup, manual
+categories and order rules) add up. Here the plan is built directly from the
+classified categories:
+
+    context nodes (license / manual / distance / order)   -- run concurrently
+        -> menu_search          -- waits only for context that filters the search (G, H, I, J)
+        -> compliance_checker   -- K / L: joins menu_search and the remaining context
+        -> formatter
+
+Every node is one sub-agent run whose prompt carries the question, the linked
+entities and the outputs of its dependencies. Latency is the critical path of the
+DAG instead of the sum of all agent runs. Questions without any category fall
+back to the orchestrator.
+"""
+
+import sys
+import threading
+import time
+from collections.abc import Mapping
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from datapizza.agents import Agent
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+from hackapizza_solution.agents.session import QuestionSession
+from hackapizza_solution.config import DAG_EXECUTION, DAG_MAX_PARALLEL
+from hackapizza_solution.entity_linker import format_mentions, link_entities
+from hackapizza_solution.llm.client import response_tokens
+from hackapizza_solution.tracing import run_in_context
+
+# Context agents: (categories whose menu search is filtered by their result,
+# categories whose compliance check uses it, what they are asked)
+CONTEXT_NODES: dict[str, tuple[set[str], set[str], str]] = {
+    "license_checker": (
+        {"G"}, {"L"},
+        "Individua gli chef e i ristoranti che soddisfano i requisiti di licenza della domanda "
+        "(tipo di licenza e grado) e, se la domanda cita tecniche, le licenze che richiedono.",
+    ),
+    "manual_expert": (
+        {"H"}, set(),
+        "Elenca tutte le tecniche del Manuale di Cucina che appartengono alle categorie citate nella domanda.",
+    ),
+    "distance_calculator": (
+        {"I"}, set(),
+        "Elenca tutti i pianeti entro la distanza indicata dal pianeta citato nella domanda.",
+    ),
+    "order_expert": (
+        {"J"}, {"K"},
+        "Riassumi le regole dell'ordine professionale citato nella domanda: ingredienti e tecniche "
+        "vietati o richiesti e limiti applicabili.",
+    ),
+}
+COMPLIANCE_CATEGORIES = {"K", "L"}
+
+MENU_SEARCH_INSTRUCTION = (
+    "Trova TUTTI i piatti che soddisfano la domanda, usando i risultati degli altri agenti come vincoli. "
+    "Restituisci ogni piatto nel formato \"- NomePiatto (ristorante: X, pianeta: Y)\"."
+)
+COMPLIANCE_INSTRUCTION = (
+    "Tra i piatti candidati, tieni solo quelli conformi: per i limiti del Codice Galattico verifica le "
+    "percentuali degli ingredienti, per le licenze verifica che lo chef abbia le certificazioni richieste "
+    "dalle tecniche usate. Restituisci i piatti conformi nel formato \"- NomePiatto\"."
+)
+
+_enabled = DAG_EXECUTION
+
+
+def set_enabled(enabled: bool):
+    global _enabled
+    _enabled = enabled
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+class PlanNode:
+    """One sub-agent run in the plan; deps are names of nodes it waits for."""
+
+    def __init__(self, name: str, agent: str, instruction: str, deps: list[str] | None = None):
+        self.name = name
+        self.agent = agent
+        self.instruction = instruction
+        self.deps = deps or []
+
+    def __repr__(self):
+        return f"PlanNode({self.name!r}, deps={self.deps})"
+
+
+def build_plan(categories: set[str], mentions) -> list[PlanNode]:
+    """Generic plan for a set of categories (composite questions get the union of their branches).
+    Context that only the compliance check needs runs alongside the menu search."""
+    nodes = []
+    filters = []
+    for agent, (filter_cats, check_cats, instruction) in CONTEXT_NODES.items():
+        filters_menu = bool(categories & filter_cats)
+        checks = bool(categories & check_cats)
+        # Limit-compliance questions only need the order rules when an order is named
+        if agent == "order_expert" and checks and not filters_menu:
+            checks = any(m.kind == "order" for m in mentions)
+        if filters_menu or checks:
+            nodes.append(PlanNode(agent, agent, instruction))
+        if filters_menu:
+            filters.append(agent)
+    context = [n.name for n in nodes]
+    nodes.append(PlanNode("menu_search", "menu_search", MENU_SEARCH_INSTRUCTION, deps=filters))
+    last = "menu_search"
+    if categories & COMPLIANCE_CATEGORIES:
+        nodes.append(PlanNode("compliance_checker", "compliance_checker", COMPLIANCE_INSTRUCTION,
+                              deps=context + ["menu_search"]))
+        last = "compliance_checker"
+    nodes.append(PlanNode("formatter", "formatter", "", deps=[last]))
+    return nodes
+
+
+def _node_prompt(node: PlanNode, question: str, entities: str, outputs: dict[str, str]) -> str:
+    if node.agent == "formatter":
+        return f"Piatti trovati:\n{outputs[node.deps[0]]}"
+    parts = [f"Domanda: {question}"]
+    if entities:
+        parts.append(f"Entità riconosciute nella domanda (nomi esatti):\n{entities}")
+    for dep in node.deps:
+        parts.append(f"Risultato di {dep}:\n{outputs[dep]}")
+    parts.append(f"Compito: {node.instruction}")
+    return "\n\n".join(parts)
+
+
+def run_plan(nodes: list[PlanNode], run_node, pool: ThreadPoolExecutor) -> dict[str, tuple[str, float, float]]:
+    """Run every node once all its deps are done; independent nodes run concurrently.
+    run_node(node, outputs) -> text. Returns name -> (text, start_s, end_s) relative to the plan start."""
+    start = time.monotonic()
+    outputs: dict[str, str] = {}
+    timings: dict[str, tuple[float, float]] = {}
+    pending = {n.name: n for n in nodes}
+    running = {}
+
+    def timed(node: PlanNode, upstream: dict[str, str]):
+        t0 = time.monotonic() - start
+        text = run_node(node, upstream)
+        return text, t0, time.monotonic() - start
+
+    try:
+        while pending or running:
+            ready = [n for n in pending.values() if all(d in outputs for d in n.deps)]
+            for node in ready:
+                del pending[node.name]
+                running[pool.submit(run_in_context(timed), node, dict(outputs))] = node
+            if not running:
+                raise RuntimeError(f"DAG plan has unsatisfiable dependencies: {list(pending)}")
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                node = running.pop(future)
+                text, t0, t1 = future.result()
+                outputs[node.name] = text
+                timings[node.name] = (t0, t1)
+    finally:
+        for future in running:
+            future.cancel()
+    return {name: (outputs[name], *timings[name]) for name in outputs}
+
+
+class DagResponse:
+    def __init__(self, text: str, node_outputs: dict[str, tuple[str, float, float]]):
+        self.text = text
+        self.node_outputs = node_outputs
+
+
+class DagSession(QuestionSession):
+    """QuestionSession that answers through the category DAG; uncategorized
+    questions go to the orchestrator (agent) like a plain QuestionSession. Without
+    an orchestrator, the process-wide one is used (agents.registry)."""
+
+    def __init__(self, orchestrator: Agent | None, sub_agents: Mapping[str, Agent], keep_summary: bool = False):
+        super().__init__(orchestrator, keep_summary=keep_summary)
+        self.sub_agents = sub_agents
+        self.pool = ThreadPoolExecutor(max_workers=DAG_MAX_PARALLEL, thread_name_prefix="dag")
+        self._tokens_lock = threading.Lock()
+
+    def run(self, question: str):
+        from hackapizza_solution.classification import classify
+
+        result = classify(question)
+        categories = set(result.categories)
+        if not categories:
+            if self.agent is None:
+                from hackapizza_solution.agents.registry import get_orchestrator
+
+                self.agent = get_orchestrator()
+            return super().run(question)
+
+        mentions = link_entities(question)
+        entities = format_mentions(mentions)
+        plan = build_plan(categories, mentions)
+        prompt_question = self._prompt(question)
+        tokens = [0, 0]
+
+        def run_node(node: PlanNode, outputs: dict[str, str]) -> str:
+            response = self.sub_agents[node.agent].run(_node_prompt(node, prompt_question, entities, outputs))
+            prompt_tokens, completion_tokens = response_tokens(response)
+            with self._tokens_lock:
+                tokens[0] += prompt_tokens
+                tokens[1] += completion_tokens
+            return response.text or ""
+
+        outputs = run_plan(plan, run_node, self.pool)
+        response = DagResponse(outputs["formatter"][0], outputs)
+        wall = max(end for _, _, end in outputs.values())
+        self.last_stats = {
+            "prompt_tokens": tokens[0],
+            "completion_tokens": tokens[1],
+            "dag_nodes": len(plan),
+            "dag_wall_s": round(wall, 1),
+            "dag_sum_s": round(sum(end - start for _, start, end in outputs.values()), 1),
+        }
+        if self.keep_summary:
+            self.summary = f"\"{question[:200]}\" -> {response.text.strip()[:200]}"
+        return response
+
+    def close(self):
+        # Queued nodes are dropped; idle pool threads exit
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def print_dag_summary(results: list[dict]):
+    """Wall time of the DAG vs the sum of its agent runs (the sequential equivalent)."""
+    rows = [r for r in results if r.get("dag_nodes")]
+    if not rows:
+        return
+    wall = sum(r["dag_wall_s"] for r in rows)
+    total = sum(r["dag_sum_s"] for r in rows)
+    print("\n--- DAG EXECUTION ---")
+    print(f"  {len(rows)} questions, {sum(r['dag_nodes'] for r in rows)} agent runs")
+    print(f"  Critical path {wall:.1f}s vs sequential {total:.1f}s"
+          f" (saved {total - wall:.1f}s, {1 - wall / total if total else 0:.0%})")
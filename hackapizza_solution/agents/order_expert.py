@@ -4,10 +4,11 @@ import sys
 from pathlib import Path
 
 from datapizza.agents import Agent
-from datapizza.clients.openai import OpenAIClient
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
-from hackapizza_solution.config import OPENAI_API_KEY, MODEL_STRONG
+from hackapizza_solution.agents import cascade
+from hackapizza_solution.config import MODEL_FAST, MODEL_STRONG
+from hackapizza_solution.llm.client import create_client
 from hackapizza_solution.prompts.order_expert import SYSTEM_PROMPT
 from hackapizza_solution.tools.rag_tools import (
     query_codice_galattico,
@@ -15,14 +16,21 @@ from hackapizza_solution.tools.rag_tools import (
 )
 
 
-def create_agent() -> Agent:
-    client = OpenAIClient(
-        api_key=OPENAI_API_KEY,
-        model=MODEL_STRONG,
-    )
+def _build(model: str, system_prompt: str) -> Agent:
     return Agent(
         name="order_expert",
-        client=client,
-        system_prompt=SYSTEM_PROMPT,
+        client=create_client(model),
+        system_prompt=system_prompt,
         tools=[query_codice_galattico, query_manuale_cucina],
     )
+
+
+def create_agent() -> Agent:
+    """MODEL_STRONG agent; with cascade mode, a MODEL_FAST agent that escalates to it."""
+    if not cascade.is_enabled():
+        return _build(MODEL_STRONG, SYSTEM_PROMPT)
+    return cascade.cascade_agent(
+        _build(MODEL_FAST, SYSTEM_PROMPT + cascade.CONFIDENCE_INSTRUCTION),
+        _build(MODEL_STRONG, SYSTEM_PROMPT),
+        check=cascade.check_order,
+    )
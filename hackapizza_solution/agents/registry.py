@@ -0,0 +1,141 @@
+"""Agent factory: builds each agent at most once per process.
+
+Agent modules (and the tools, clients and prompts they pull in) are imported only
+when an agent is first needed, so interactive startup does not pay for agents the
+question never uses. build_agent() always returns a new agent, for callers that
+need their own instances (batch workers and service sessions, which mutate
+max_steps and run the stateful orchestrator concurrently); get_agent() and
+get_orchestrator() return the per-process cached ones used by the single-question
+CLI and the REPL, where questions run one at a time.
+
+CategorySession classifies each question and runs it on the orchestrator that can
+call only the sub-agents its categories need (roles_for), so the first question
+builds a handful of agents instead of all seven.
+
+The orchestrator calls its sub-agents through delegation_tool() rather than
+can_call(): can_call() tools await Agent.a_run, which a synchronous orchestrator
+run executes on datapizza's shared event-loop thread, outside the question's
+context (no trace spans, no deadline) and serialized across batch workers.
+"""
+
+import importlib
+import sys
+import threading
+from collections.abc import Mapping
+from pathlib import Path
+
+from datapizza.tools import Tool
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+from hackapizza_solution.agents.session import QuestionSession
+from hackapizza_solution.deadline import bound_agent
+from hackapizza_solution.tracing import instrument_agent
+
+AGENT_MODULES = {
+    "menu_search": "hackapizza_solution.agents.menu_search",
+    "manual_expert": "hackapizza_solution.agents.manual_expert",
+    "license_checker": "hackapizza_solution.agents.license_checker",
+    "distance_calculator": "hackapizza_solution.agents.distance_calculator",
+    "order_expert": "hackapizza_solution.agents.order_expert",
+    "compliance_checker": "hackapizza_solution.agents.compliance_checker",
+    "formatter": "hackapizza_solution.agents.formatter",
+}
+SUB_AGENT_ROLES = tuple(AGENT_MODULES)
+# Needed by every question, whatever its categories
+_BASE_ROLES = frozenset({"menu_search", "formatter"})
+
+_agents: dict[str, object] = {}
+_orchestrators: dict[frozenset[str], object] = {}
+_lock = threading.RLock()
+
+
+def build_agent(role: str):
+    """A new, instrumented and deadline-bound agent for the role."""
+    module = importlib.import_module(AGENT_MODULES[role])
+    return instrument_agent(bound_agent(module.create_agent()))
+
+
+def delegation_tool(agent) -> Tool:
+    """A tool that runs the sub-agent on the caller's thread, as can_call() would register it
+    (same name and description) but through the synchronous run()."""
+
+    def invoke_agent(input_task: str) -> str:
+        return agent.run(input_task).text
+
+    return Tool(
+        func=invoke_agent,
+        name=agent.name,
+        description=getattr(agent, "description", None) or agent.__doc__ or agent.name,
+    )
+
+
+def get_agent(role: str):
+    """The process-wide agent for the role, built on first use."""
+    with _lock:
+        if role not in _agents:
+            _agents[role] = build_agent(role)
+        return _agents[role]
+
+
+def roles_for(categories: set[str]) -> frozenset[str]:
+    """Sub-agents the orchestrator may need for these categories (all of them when unclassified)."""
+    from hackapizza_solution.agents.dag import COMPLIANCE_CATEGORIES, CONTEXT_NODES
+
+    if not categories:
+        return frozenset(SUB_AGENT_ROLES)
+    roles = set(_BASE_ROLES)
+    for role, (filter_cats, check_cats, _) in CONTEXT_NODES.items():
+        if categories & (filter_cats | check_cats):
+            roles.add(role)
+    if categories & COMPLIANCE_CATEGORIES:
+        roles.add("compliance_checker")
+    return frozenset(roles)
+
+
+def get_orchestrator(roles: frozenset[str] = frozenset(SUB_AGENT_ROLES)):
+    """The process-wide orchestrator that can call exactly these sub-agents."""
+    from hackapizza_solution.agents.orchestrator import create_orchestrator
+
+    with _lock:
+        if roles not in _orchestrators:
+            sub_agents = {role: get_agent(role) for role in SUB_AGENT_ROLES if role in roles}
+            _orchestrators[roles] = create_orchestrator(sub_agents)
+        return _orchestrators[roles]
+
+
+class LazyAgents(Mapping):
+    """Role -> agent mapping that builds agents on first access (for DagSession)."""
+
+    def __getitem__(self, role: str):
+        if role not in AGENT_MODULES:
+            raise KeyError(role)
+        return get_agent(role)
+
+    def __iter__(self):
+        return iter(SUB_AGENT_ROLES)
+
+    def __len__(self):
+        return len(SUB_AGENT_ROLES)
+
+
+class CategorySession(QuestionSession):
+    """QuestionSession that picks, per question, the cached orchestrator for its categories."""
+
+    def __init__(self, keep_summary: bool = False):
+        super().__init__(None, keep_summary=keep_summary)
+
+    def run(self, question: str):
+        from hackapizza_solution.classification import classify
+
+        categories = set(classify(question).categories)
+        self.agent = get_orchestrator(roles_for(categories))
+        return super().run(question)
+
+
+def create_cached_session(keep_summary: bool = False) -> QuestionSession:
+    """A session on the process-wide agents, building only those its questions need."""
+    from hackapizza_solution.agents.dag import DagSession, is_enabled
+
+    if is_enabled():
+        return DagSession(None, LazyAgents(), keep_summary=keep_summary)
+    return CategorySession(keep_summary=keep_summary)
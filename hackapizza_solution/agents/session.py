@@ -0,0 +1,95 @@
+"""Per-question session scope for the stateful orchestrator.
+
+The orchestrator is built with stateless=False so that its memory spans the
+multi-step delegation of one question. Reusing it across questions would carry
+every previous conversation into the next one, so QuestionSession resets the
+memory before each question and keeps the finished conversation as a snapshot.
+Optionally a compact summary of the previous question is prepended to the next
+prompt (used by the interactive REPL for follow-up questions).
+"""
+
+import sys
+from pathlib import Path
+
+from datapizza.agents import Agent
+from datapizza.memory import Memory
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+
+def reset_memory(agent: Agent) -> Memory | None:
+    """Give the agent a fresh memory and return the previous one."""
+    previous = getattr(agent, "_memory", None)
+    agent._memory = Memory()
+    return previous
+
+
+class QuestionSession:
+    """Runs questions on one orchestrator with memory scoped to a single question."""
+
+    def __init__(self, agent: Agent, keep_summary: bool = False):
+        self.agent = agent
+        self.keep_summary = keep_summary
+        self.summary: str | None = None
+        self.snapshot: Memory | None = None
+        self.last_stats: dict = {}
+
+    def _prompt(self, question: str) -> str:
+        if not (self.keep_summary and self.summary):
+            return question
+        return f"Contesto della domanda precedente: {self.summary}\n\nDomanda: {question}"
+
+    def run(self, question: str):
+        """Run one question in a clean memory scope. The conversation is kept in
+        self.snapshot and per-question token/memory stats in self.last_stats."""
+        # Imported here: the OpenAI SDK behind llm.client is the slowest import of agents.registry
+        from hackapizza_solution.llm.client import response_tokens
+
+        reset_memory(self.agent)
+        response = None
+        try:
+            response = self.agent.run(self._prompt(question))
+            return response
+        finally:
+            self.snapshot = reset_memory(self.agent)
+            prompt_tokens, completion_tokens = response_tokens(response)
+            self.last_stats = {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "memory_turns": len(self.snapshot) if self.snapshot is not None else 0,
+            }
+            if self.keep_summary:
+                answer = (response.text if response is not None else "") or ""
+                self.summary = f"\"{question[:200]}\" -> {answer.strip()[:200]}"
+
+    def close(self):
+        """Release the threads the session holds (none here; see DagSession)."""
+
+
+def create_session(keep_summary: bool = False) -> QuestionSession:
+    """A new session on a fresh orchestrator; a DagSession when DAG execution is enabled."""
+    from hackapizza_solution.agents.dag import DagSession, is_enabled
+    from hackapizza_solution.agents.orchestrator import create_orchestrator, create_sub_agents
+
+    sub_agents = create_sub_agents()
+    orchestrator = create_orchestrator(sub_agents)
+    if is_enabled():
+        return DagSession(orchestrator, sub_agents, keep_summary=keep_summary)
+    return QuestionSession(orchestrator, keep_summary=keep_summary)
+
+
+def print_token_summary(results: list[dict]):
+    """Show that per-question prompt size stays flat over a batch: compare the first
+    and last quarter of the run (by row order)."""
+    ordered = sorted(results, key=lambda r: r.get("row_id", 0))
+    tokens = [r.get("prompt_tokens", 0) for r in ordered if r.get("prompt_tokens")]
+    if not tokens:
+        return
+    quarter = max(1, len(tokens) // 4)
+    first = sum(tokens[:quarter]) / quarter
+    last = sum(tokens[-quarter:]) / quarter
+    print("\n--- TOKEN ACCOUNTING (orchestrator, per question) ---")
+    print(f"  Questions with usage: {len(tokens)}, total prompt tokens: {sum(tokens)}")
+    print(f"  Mean prompt tokens: first {quarter} = {first:.0f}, last {quarter} = {last:.0f}"
+          f" (ratio {last / first if first else 0:.2f})")
+    print(f"  Max prompt tokens: {max(tokens)}")
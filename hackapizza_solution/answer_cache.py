@@ -0,0 +1,278 @@
+"""Answer cache: final ID sets of agent answers, reused for repeated and paraphrased questions.
+
+The same questions come back in slightly different wordings, and each one ran the
+whole multi-agent pipeline again (20-60s). Agent answers are stored in SQLite
+(ANSWER_CACHE_DB) and looked up before the agents run:
+
+- exact: the normalized text (entity_linker.normalize: lowercase, no accents,
+  collapsed whitespace, no trailing punctuation) has an answer;
+- similar: an answered question has the same signature -- linked entities,
+  classified categories, numbers and negations, so "entro 3 anni luce" never
+  matches "entro 5 anni luce" and "senza X" never matches "con X" -- and an
+  embedding cosine of at least ANSWER_CACHE_MIN_SIMILARITY (the question is
+  embedded through classification.embed_texts, so its embedding cache applies).
+
+Every entry is tagged with the data version: a hash of menus.json, dish_mapping.json,
+Distanze.csv, blogpost_percentages.json, the content fingerprint of the Qdrant
+collections (RAG_MANIFEST_JSON, written by ingest_rag), their sizes and the
+embedding model. When the version changes (new --prepare, re-ingested collections,
+even with the same number of points) the old entries are dropped on first use. Answers of "0" and deadline-truncated
+answers are not stored.
+
+Enabled with --answer-cache (or ANSWER_CACHE=1).
+"""
+
+import hashlib
+import json
+import re
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from hackapizza_solution.config import (
+    ANSWER_CACHE_DB, ANSWER_CACHE_ENABLED, ANSWER_CACHE_MAX_AGE_DAYS, ANSWER_CACHE_MIN_SIMILARITY,
+    BLOGPOST_PCT_JSON, COLLECTION_BLOG, COLLECTION_CODICE, COLLECTION_MANUALE, DISH_MAPPING_JSON,
+    DISTANZE_CSV, EMBED_MODEL, MENUS_JSON, QDRANT_HOST, QDRANT_PORT, RAG_MANIFEST_JSON,
+)
+from hackapizza_solution.tracing import span
+
+_DATA_FILES = (MENUS_JSON, DISH_MAPPING_JSON, DISTANZE_CSV, BLOGPOST_PCT_JSON, RAG_MANIFEST_JSON)
+_NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)?")
+_NEGATIONS = {"non", "senza", "tranne", "escluso", "esclusi", "esclusa", "escluse", "eccetto", "nessun", "nessuno"}
+
+_enabled = ANSWER_CACHE_ENABLED
+
+
+def set_enabled(enabled: bool):
+    global _enabled
+    _enabled = enabled
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def normalize_question(question: str) -> str:
+    from hackapizza_solution.entity_linker import normalize
+
+    return normalize(question).rstrip(" ?!.")
+
+
+def _file_digest(path: Path) -> str:
+    if not path.exists():
+        return f"{path.name}:missing"
+    return f"{path.name}:{hashlib.sha256(path.read_bytes()).hexdigest()[:16]}"
+
+
+def _collection_sizes() -> str | None:
+    """Point count per Qdrant collection, None when Qdrant cannot be reached."""
+    try:
+        from qdrant_client import QdrantClient
+
+        client = QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT, timeout=5)
+        try:
+            return ",".join(
+                f"{name}={client.count(collection_name=name, exact=True).count}"
+                for name in (COLLECTION_CODICE, COLLECTION_MANUALE, COLLECTION_BLOG)
+            )
+        finally:
+            client.close()
+    except Exception as e:
+        print(f"  Answer cache disabled: Qdrant collections not readable ({type(e).__name__}: {e})")
+        return None
+
+
+def data_version() -> str | None:
+    """Hash of everything the answers are computed from; None when it cannot be determined."""
+    collections = _collection_sizes()
+    if collections is None:
+        return None
+    parts = [_file_digest(path) for path in _DATA_FILES] + [collections, EMBED_MODEL]
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def signature(question: str) -> str:
+    """What a paraphrase must share with a cached question: entities, categories, numbers, negations."""
+    from hackapizza_solution.classification import classify
+    from hackapizza_solution.entity_linker import link_entities
+
+    normalized = normalize_question(question)
+    entities = sorted({f"{m.kind}:{m.name}" for m in link_entities(question, fuzzy=False)})
+    categories = sorted(classify(question).categories)
+    numbers = sorted(n.replace(",", ".") for n in _NUMBER_RE.findall(normalized))
+    negated = bool(_NEGATIONS & set(re.findall(r"\w+", normalized)))
+    return json.dumps([entities, categories, numbers, negated], ensure_ascii=False)
+
+
+class CachedAnswer:
+    def __init__(self, ids: str, question: str, match: str, similarity: float = 1.0):
+        self.ids = ids
+        self.question = question
+        self.match = match
+        self.similarity = similarity
+
+
+class AnswerCache:
+    def __init__(self, path: Path = ANSWER_CACHE_DB, min_similarity: float = ANSWER_CACHE_MIN_SIMILARITY,
+                 max_age_days: float = ANSWER_CACHE_MAX_AGE_DAYS):
+        self.path = path
+        self.min_similarity = min_similarity
+        self.max_age_s = max_age_days * 86400
+        self.stats = {"exact": 0, "similar": 0, "misses": 0, "stores": 0, "invalidated": 0, "errors": 0}
+        self._version: str | None = None
+        self._version_checked = False
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    @property
+    def version(self) -> str | None:
+        """Data version of this process (computed once); None disables the cache rather than
+        dropping every entry while Qdrant is unreachable."""
+        if not self._version_checked:
+            self._version = data_version()
+            self._version_checked = True
+        return self._version
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS answers ("
+                " key TEXT PRIMARY KEY, question TEXT, signature TEXT, embedding BLOB,"
+                " ids TEXT, data_version TEXT, created REAL, hits INTEGER DEFAULT 0)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS answers_signature ON answers (signature, data_version)")
+            self.invalidate()
+        return self._conn
+
+    def invalidate(self):
+        """Drop entries of another data version or older than the maximum age."""
+        cursor = self._conn.execute(
+            "DELETE FROM answers WHERE data_version != ? OR created < ?",
+            (self.version, time.time() - self.max_age_s),
+        )
+        self._conn.commit()
+        self.stats["invalidated"] += cursor.rowcount
+        if cursor.rowcount:
+            print(f"  Answer cache: dropped {cursor.rowcount} entries of another data version")
+
+    @staticmethod
+    def key(question: str) -> str:
+        return hashlib.sha256(normalize_question(question).encode("utf-8")).hexdigest()
+
+    def _embedding(self, question: str) -> np.ndarray | None:
+        from hackapizza_solution.classification import embed_texts
+
+        try:
+            return embed_texts([question])[0]
+        except Exception:
+            self.stats["errors"] += 1
+            return None
+
+    def _hit(self, key: str, ids: str, question: str, match: str, similarity: float = 1.0) -> CachedAnswer:
+        self._conn.execute("UPDATE answers SET hits = hits + 1 WHERE key = ?", (key,))
+        self._conn.commit()
+        self.stats[match] += 1
+        return CachedAnswer(ids, question, match, similarity)
+
+    def lookup(self, question: str) -> CachedAnswer | None:
+        key = self.key(question)
+        with self._lock:
+            if self.version is None:
+                return None
+            row = self._connection().execute(
+                "SELECT ids, question FROM answers WHERE key = ? AND data_version = ?", (key, self.version)
+            ).fetchone()
+            if row is not None:
+                return self._hit(key, *row, "exact")
+        sig = signature(question)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, ids, question, embedding FROM answers"
+                " WHERE signature = ? AND data_version = ? AND embedding IS NOT NULL",
+                (sig, self.version),
+            ).fetchall()
+        if rows:
+            vector = self._embedding(question)
+            if vector is not None:
+                matrix = np.stack([np.frombuffer(blob, dtype=np.float32) for *_, blob in rows])
+                similarities = matrix @ vector
+                best = int(similarities.argmax())
+                if similarities[best] >= self.min_similarity:
+                    best_key, ids, cached_question, _ = rows[best]
+                    with self._lock:
+                        return self._hit(best_key, ids, cached_question, "similar", float(similarities[best]))
+        with self._lock:
+            self.stats["misses"] += 1
+        return None
+
+    def store(self, question: str, ids: str):
+        if not ids or ids == "0" or self.version is None:
+            return
+        vector = self._embedding(question)
+        embedding = None if vector is None else np.ascontiguousarray(vector, dtype=np.float32).tobytes()
+        sig = signature(question)
+        with self._lock:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO answers (key, question, signature, embedding, ids, data_version, created)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self.key(question), question, sig, embedding, ids, self.version, time.time()),
+            )
+            self._conn.commit()
+            self.stats["stores"] += 1
+
+
+_cache: AnswerCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_answer_cache() -> AnswerCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = AnswerCache()
+        return _cache
+
+
+def lookup(question: str) -> CachedAnswer | None:
+    """Cached answer for the question or a paraphrase; None when disabled or on a miss."""
+    if not _enabled:
+        return None
+    with span("answer_cache", "lookup") as attrs:
+        try:
+            hit = get_answer_cache().lookup(question)
+        except Exception as e:
+            print(f"  Answer cache lookup failed ({type(e).__name__}: {e})")
+            return None
+        attrs["match"] = hit.match if hit else "miss"
+        return hit
+
+
+def store(question: str, ids: str):
+    if not _enabled:
+        return
+    try:
+        get_answer_cache().store(question, ids)
+    except Exception as e:
+        print(f"  Answer cache store failed ({type(e).__name__}: {e})")
+
+
+def print_answer_cache_summary():
+    if not _enabled or _cache is None:
+        return
+    s = _cache.stats
+    lookups = s["exact"] + s["similar"] + s["misses"]
+    rate = (s["exact"] + s["similar"]) / lookups if lookups else 0.0
+    if _cache.version is None:
+        return
+    print(f"\n--- ANSWER CACHE (data version {_cache.version}) ---")
+    print(f"  {s['exact'] + s['similar']} hits / {lookups} lookups ({rate:.0%}): {s['exact']} exact, "
+          f"{s['similar']} paraphrases; {s['stores']} answers stored, {s['invalidated']} invalidated, "
+          f"{s['errors']} embedding errors")
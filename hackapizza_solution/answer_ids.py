@@ -0,0 +1,48 @@
+"""Dish IDs in an agent or tool response (shared by main and the deadline fallback)."""
+
+import re
+
+# Valid dish ID range (from dish_mapping.json)
+VALID_ID_MIN, VALID_ID_MAX = 0, 286
+
+
+def extract_ids_from_response(text: str) -> tuple[str, str | None]:
+    """Extract numeric IDs from the LLM response. Only trusts explicit ID patterns to avoid
+    false positives (e.g. percentages, years, distances). Returns (ids_str, zero_cause)."""
+    def _filter_valid_ids(nums: list[int]) -> list[int]:
+        return sorted(set(n for n in nums if VALID_ID_MIN <= n <= VALID_ID_MAX))
+
+    # Try to find "IDS: X,Y,Z" pattern first (from our formatter tool - explicit output)
+    ids_match = re.search(r"IDS:\s*([\d,\s]+)", text, re.IGNORECASE)
+    if ids_match:
+        raw = ids_match.group(1)
+        nums = [int(x.strip()) for x in raw.split(",") if x.strip().isdigit()]
+        valid = _filter_valid_ids(nums)
+        if valid:
+            return ",".join(str(n) for n in valid), None
+        if nums:
+            invalid = [n for n in nums if n < VALID_ID_MIN or n > VALID_ID_MAX]
+            return "0", f"Formatter returned IDs outside valid range ({VALID_ID_MIN}-{VALID_ID_MAX}): {invalid[:5]}"
+        return "0", "Formatter returned IDS: but no valid IDs"
+
+    # Fallback: if the entire response is ONLY numbers and commas (orchestrator passthrough)
+    clean = text.strip()
+    if re.match(r"^[\d,\s]+$", clean):
+        nums = [int(x.strip()) for x in clean.split(",") if x.strip().isdigit()]
+        valid = _filter_valid_ids(nums)
+        if valid:
+            return ",".join(str(n) for n in valid), None
+        if nums:
+            invalid = [n for n in nums if n < VALID_ID_MIN or n > VALID_ID_MAX]
+            return "0", f"Response contains numbers outside valid ID range ({VALID_ID_MIN}-{VALID_ID_MAX}): {invalid[:5]}"
+        return "0", "Response is numeric but empty"
+
+    # No fallback: do NOT extract numbers from free text (avoids false positives from
+    # percentages, distances, years, counts, etc.)
+    if not text or not text.strip():
+        return "0", "Empty response from LLM"
+    if "NOT FOUND" in text or "NON TROVATI" in text:
+        return "0", "Dish names not found in mapping (NOT FOUND in response)"
+    if "nessun" in text.lower() or "no dish" in text.lower() or "no chef" in text.lower():
+        return "0", "Agents reported no matching dishes/chefs"
+    return "0", "No explicit IDs in response - LLM may not have invoked formatter or returned unexpected format"
@@ -0,0 +1,132 @@
+"""Batch pre-pass: classify all questions, group them and warm shared lookups.
+
+Many questions in domande.csv need the same lookups: the same planets' radius
+sets, the same license thresholds. Before dispatching, plan_batch() classifies
+every question and links its entities, groups questions by categories and shared
+entities, and collects the distinct tool calls they will need. prefetch() runs
+those calls concurrently through the tool memo (tools/memo.py), so the first
+question of each group finds a warm cache like the others. Questions are then
+dispatched group by group, keeping related questions close together.
+
+Only deterministic lookups, whose arguments can be read off the question, are
+prefetched. RAG queries are not: the agents phrase their own queries, which would
+not match a query made from the bare order name.
+"""
+
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from hackapizza_solution.config import PREFETCH_WORKERS
+from hackapizza_solution.data_preparation.menu_preparser import extract_licenses
+from hackapizza_solution.entity_linker import LICENSE_NAMES, Mention, link_entities
+from hackapizza_solution.tools.distance_tools import get_planets_within_radius
+from hackapizza_solution.tools.license_tools import get_chefs_with_license
+
+_RADIUS_RE = re.compile(r"(\d+(?:[.,]\d+)?)\s*anni\s*luce", re.IGNORECASE)
+_LICENSE_CODE_BY_NAME = {name: code for code, name in LICENSE_NAMES.items()}
+# Entity kinds that identify which shared lookups a question needs
+_GROUP_KINDS = ("planet", "license", "order", "restaurant")
+
+
+class QuestionPlan:
+    def __init__(self, row_id: int, question: str, categories: list[str], mentions: list[Mention]):
+        self.row_id = row_id
+        self.question = question
+        self.categories = categories
+        self.mentions = mentions
+
+    @property
+    def group_key(self) -> tuple:
+        entities = sorted({(m.kind, m.name) for m in self.mentions if m.kind in _GROUP_KINDS})
+        return tuple(self.categories), tuple(entities)
+
+    def lookups(self) -> set[tuple]:
+        """Distinct (tool, args) calls this question's agents are expected to make."""
+        cats = set(self.categories)
+        calls = set()
+        planets = [m.name for m in self.mentions if m.kind == "planet"]
+        if "I" in cats:
+            radius = _RADIUS_RE.search(self.question)
+            if radius:
+                for planet in planets:
+                    calls.add((get_planets_within_radius, (planet, float(radius.group(1).replace(",", ".")))))
+        if cats & {"G", "L"}:
+            linked = {_LICENSE_CODE_BY_NAME[m.name] for m in self.mentions if m.kind == "license"}
+            for code, grade in extract_licenses(self.question).items():
+                if code in linked:
+                    calls.add((get_chefs_with_license, (code, grade)))
+        return calls
+
+
+class BatchPlan:
+    def __init__(self, questions: list[QuestionPlan]):
+        self.questions = questions
+        self.groups: dict[tuple, list[QuestionPlan]] = {}
+        for q in questions:
+            self.groups.setdefault(q.group_key, []).append(q)
+
+    def dispatch_order(self) -> list[tuple[int, str]]:
+        """Questions ordered group by group (largest groups first), rows ascending within a group."""
+        ordered = []
+        for members in sorted(self.groups.values(), key=lambda g: (-len(g), g[0].row_id)):
+            ordered.extend((q.row_id, q.question) for q in sorted(members, key=lambda q: q.row_id))
+        return ordered
+
+    def lookups(self) -> dict[tuple, int]:
+        """Distinct lookups -> number of questions needing them."""
+        counts: dict[tuple, int] = {}
+        for q in self.questions:
+            for call in q.lookups():
+                counts[call] = counts.get(call, 0) + 1
+        return counts
+
+
+def plan_batch(questions: list[tuple[int, str]]) -> BatchPlan:
+    from hackapizza_solution.classification import classify_many
+
+    plans = []
+    results = classify_many([question for _, question in questions])
+    for (row_id, question), result in zip(questions, results):
+        categories = sorted(result.categories, key=lambda c: -result.categories[c])
+        plans.append(QuestionPlan(row_id, question, categories, link_entities(question, fuzzy=False)))
+    return BatchPlan(plans)
+
+
+def prefetch(plan: BatchPlan, workers: int = PREFETCH_WORKERS) -> dict[str, int]:
+    """Run every distinct lookup once, concurrently, to warm the tool memo."""
+    calls = plan.lookups()
+    stats = {"lookups": len(calls), "shared": sum(1 for n in calls.values() if n > 1), "failed": 0}
+    if not calls:
+        return stats
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch") as pool:
+        futures = {pool.submit(tool, *args): (tool, args) for tool, args in calls}
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                tool, args = futures[future]
+                stats["failed"] += 1
+                print(f"  Prefetch {tool.name}{args} failed: {type(e).__name__}: {e}")
+    return stats
+
+
+def plan_and_prefetch(questions: list[tuple[int, str]]) -> list[tuple[int, str]]:
+    """Pre-pass for run_batch: returns the questions in dispatch order."""
+    start = time.time()
+    plan = plan_batch(questions)
+    planned = time.time()
+    stats = prefetch(plan)
+    print("--- BATCH PLAN ---")
+    print(f"  {len(plan.questions)} questions in {len(plan.groups)} groups "
+          f"(classified and linked in {planned - start:.1f}s)")
+    for key, members in sorted(plan.groups.items(), key=lambda kv: -len(kv[1]))[:5]:
+        categories, entities = key
+        names = ", ".join(name for _, name in entities) or "-"
+        print(f"    {'+'.join(categories) or '?'} [{names}]: {len(members)} questions")
+    print(f"  Prefetched {stats['lookups']} lookups ({stats['shared']} shared by 2+ questions, "
+          f"{stats['failed']} failed) in {time.time() - planned:.1f}s\n")
+    return plan.dispatch_order()
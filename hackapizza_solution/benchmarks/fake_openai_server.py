@@ -0,0 +1,159 @@
+"""Local OpenAI-compatible HTTP server that injects latency outliers.
+
+Answers POST /v1/responses and /v1/chat/completions with a fixed assistant message
+after a lognormal base latency; with probability --outlier-rate a request instead
+hangs for --outlier-latency seconds, like the provider calls that make up our p99.
+Used by benchmarks/hedging.py, and usable on its own to run main.py against it:
+
+    ./pizza_env/bin/python -m hackapizza_solution.benchmarks.fake_openai_server --port 8765 &
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=fake ./pizza_env/bin/python -m hackapizza_solution.main ...
+
+(the openai SDK reads OPENAI_BASE_URL when no base_url is passed).
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_CHARS_PER_TOKEN = 4
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, latency_s: float = 0.2, jitter: float = 0.25,
+                 outlier_rate: float = 0.05, outlier_latency_s: float = 20.0, reply: str = "0", seed: int = 0):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.latency_s = latency_s
+        self.jitter = jitter
+        self.outlier_rate = outlier_rate
+        self.outlier_latency_s = outlier_latency_s
+        self.reply = reply
+        self.stats = {"requests": 0, "outliers": 0}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def next_delay(self) -> float:
+        with self._lock:
+            self.stats["requests"] += 1
+            if self._random.random() < self.outlier_rate:
+                self.stats["outliers"] += 1
+                return self.outlier_latency_s
+            return self.latency_s * self._random.lognormvariate(0, self.jitter)
+
+    def start(self) -> "FakeOpenAIServer":
+        threading.Thread(target=self.serve_forever, name="fake-openai", daemon=True).start()
+        return self
+
+
+def _responses_body(model: str, text: str, prompt_tokens: int) -> dict:
+    completion_tokens = max(1, len(text) // _CHARS_PER_TOKEN)
+    return {
+        "id": f"resp_{uuid.uuid4().hex}",
+        "object": "response",
+        "created_at": int(time.time()),
+        "model": model,
+        "status": "completed",
+        "output": [{
+            "type": "message",
+            "id": f"msg_{uuid.uuid4().hex}",
+            "status": "completed",
+            "role": "assistant",
+            "content": [{"type": "output_text", "text": text, "annotations": []}],
+        }],
+        "parallel_tool_calls": True,
+        "tool_choice": "auto",
+        "tools": [],
+        "usage": {
+            "input_tokens": prompt_tokens,
+            "output_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "input_tokens_details": {"cached_tokens": 0},
+            "output_tokens_details": {"reasoning_tokens": 0},
+        },
+    }
+
+
+def _chat_body(model: str, text: str, prompt_tokens: int) -> dict:
+    completion_tokens = max(1, len(text) // _CHARS_PER_TOKEN)
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: FakeOpenAIServer
+
+    def do_POST(self):
+        raw = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        try:
+            request = json.loads(raw or b"{}")
+        except json.JSONDecodeError:
+            request = {}
+        if self.path.rstrip("/").endswith("/responses"):
+            build = _responses_body
+        elif self.path.rstrip("/").endswith("/chat/completions"):
+            build = _chat_body
+        else:
+            self._send(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+            return
+        time.sleep(self.server.next_delay())
+        prompt_tokens = max(1, len(raw) // _CHARS_PER_TOKEN)
+        self._send(200, build(request.get("model", "fake"), self.server.reply, prompt_tokens))
+
+    def _send(self, status: int, body: dict):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake OpenAI server with latency outliers")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2, help="Median seconds per request")
+    parser.add_argument("--outlier-rate", type=float, default=0.05, help="Fraction of requests that hang")
+    parser.add_argument("--outlier-latency", type=float, default=20.0, help="Seconds a hanging request takes")
+    parser.add_argument("--reply", default="0", help="Assistant message returned for every request")
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(args.port, args.latency, outlier_rate=args.outlier_rate,
+                              outlier_latency_s=args.outlier_latency, reply=args.reply)
+    print(f"Fake OpenAI server on {server.base_url} (latency {args.latency}s, "
+          f"{args.outlier_rate:.0%} outliers of {args.outlier_latency}s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(f"{server.stats['requests']} requests, {server.stats['outliers']} outliers")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+"""Offline stand-ins for the three external services: OpenAI, Cohere and Qdrant.
+
+- ScriptedLLMClient: a ScheduledOpenAIClient whose _invoke never goes to the
+  network. It recognizes the agent from its system prompt and replays a canned
+  tool-call plan (per agent, driven by the classified categories and the entities
+  linked in its input), sleeping a configurable latency per call. Everything above
+  _invoke (response cache, scheduler, datapizza agent loop, real tools) runs as in
+  production.
+- HashEmbedder: deterministic feature-hashing embedder (EMBED_DIM floats).
+- InMemoryVectorstore: cosine search over numpy matrices, same search() signature
+  as the Qdrant store used by rag_tools.
+"""
+
+import hashlib
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+
+import numpy as np
+from datapizza.core.clients import ClientResponse
+from datapizza.core.clients.models import TokenUsage
+from datapizza.type import FunctionCallBlock, TextBlock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+from hackapizza_solution.agents.dag import CONTEXT_NODES
+from hackapizza_solution.config import EMBED_DIM, MODEL_STRONG
+from hackapizza_solution.data_preparation.menu_preparser import extract_licenses
+from hackapizza_solution.agents.cascade import CONFIDENCE_INSTRUCTION
+from hackapizza_solution.entity_linker import LICENSE_NAMES, link_entities
+from hackapizza_solution.llm.client import ScheduledOpenAIClient, estimate_tokens
+from hackapizza_solution.prompts import (
+    compliance_checker, distance_calculator, formatter, license_checker,
+    manual_expert, menu_search, orchestrator, order_expert,
+)
+
+_ROLE_BY_PROMPT = {
+    orchestrator.SYSTEM_PROMPT: "orchestrator",
+    menu_search.SYSTEM_PROMPT: "menu_search",
+    manual_expert.SYSTEM_PROMPT: "manual_expert",
+    license_checker.SYSTEM_PROMPT: "license_checker",
+    distance_calculator.SYSTEM_PROMPT: "distance_calculator",
+    order_expert.SYSTEM_PROMPT: "order_expert",
+    compliance_checker.SYSTEM_PROMPT: "compliance_checker",
+    formatter.SYSTEM_PROMPT: "formatter",
+}
+_CATEGORY_LINE_RE = re.compile(r"^\s+([A-L]) \(\d+%\)", re.MULTILINE)
+_DISH_LINE_RE = re.compile(r"^\s*-\s+(.+?)(?:\s+\((?:restaurant|ristorante)[^)]*\))?\s*$", re.MULTILINE)
+_RADIUS_RE = re.compile(r"(\d+(?:[.,]\d+)?)\s*anni\s*luce", re.IGNORECASE)
+_LICENSE_CODE_BY_NAME = {name: code for code, name in LICENSE_NAMES.items()}
+
+
+# --- scripted plans: generators yielding ("call", tool, args) / ("text", str), receiving tool results ---
+
+def _dish_names(text: str) -> list[str]:
+    return [m.group(1).strip() for m in _DISH_LINE_RE.finditer(text or "")]
+
+
+def _orchestrator_plan(question: str):
+    classification = yield ("call", "classify_question", {"question": question})
+    categories = set(_CATEGORY_LINE_RE.findall(classification or ""))
+    context = []
+    for agent, (filter_cats, check_cats, _) in CONTEXT_NODES.items():
+        if categories & (filter_cats | check_cats):
+            context.append((yield ("call", agent, {"input": question})) or "")
+    found = yield ("call", "menu_search", {"input": "\n\n".join([question, *context])})
+    if categories & {"K", "L"}:
+        found = yield ("call", "compliance_checker", {"input": f"{question}\n\n{found}"})
+    ids = yield ("call", "result_formatter", {"input": f"Piatti trovati:\n{found}"})
+    yield ("text", ids or "0")
+
+
+def _menu_search_plan(text: str):
+    mentions = link_entities(text, kinds=("ingredient", "technique", "restaurant", "planet"), fuzzy=False)
+    tool_for_kind = {
+        "ingredient": ("search_dishes_by_ingredient", "ingredient"),
+        "technique": ("search_dishes_by_technique", "technique"),
+        "restaurant": ("filter_dishes_by_restaurant", "restaurant"),
+        "planet": ("filter_dishes_by_planet", "planet"),
+    }
+    results = []
+    for m in mentions[:4]:
+        tool_name, arg = tool_for_kind[m.kind]
+        results.append((yield ("call", tool_name, {arg: m.name})) or "")
+    lines = sorted({f"- {name}" for r in results for name in _dish_names(r)})
+    yield ("text", "\n".join(lines) or "Nessun piatto trovato.")
+
+
+def _license_plan(text: str):
+    linked = {_LICENSE_CODE_BY_NAME[m.name] for m in link_entities(text, kinds=("license",), fuzzy=False)}
+    results = []
+    for code, grade in extract_licenses(text).items():
+        if code in linked:
+            results.append((yield ("call", "get_chefs_with_license", {"license_type": code, "min_grade": grade})))
+    if not results:
+        for m in link_entities(text, kinds=("technique",), fuzzy=False)[:2]:
+            results.append((yield ("call", "get_required_licenses_for_technique", {"technique": m.name})))
+    yield ("text", "\n".join(r or "" for r in results) or "Nessun requisito di licenza trovato.")
+
+
+def _distance_plan(text: str):
+    planets = [m.name for m in link_entities(text, kinds=("planet",), fuzzy=False)]
+    radius = _RADIUS_RE.search(text)
+    if planets and radius:
+        result = yield ("call", "get_planets_within_radius",
+                        {"origin": planets[0], "radius": float(radius.group(1).replace(",", "."))})
+    elif len(planets) >= 2:
+        result = yield ("call", "get_distance", {"planet_a": planets[0], "planet_b": planets[1]})
+    else:
+        result = "Nessun pianeta riconosciuto."
+    yield ("text", result or "")
+
+
+def _manual_plan(text: str):
+    result = yield ("call", "query_manuale_cucina", {"query": text[:300]})
+    yield ("text", result or "")
+
+
+def _order_plan(text: str):
+    orders = [m.name for m in link_entities(text, kinds=("order",), fuzzy=False)]
+    query = orders[0] if orders else text[:300]
+    codice = yield ("call", "query_codice_galattico", {"query": query})
+    manuale = yield ("call", "query_manuale_cucina", {"query": query})
+    yield ("text", f"{codice}\n\n{manuale}")
+
+
+def _compliance_plan(text: str):
+    dishes = _dish_names(text)
+    for name in dishes[:5]:
+        yield ("call", "get_ingredient_percentages", {"dish_name": name})
+    if dishes:
+        yield ("call", "query_codice_galattico", {"query": "limiti sostanze regolamentate"})
+    yield ("text", "\n".join(f"- {name}" for name in dishes) or "Nessun piatto conforme.")
+
+
+def _formatter_plan(text: str):
+    names = _dish_names(text)
+    if not names:
+        yield ("text", "0")
+        return
+    result = yield ("call", "map_dishes_to_ids", {"dish_names": ",".join(names)})
+    ids = re.search(r"IDS:\s*([\d,\s]+)", result or "")
+    yield ("text", ids.group(1).replace(" ", "").strip(",") if ids else "0")
+
+
+PLANS = {
+    "orchestrator": _orchestrator_plan,
+    "menu_search": _menu_search_plan,
+    "license_checker": _license_plan,
+    "distance_calculator": _distance_plan,
+    "manual_expert": _manual_plan,
+    "order_expert": _order_plan,
+    "compliance_checker": _compliance_plan,
+    "formatter": _formatter_plan,
+}
+
+
+def _text_of(value) -> str:
+    """Plain text of an invoke() input (string or list of blocks)."""
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (list, tuple)):
+        return "\n".join(_text_of(v) for v in value)
+    return str(getattr(value, "content", None) or getattr(value, "text", None) or "")
+
+
+def _last_tool_result(memory) -> str | None:
+    """Result of the most recent function call recorded in the agent's memory."""
+    last = None
+    for turn in memory or []:
+        for block in getattr(turn, "blocks", None) or []:
+            if hasattr(block, "result"):
+                last = block.result
+    return None if last is None else str(last)
+
+
+class ScriptedLLMClient(ScheduledOpenAIClient):
+    """Deterministic LLM stand-in: replays PLANS with `latency_s` per call
+    (x strong_factor for MODEL_STRONG, lognormal jitter)."""
+
+    def __init__(self, model: str, latency_s: float = 0.3, strong_factor: float = 2.0,
+                 jitter: float = 0.25, seed: int = 0, confidence: float = 0.9):
+        super().__init__(api_key="offline-benchmark", model=model)
+        self.latency_s = latency_s * (strong_factor if model == MODEL_STRONG else 1.0)
+        self.jitter = jitter
+        self.confidence = confidence
+        self._random = random.Random(seed)
+        self._local = threading.local()
+
+    def _conversation(self, role: str, text: str):
+        """Current plan for this role on this thread; a new one starts when the previous
+        plan finished or a different non-empty input arrives."""
+        conversations = self._local.__dict__.setdefault("conversations", {})
+        conv = conversations.get(role)
+        if conv is None or conv["done"] or (text and text != conv["input"]):
+            conv = conversations[role] = {"input": text, "plan": PLANS[role](text), "started": False, "done": False}
+        return conv
+
+    def _sleep(self):
+        if self.latency_s > 0:
+            time.sleep(self.latency_s * self._random.lognormvariate(0, self.jitter))
+
+    def _invoke(self, *, input=None, tools=None, memory=None, system_prompt=None, **kwargs):
+        prompt = system_prompt or ""
+        # Cascade fast agents: normal prompt + the self-assessment instruction
+        asks_confidence = prompt.endswith(CONFIDENCE_INSTRUCTION)
+        role = _ROLE_BY_PROMPT.get(prompt.removesuffix(CONFIDENCE_INSTRUCTION), "formatter")
+        text = _text_of(input)
+        conv = self._conversation(role, text)
+        if not conv["started"]:
+            conv["started"] = True
+            action = next(conv["plan"])
+        else:
+            action = conv["plan"].send(_last_tool_result(memory))
+        self._sleep()
+
+        tools_by_name = {getattr(t, "name", None): t for t in tools or []}
+        if action[0] == "call" and action[1] in tools_by_name:
+            tool = tools_by_name[action[1]]
+            properties = list(getattr(tool, "properties", None) or {})
+            arguments = action[2]
+            if properties and not set(arguments) <= set(properties):
+                # Agent-as-tool: single free-text parameter, whatever its name
+                arguments = {properties[0]: next(iter(arguments.values()))}
+            blocks = [FunctionCallBlock(id=uuid.uuid4().hex, name=tool.name, arguments=arguments, tool=tool)]
+            completion = str(arguments)
+        else:
+            if action[0] == "call":
+                # Tool not available to this agent: end the plan with what we have
+                action = ("text", "0")
+            conv["done"] = True
+            conv["plan"].close()
+            if asks_confidence:
+                action = ("text", f"{action[1]}\nCONFIDENZA: {self.confidence:.2f}")
+            blocks = [TextBlock(content=action[1])]
+            completion = action[1]
+
+        usage = TokenUsage(
+            prompt_tokens=estimate_tokens(text, system_prompt=system_prompt or "", memory=memory),
+            completion_tokens=max(1, len(completion) // 4),
+        )
+        return ClientResponse(content=blocks, usage=usage)
+
+
+def scripted_client_factory(latency_s: float, strong_factor: float = 2.0, jitter: float = 0.25,
+                            confidence: float = 0.9):
+    """create_client replacement (see llm.client.set_client_factory)."""
+    counter = iter(range(1_000_000))
+    return lambda model: ScriptedLLMClient(model, latency_s, strong_factor, jitter, seed=next(counter),
+                                           confidence=confidence)
+
+
+class HashEmbedder:
+    """Feature-hashing bag-of-words embedder: same text -> same unit vector, no network."""
+
+    def __init__(self, dim: int = EMBED_DIM, latency_s: float = 0.0):
+        self.dim = dim
+        self.latency_s = latency_s
+
+    def embed(self, text: str) -> list[float]:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in re.findall(r"\w+", text.lower()):
+            digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+            h = int.from_bytes(digest, "little")
+            vector[h % self.dim] += 1.0 if (h >> 63) & 1 else -1.0
+        norm = float(np.linalg.norm(vector))
+        return (vector / norm if norm else vector).tolist()
+
+    def run(self, text: str) -> list[float]:
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        return self.embed(text)
+
+    async def a_run(self, text: str) -> list[float]:
+        return self.run(text)
+
+
+class MemoryChunk:
+    def __init__(self, text: str, metadata: dict | None = None):
+        self.id = uuid.uuid4().hex
+        self.text = text
+        self.metadata = metadata or {}
+
+
+class InMemoryVectorstore:
+    """Cosine top-k over one numpy matrix per collection (vectors are unit length)."""
+
+    def __init__(self, latency_s: float = 0.0):
+        self.latency_s = latency_s
+        self._collections: dict[str, tuple[list[MemoryChunk], np.ndarray]] = {}
+        self._lock = threading.Lock()
+
+    def add_texts(self, collection_name: str, texts: list[str], embedder: HashEmbedder):
+        chunks = [MemoryChunk(t) for t in texts]
+        vectors = np.array([embedder.embed(t) for t in texts], dtype=np.float32).reshape(len(texts), embedder.dim)
+        with self._lock:
+            empty = ([], np.zeros((0, embedder.dim), np.float32))
+            old_chunks, old_vectors = self._collections.get(collection_name, empty)
+            self._collections[collection_name] = (old_chunks + chunks, np.vstack([old_vectors, vectors]))
+
+    def search(self, collection_name: str, query_vector, vector_name: str | None = None, k: int = 5):
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        chunks, matrix = self._collections.get(collection_name, ([], None))
+        if not chunks:
+            return []
+        scores = matrix @ np.asarray(query_vector, dtype=np.float32)
+        top = np.argsort(-scores)[:k]
+        return [chunks[i] for i in top]
+
+    def collection_sizes(self) -> dict[str, int]:
+        return {name: len(chunks) for name, (chunks, _) in self._collections.items()}
@@ -0,0 +1,86 @@
+"""Tail latency of LLM calls with and without request hedging.
+
+Starts fake_openai_server.py in-process, points a real ScheduledOpenAIClient at it
+and sends --calls identical requests from --workers threads, first with hedging off
+and then on. Prints p50/p90/p99/max per round and the hedging summary (duplicates
+sent, hedge wins, budget denials), so the effect of HEDGE_* settings on the tail and
+on the extra spend can be checked without API keys.
+
+Usage:
+    cd <project_root>
+    ./pizza_env/bin/python -m hackapizza_solution.benchmarks.hedging \
+        [--calls 400] [--workers 8] [--outlier-rate 0.05] [--outlier-latency 10]
+"""
+
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+from hackapizza_solution.config import HEDGE_MIN_DELAY_S, MODEL_FAST
+from hackapizza_solution.benchmarks.fake_openai_server import FakeOpenAIServer
+from hackapizza_solution.llm import cache, hedging, scheduler
+from hackapizza_solution.llm.client import ScheduledOpenAIClient
+from hackapizza_solution.llm.transport import get_http_client
+from hackapizza_solution.tracing import _percentile
+
+
+def run_round(server: FakeOpenAIServer, calls: int, workers: int, hedge: bool, min_delay_s: float) -> dict:
+    hedging.set_enabled(hedge)
+    hedging._hedger = hedging.Hedger(min_delay_s=min_delay_s)
+    client = ScheduledOpenAIClient(
+        api_key="fake", model=MODEL_FAST, base_url=server.base_url, http_client=get_http_client()
+    )
+    outliers_before = server.stats["outliers"]
+
+    def one(i: int) -> float:
+        start = time.perf_counter()
+        client.invoke(input=f"Domanda di prova {i}")
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hedge-bench") as pool:
+        latencies = list(pool.map(one, range(calls)))
+    return {
+        "hedge": hedge,
+        "elapsed_s": time.perf_counter() - start,
+        "p50_s": _percentile(latencies, 50),
+        "p90_s": _percentile(latencies, 90),
+        "p99_s": _percentile(latencies, 99),
+        "max_s": max(latencies),
+        "outliers": server.stats["outliers"] - outliers_before,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM tail latency with and without hedging (fake server)")
+    parser.add_argument("--calls", type=int, default=400)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.2, help="Median seconds per fake request")
+    parser.add_argument("--outlier-rate", type=float, default=0.05)
+    parser.add_argument("--outlier-latency", type=float, default=10.0)
+    parser.add_argument("--min-delay", type=float, default=HEDGE_MIN_DELAY_S,
+                        help="Lower bound of the hedge delay (HEDGE_MIN_DELAY_S)")
+    args = parser.parse_args()
+
+    cache.set_cache_mode("off")
+    unlimited = {"rpm": 1_000_000, "tpm": 1_000_000_000, "max_concurrency": 1024, "latency_target_s": 3600.0}
+    scheduler._scheduler = scheduler.LLMScheduler({MODEL_FAST: unlimited})
+    server = FakeOpenAIServer(latency_s=args.latency, outlier_rate=args.outlier_rate,
+                              outlier_latency_s=args.outlier_latency).start()
+    print(f"Fake server {server.base_url}: latency {args.latency}s, "
+          f"{args.outlier_rate:.0%} outliers of {args.outlier_latency}s; {args.calls} calls on {args.workers} workers")
+
+    for hedge in (False, True):
+        r = run_round(server, args.calls, args.workers, hedge, args.min_delay)
+        print(f"\n--- hedging {'on' if hedge else 'off'}: {r['elapsed_s']:.1f}s, {r['outliers']} outlier requests ---")
+        print(f"  p50 {r['p50_s']:.2f}s  p90 {r['p90_s']:.2f}s  p99 {r['p99_s']:.2f}s  max {r['max_s']:.2f}s")
+        if hedge:
+            hedging.print_hedging_summary()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
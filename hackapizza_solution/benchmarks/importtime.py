@@ -0,0 +1,144 @@
+"""Startup budgets: import time per module and time to the first LLM request.
+
+For every module in IMPORT_TIME_BUDGETS_MS, runs `python -X importtime -c "import
+<module>"` in a fresh interpreter (--runs times, keeping the fastest run), prints the
+slowest imports it pulls in and fails when the cumulative time exceeds its budget or
+when it imports one of STARTUP_LAZY_MODULES (SDKs only the agents that use them may load).
+
+--first-request additionally runs `main -q QUESTION` (without the fast path) in a fresh
+interpreter with the LLM client patched to exit at its first request, and fails
+when that takes longer than FIRST_REQUEST_BUDGET_S: this is the startup latency of
+the interactive CLI (imports, classification, building the agents the question
+needs). No API calls are made.
+
+Exits with status 1 on any budget violation, so it can gate CI.
+
+Usage:
+    cd <project_root>
+    ./pizza_env/bin/python -m hackapizza_solution.benchmarks.importtime [--runs 3] [--top 8] \
+        [--first-request ["question..."]]
+"""
+
+import argparse
+import csv
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+from hackapizza_solution.config import (
+    DOMANDE_CSV, FIRST_REQUEST_BUDGET_S, IMPORT_TIME_BUDGETS_MS, PROJECT_ROOT, STARTUP_LAZY_MODULES,
+)
+
+_IMPORT_LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+_FIRST_REQUEST_MARKER = "FIRST_LLM_REQUEST"
+# Runs `main -q` until the first LLM request, then exits without sending it
+_FIRST_REQUEST_PROBE = f"""
+import os, sys
+from hackapizza_solution.llm import client
+
+def first_request(*args, **kwargs):
+    print("{_FIRST_REQUEST_MARKER}", flush=True)
+    os._exit(0)
+
+client.ScheduledOpenAIClient._cached = first_request
+from hackapizza_solution import main
+sys.argv = ["main", "-q", sys.argv[1]]
+main.main()
+"""
+
+
+def _python(args: list[str], env: dict | None = None, **kwargs) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable, *args], cwd=PROJECT_ROOT, env=env, text=True, **kwargs)
+
+
+def measure_imports(module: str) -> dict[str, tuple[int, int, int]]:
+    """module -> (self_us, cumulative_us, depth) for one fresh `import module`."""
+    process = _python(["-X", "importtime", "-c", f"import {module}"],
+                      stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    _, stderr = process.communicate()
+    if process.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{stderr.strip()[-2000:]}")
+    imports = {}
+    for line in stderr.splitlines():
+        match = _IMPORT_LINE_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            imports[name] = (int(self_us), int(cumulative_us), (len(indent) - 1) // 2)
+    return imports
+
+
+def check_module(module: str, budget_ms: float, runs: int, top: int) -> bool:
+    best = min((measure_imports(module) for _ in range(runs)), key=lambda i: i.get(module, (0, 0, 0))[1])
+    total_ms = best.get(module, (0, 0, 0))[1] / 1000
+    eager = [name for name in STARTUP_LAZY_MODULES if name in best]
+    ok = total_ms <= budget_ms and not eager
+    print(f"\n--- {module}: {total_ms:.0f}ms (budget {budget_ms:.0f}ms) {'ok' if ok else 'OVER BUDGET'} ---")
+    # Slowest direct dependencies of the module (cumulative), then the slowest single files (self)
+    direct = [(name, cum) for name, (_, cum, depth) in best.items() if depth == 1]
+    for name, cum in sorted(direct, key=lambda kv: -kv[1])[:top]:
+        print(f"  {cum / 1000:7.1f}ms  {name}")
+    slowest = sorted(best.items(), key=lambda kv: -kv[1][0])[:top]
+    print("  Slowest single modules: " + ", ".join(f"{name} {s / 1000:.0f}ms" for name, (s, _, _) in slowest))
+    if eager:
+        print(f"  Imported eagerly (must be lazy): {', '.join(eager)}")
+    return ok
+
+
+def time_to_first_request(question: str, runs: int) -> float:
+    """Fastest wall time from interpreter start to the first LLM request of `main -q`."""
+    env = dict(os.environ)
+    env.setdefault("OPENAI_API_KEY", "importtime-probe")
+    env["FAST_PATH"] = "0"
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        process = _python(["-c", _FIRST_REQUEST_PROBE, question], env=env,
+                          stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        elapsed = None
+        output = []
+        for line in process.stdout:
+            if line.strip() == _FIRST_REQUEST_MARKER:
+                elapsed = time.perf_counter() - start
+                break
+            output.append(line)
+        process.wait()
+        if elapsed is None:
+            raise RuntimeError("main -q ended without an LLM request:\n" + "".join(output[-40:]))
+        times.append(elapsed)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time and time-to-first-LLM-request budgets")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters per measurement (fastest kept)")
+    parser.add_argument("--top", type=int, default=8, help="Imports listed per module")
+    parser.add_argument("--first-request", nargs="?", const="", default=None, metavar="QUESTION",
+                        help="Also time `main -q` to its first LLM request (default: first question of domande.csv)")
+    args = parser.parse_args()
+
+    ok = True
+    for module, budget_ms in IMPORT_TIME_BUDGETS_MS.items():
+        ok &= check_module(module, budget_ms, max(1, args.runs), args.top)
+
+    if args.first_request is not None:
+        question = args.first_request
+        if not question:
+            with open(DOMANDE_CSV, encoding="utf-8") as f:
+                question = next(csv.DictReader(f))["domanda"]
+        elapsed = time_to_first_request(question, max(1, args.runs))
+        within = elapsed <= FIRST_REQUEST_BUDGET_S
+        ok &= within
+        print(f"\n--- time to first LLM request: {elapsed:.2f}s (budget {FIRST_REQUEST_BUDGET_S:g}s) "
+              f"{'ok' if within else 'OVER BUDGET'} ---")
+        print(f"  Question: {question[:100]}")
+
+    print(f"\n{'All startup budgets met' if ok else 'Startup budgets exceeded'}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Load test of the --serve HTTP service.
+
+Sends --requests POST /answer calls from --concurrency client threads. Questions are
+drawn from domande.csv; a fraction --hot of the requests reuse a small set of hot
+questions, so identical questions are in flight at the same time and exercise
+coalescing. Reports throughput, latency percentiles, status codes (503 = backpressure)
+and coalesced answers, then the service's own counters from /metrics.
+
+Usage (service on fake LLM, no API keys):
+    ./pizza_env/bin/python -m hackapizza_solution.main --serve --workers 4 --fake-llm 0.3 &
+    ./pizza_env/bin/python -m hackapizza_solution.benchmarks.load_test --url http://127.0.0.1:8080 \
+        [--requests 200] [--concurrency 16] [--hot 0.3]
+"""
+
+import argparse
+import csv
+import json
+import random
+import sys
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+from hackapizza_solution.config import DOMANDE_CSV
+from hackapizza_solution.tracing import _percentile
+
+_HOT_QUESTIONS = 5
+
+
+def _post(url: str, question: str, timeout_s: float) -> tuple[int, dict, float]:
+    request = urllib.request.Request(
+        f"{url}/answer", data=json.dumps({"question": question}).encode("utf-8"),
+        headers={"Content-Type": "application/json"}, method="POST",
+    )
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout_s) as response:
+            status, body = response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        status, body = e.code, {}
+    except (urllib.error.URLError, TimeoutError, ConnectionError) as e:
+        status, body = 0, {"error": str(e)}
+    return status, body, time.perf_counter() - start
+
+
+def _service_counters(url: str) -> list[str]:
+    with urllib.request.urlopen(f"{url}/metrics", timeout=10) as response:
+        text = response.read().decode("utf-8")
+    wanted = ("hackapizza_answers_total", "hackapizza_coalesced_total", "hackapizza_rejected_total",
+              "hackapizza_answer_seconds_sum", "hackapizza_answer_seconds_count", "hackapizza_process_rss")
+    return [line for line in text.splitlines() if line.startswith(wanted)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test of the --serve HTTP service")
+    parser.add_argument("--url", default="http://127.0.0.1:8080")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--hot", type=float, default=0.3, help="Fraction of requests using a hot question")
+    parser.add_argument("--timeout", type=float, default=600.0, help="Client timeout per request (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with open(DOMANDE_CSV, encoding="utf-8") as f:
+        questions = [row["domanda"] for row in csv.DictReader(f)]
+    rng = random.Random(args.seed)
+    hot = questions[:_HOT_QUESTIONS]
+    workload = [rng.choice(hot) if rng.random() < args.hot else rng.choice(questions) for _ in range(args.requests)]
+
+    print(f"{args.requests} requests to {args.url} from {args.concurrency} clients ({args.hot:.0%} hot questions)")
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency, thread_name_prefix="load") as pool:
+        results = list(pool.map(lambda q: _post(args.url, q, args.timeout), workload))
+    elapsed = time.perf_counter() - start
+
+    statuses = Counter(status for status, _, _ in results)
+    ok = [(body, latency) for status, body, latency in results if status == 200]
+    latencies = [latency for _, latency in ok]
+    print(f"\n--- {elapsed:.1f}s, {len(ok) / elapsed if elapsed else 0:.2f} answers/s ---")
+    print("  Status: " + ", ".join(f"{status or 'error'}: {n}" for status, n in sorted(statuses.items())))
+    if latencies:
+        print(f"  Latency p50 {_percentile(latencies, 50):.2f}s  p95 {_percentile(latencies, 95):.2f}s  "
+              f"p99 {_percentile(latencies, 99):.2f}s  max {max(latencies):.2f}s")
+        coalesced = sum(1 for body, _ in ok if body.get("coalesced"))
+        paths = Counter(body.get("path") for body, _ in ok)
+        print(f"  {coalesced} coalesced, paths: " + ", ".join(f"{p}: {n}" for p, n in sorted(paths.items())))
+    print("\n--- service /metrics ---")
+    for line in _service_counters(args.url):
+        print(f"  {line}")
+
+
+if __name__ == "__main__":
+    main()
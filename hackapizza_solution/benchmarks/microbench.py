@@ -0,0 +1,272 @@
+"""Microbenchmarks of the data tools and loaders at increasing data scale.
+
+Every menu, license, distance and output tool (and the loaders and the entity
+linker they depend on) is timed on the real data (scale 1, when present) and on
+the synthetic datasets of synthetic_data.py, pytest-benchmark style: a warmup
+call, then rounds of calibrated iterations, reporting min / median / mean / stddev
+per call. Memory is measured separately with tracemalloc (peak allocated during one
+call; for loaders, the memory the loaded data retains). Tool memoization is off so
+every call does the real work.
+
+Results are saved as JSON; --compare prints the median ratio against a previous run
+and exits with status 1 when a case got slower than --threshold.
+
+Usage:
+    cd <project_root>
+    ./pizza_env/bin/python -m hackapizza_solution.benchmarks.microbench --scales 1,10,100 \
+        [--compare data/benchmarks/<previous>.json] [--filter search_dishes]
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+from hackapizza_solution.config import DATA_DIR, DISH_MAPPING_JSON, DISTANZE_CSV, MENUS_JSON
+from hackapizza_solution.benchmarks.synthetic_data import ensure_dataset
+from hackapizza_solution import entity_linker
+from hackapizza_solution.tools import distance_tools, license_tools, memo, menu_tools, output_tools
+
+RESULTS_DIR = DATA_DIR / "benchmarks"
+MIN_ROUND_S = 0.05
+MAX_ITERATIONS = 10_000
+
+
+class Case:
+    """One benchmarked call. setup() runs before every call and is not timed
+    (used to drop loader caches for cold-load cases)."""
+
+    def __init__(self, name: str, fn, *args, setup=None, retains: bool = False):
+        self.name = name
+        self.fn = fn
+        self.args = args
+        self.setup = setup
+        self.retains = retains
+
+    def call(self):
+        return self.fn(*self.args)
+
+
+def use_dataset(menus: Path, mapping: Path, distances: Path):
+    """Point every data tool at the given files and drop their caches."""
+    menu_tools.MENUS_JSON = license_tools.MENUS_JSON = output_tools.MENUS_JSON = menus
+    output_tools.DISH_MAPPING_JSON = mapping
+    distance_tools.DISTANZE_CSV = distances
+    _drop_caches()
+
+
+def _drop_caches():
+    menu_tools._menus_cache = license_tools._menus_cache = output_tools._menus_cache = None
+    output_tools._mapping_cache = None
+    distance_tools._distances_cache = None
+    entity_linker._linker = None
+
+
+def _dataset_paths(scale: int) -> dict[str, Path] | None:
+    if scale == 1:
+        paths = {"menus": MENUS_JSON, "mapping": DISH_MAPPING_JSON, "distances": DISTANZE_CSV}
+        return paths if all(p.exists() for p in paths.values()) else None
+    return ensure_dataset(scale)
+
+
+def build_cases() -> list[Case]:
+    """Cases with arguments picked from the currently loaded data: the most and least
+    common ingredient, a mid-sized restaurant, exact / case-changed / unknown dish names."""
+    tool = memo._registry
+    menus = menu_tools._load_menus()
+    output_tools._load_mapping()
+    distances = distance_tools._load_distances()
+    ingredients = Counter(i for m in menus for d in m["dishes"] for i in d["ingredients"])
+    techniques = Counter(t for m in menus for d in m["dishes"] for t in d["techniques"])
+    common_ingredient = ingredients.most_common(1)[0][0]
+    rare_ingredient = min(ingredients, key=lambda i: (ingredients[i], i))
+    menu = menus[len(menus) // 2]
+    planets = list(distances)
+    all_dishes = [d["name"] for m in menus for d in m["dishes"]]
+    # Spread over the whole menu list, so name scans do not stop at the first entries
+    dish_names = all_dishes[::max(1, len(all_dishes) // 10)][:10]
+    question = (f"Quali piatti preparati con {techniques.most_common(1)[0][0]} contengono {common_ingredient} "
+                f"e sono serviti entro 100 anni luce da {planets[0]}?")
+
+    return [
+        Case("load_menus", menu_tools._load_menus, setup=_drop_caches, retains=True),
+        Case("load_mapping", output_tools._load_mapping, setup=_drop_caches, retains=True),
+        Case("load_distances", distance_tools._load_distances, setup=_drop_caches, retains=True),
+        Case("build_linker", entity_linker.build_linker, retains=True),
+        Case("link_entities", entity_linker.link_entities, question),
+        Case("search_dishes_by_ingredient[common]", tool["search_dishes_by_ingredient"], common_ingredient),
+        Case("search_dishes_by_ingredient[rare]", tool["search_dishes_by_ingredient"], rare_ingredient),
+        Case("search_dishes_by_ingredient[missing]", tool["search_dishes_by_ingredient"], "Ingrediente Inesistente"),
+        Case("search_dishes_by_technique", tool["search_dishes_by_technique"], techniques.most_common(1)[0][0]),
+        Case("filter_dishes_by_restaurant", tool["filter_dishes_by_restaurant"], menu["restaurant"]),
+        Case("filter_dishes_by_planet", tool["filter_dishes_by_planet"], menu["planet"]),
+        Case("get_chef_info", tool["get_chef_info"], menu["restaurant"]),
+        Case("get_all_dishes_with_details", tool["get_all_dishes_with_details"]),
+        Case("get_chefs_with_license", tool["get_chefs_with_license"], "P", 3),
+        Case("get_planets_within_radius", tool["get_planets_within_radius"], planets[0], 200),
+        Case("get_distance", tool["get_distance"], planets[0], planets[-1]),
+        Case("map_dishes_to_ids[exact]", tool["map_dishes_to_ids"], ",".join(dish_names)),
+        Case("map_dishes_to_ids[case]", tool["map_dishes_to_ids"], ",".join(n.lower() for n in dish_names)),
+        Case("map_dishes_to_ids[fallback]", tool["map_dishes_to_ids"], f"{rare_ingredient},Piatto Inesistente"),
+    ]
+
+
+def _time_case(case: Case, rounds: int) -> list[float]:
+    """Seconds per call for each round; iterations per round are calibrated so a round
+    lasts at least MIN_ROUND_S."""
+    if case.setup:
+        case.setup()
+    start = time.perf_counter()
+    case.call()
+    first = time.perf_counter() - start
+    iterations = 1 if case.setup else max(1, min(MAX_ITERATIONS, int(MIN_ROUND_S / max(first, 1e-9))))
+
+    per_call = []
+    for _ in range(rounds):
+        elapsed = 0.0
+        for _ in range(iterations):
+            if case.setup:
+                case.setup()
+            start = time.perf_counter()
+            case.call()
+            elapsed += time.perf_counter() - start
+        per_call.append(elapsed / iterations)
+    return per_call
+
+
+def _memory_case(case: Case) -> tuple[int, int]:
+    """(peak bytes allocated during one call, bytes still held afterwards when the case
+    loads data that stays cached)."""
+    if case.setup:
+        case.setup()
+    tracemalloc.start()
+    try:
+        result = case.call()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return peak, current if case.retains else 0
+
+
+def run_scale(scale: int, rounds: int, name_filter: str | None) -> list[dict]:
+    paths = _dataset_paths(scale)
+    if paths is None:
+        print(f"\nx{scale}: real data not found (run --prepare), skipped")
+        return []
+    use_dataset(paths["menus"], paths["mapping"], paths["distances"])
+    menus = menu_tools._load_menus()
+    print(f"\nx{scale}: {len(menus)} menus, {sum(len(m['dishes']) for m in menus)} dishes, "
+          f"{len(distance_tools._load_distances())} planets")
+
+    results = []
+    for case in build_cases():
+        if name_filter and name_filter not in case.name:
+            continue
+        per_call = _time_case(case, rounds)
+        peak, retained = _memory_case(case)
+        median = statistics.median(per_call)
+        results.append({
+            "scale": scale,
+            "name": case.name,
+            "min_s": min(per_call),
+            "median_s": median,
+            "mean_s": statistics.fmean(per_call),
+            "stddev_s": statistics.stdev(per_call) if len(per_call) > 1 else 0.0,
+            "ops_per_s": 1 / median if median else 0.0,
+            "rounds": rounds,
+            "peak_alloc_bytes": peak,
+            "retained_bytes": retained,
+        })
+        print(f"  {case.name:<40} median {_fmt_s(median):>9}  min {_fmt_s(min(per_call)):>9}  "
+              f"peak {peak / 2**20:7.2f} MiB" + (f"  retained {retained / 2**20:7.2f} MiB" if retained else ""))
+    return results
+
+
+def _fmt_s(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f}us"
+    if seconds < 1:
+        return f"{seconds * 1e3:.2f}ms"
+    return f"{seconds:.2f}s"
+
+
+def print_scaling(results: list[dict]):
+    """Growth of each case's median from one scale to the next (x10 data -> ~x10 time is linear)."""
+    by_case: dict[str, dict[int, float]] = {}
+    for r in results:
+        by_case.setdefault(r["name"], {})[r["scale"]] = r["median_s"]
+    scales = sorted({r["scale"] for r in results})
+    if len(scales) < 2:
+        return
+    print("\n--- SCALING (median time ratio between consecutive scales) ---")
+    print(f"  {'case':<40} " + " ".join(f"x{a}->x{b}".rjust(12) for a, b in zip(scales, scales[1:])))
+    for name, medians in by_case.items():
+        ratios = []
+        for a, b in zip(scales, scales[1:]):
+            ratios.append(f"{medians[b] / medians[a]:.1f}x" if a in medians and b in medians and medians[a] else "-")
+        print(f"  {name:<40} " + " ".join(r.rjust(12) for r in ratios))
+
+
+def compare(results: list[dict], baseline_path: Path, threshold: float) -> int:
+    """Print median ratios against a previous run; returns the number of regressions."""
+    baseline = {(r["scale"], r["name"]): r for r in json.loads(baseline_path.read_text(encoding="utf-8"))["results"]}
+    regressions = 0
+    print(f"\n--- COMPARISON with {baseline_path.name} (regression above +{threshold:.0%}) ---")
+    for r in results:
+        old = baseline.get((r["scale"], r["name"]))
+        if old is None or not old["median_s"]:
+            continue
+        ratio = r["median_s"] / old["median_s"]
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        elif ratio < 1 / (1 + threshold):
+            flag = "  faster"
+        print(f"  x{r['scale']:<5} {r['name']:<40} {_fmt_s(old['median_s']):>9} -> {_fmt_s(r['median_s']):>9} "
+              f"({ratio:.2f}x){flag}")
+    print(f"  {regressions} regression(s)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks of the data tools")
+    parser.add_argument("--scales", default="1,10,100", help="Comma-separated scales (1 = real data)")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--filter", default=None, help="Only cases whose name contains this string")
+    parser.add_argument("--save", type=Path, default=None,
+                        help="Results file (default: data/benchmarks/microbench-<timestamp>.json)")
+    parser.add_argument("--compare", type=Path, default=None, help="Previous results file to compare with")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative slowdown counted as a regression")
+    args = parser.parse_args()
+
+    memo.set_enabled(False)
+    results = []
+    for scale in [int(s) for s in args.scales.split(",") if s.strip()]:
+        results.extend(run_scale(scale, args.rounds, args.filter))
+    print_scaling(results)
+
+    save_path = args.save or RESULTS_DIR / f"microbench-{datetime.now():%Y%m%d-%H%M%S}.json"
+    save_path.parent.mkdir(parents=True, exist_ok=True)
+    save_path.write_text(json.dumps({
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.platform(),
+        "results": results,
+    }, indent=2), encoding="utf-8")
+    print(f"\nResults saved to {save_path}")
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
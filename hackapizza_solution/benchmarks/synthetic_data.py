@@ -0,0 +1,248 @@
+"""Synthetic, scaled versions of menus.json, dish_mapping.json and Distanze.csv.
+
+The real data has 34 menus, ~287 dishes and 10 planets; scale N produces N times
+that, with the same shapes the tools read:
+
+- names are composed from Italian/sci-fi word pools, so lengths and shared words
+  look like the real ones ("Essenza di Cometa Fermentata", "Cottura Quantica a ...")
+- ingredient and technique popularity follows a Zipf law (a few ingredients appear
+  in a large share of the dishes, most in a handful) and the vocabularies grow
+  sublinearly with the number of dishes (Heaps' law), as they do in real menus
+- a small share of ingredient mentions carry typos (swapped, doubled or dropped
+  letters, like Magikarp/Magicarp), and some dish_mapping.json names differ in case
+  from the menus, exercising the tools' fallback matching paths
+- planets are points in a 3D box; Distanze.csv is their (symmetric) distance matrix.
+  The matrix is quadratic, so the planet count is capped at MAX_PLANETS
+
+Usage:
+    cd <project_root>
+    ./pizza_env/bin/python -m hackapizza_solution.benchmarks.synthetic_data --scales 10,100,1000
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import math
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+from hackapizza_solution.config import DATA_DIR
+from hackapizza_solution.entity_linker import LICENSE_NAMES
+
+SYNTHETIC_DIR = DATA_DIR / "synthetic"
+
+BASE_MENUS = 34
+BASE_DISHES = 287
+BASE_PLANETS = 10
+BASE_INGREDIENTS = 250
+BASE_TECHNIQUES = 90
+# Vocabulary size ~ BASE * scale ** HEAPS_EXPONENT
+HEAPS_EXPONENT = 0.6
+MAX_PLANETS = 2000
+TYPO_RATE = 0.02
+MAPPING_CASE_RATE = 0.03
+
+_ING_HEADS = [
+    "Essenza", "Polvere", "Radici", "Foglie", "Uova", "Latte", "Nettare", "Spore", "Cristalli", "Lacrime",
+    "Filamenti", "Scaglie", "Petali", "Semi", "Gocce", "Carne", "Funghi", "Alghe", "Frammenti", "Sale",
+]
+_ING_SOURCES = [
+    "Cometa", "Nebulosa", "Drago", "Fenice", "Kraken", "Pulsar", "Quasar", "Andromeda", "Sirio", "Vega",
+    "Orione", "Magikarp", "Tauron", "Luna", "Stella", "Vuoto", "Plasma", "Aurora", "Eclissi", "Galassia",
+    "Erba Pipa", "Mandragora", "Basilisco", "Chimera", "Idra", "Sirena", "Grifone", "Unicorno", "Slurm", "Mech",
+]
+_ING_QUALIFIERS = [
+    "", "Fermentata", "Cristallizzato", "Affumicato", "Siderale", "Antico", "Oscuro", "Luminescente",
+    "Selvatico", "Glaciale", "Speziato", "Quantico", "Eterico",
+]
+_ING_ORIGINS = ["", "di Namecc", "di Vega", "di Pandora", "Lunare", "Marziano", "Venusiano", "Sintetico",
+                "Biologico", "Dimensionale", "del Nord", "Ancestrale"]
+_TECH_HEADS = [
+    "Cottura", "Marinatura", "Fermentazione", "Affumicatura", "Sferificazione", "Bollitura", "Surgelamento",
+    "Taglio", "Impasto", "Decostruzione", "Incisione", "Grigliatura", "Saltatura", "Distillazione",
+]
+_TECH_QUALIFIERS = [
+    "Quantica", "Gravitazionale", "Temporale", "Psionica", "Magnetica", "Sotto Zero", "a Vortice",
+    "Molecolare", "Risonante", "Dimensionale", "Plasmatica", "Idro-Cinetica", "Antimateria", "Olografica",
+    "a Energia Oscura", "Sincronica", "Tachionica", "Biometrica", "Stellare", "Criogenica",
+]
+_TECH_VARIANTS = ["", "Inversa", "Lenta", "Rapida", "Avanzata", "a Doppio Strato", "Controllata", "Parziale"]
+_TECH_LEVELS = ["", "di Primo Livello", "di Secondo Livello", "di Terzo Livello"]
+_DISH_HEADS = [
+    "Sinfonia", "Armonia", "Viaggio", "Sogno", "Eco", "Risotto", "Zuppa", "Ravioli", "Tortello", "Sfera",
+    "Galassia", "Odissea", "Tramonto", "Alba", "Leggenda", "Mosaico", "Rapsodia", "Carpaccio", "Ode", "Danza",
+    "Pizza", "Crostata", "Tartare", "Spirale", "Nebulosa", "Cosmo", "Portale", "Trionfo", "Fantasia", "Ritorno",
+]
+_DISH_MIDDLES = [
+    "Cosmica", "Celeste", "Interstellare", "Siderale", "Quantistica", "Eterea", "Galattica", "Lunare",
+    "Solare", "Astrale", "Infinita", "Perduta", "Stellare", "Oscura", "Cristallina", "Antica", "Nascosta",
+    "Proibita", "Sospesa", "Dorata", "Abissale", "Vibrante", "Sacra", "Remota", "Eterna",
+]
+_DISH_TAILS = [
+    "", "di Andromeda", "del Kraken", "di Sirio", "del Vuoto", "di Vega", "dell'Aurora", "di Orione",
+    "della Fenice", "del Drago", "delle Stelle", "di Pandora", "del Tempo", "di Namecc", "dell'Infinito",
+    "di Cybertron", "del Multiverso", "di Asgard", "di Tatooine", "di Arrakis", "in Brodo", "al Vapore",
+    "in Salsa Nebulare", "con Riduzione di Cometa",
+]
+_DISH_CODAS = ["", "Classico", "Rivisitato", "Deluxe", "Primordiale", "Notturno", "Galante", "Minimale"]
+_DISH_STYLES = ["", "alla Brace", "Fusion", "Gran Riserva", "del Cuoco", "in Due Atti"]
+_RESTAURANT_WORDS = [
+    "Stella", "Nova", "Cosmo", "Galassia", "Orbita", "Eclissi", "Nebulosa", "Pianeta", "Luna", "Cometa",
+    "Astro", "Quasar", "Pulsar", "Portale", "Rifugio", "Taverna", "Osteria", "Trattoria", "Locanda", "Bistrot",
+]
+_PERSON_FIRST = [
+    "Mario", "Luigi", "Aria", "Zara", "Kai", "Nova", "Orion", "Lyra", "Vega", "Elio", "Selene", "Aldo",
+    "Bruna", "Cosimo", "Dora", "Ettore", "Franca", "Gino", "Ilaria", "Leo", "Marta", "Nadia", "Ottavio",
+]
+_PERSON_LAST = [
+    "Rossi", "Bianchi", "Stellaris", "Quark", "Nebulari", "Orbitani", "Cosmici", "Verdi", "Ferri", "Astori",
+    "Galli", "Lunari", "Mancini", "Ricci", "Solari", "Vortici", "Zeta", "Greco", "Fontana", "Marino",
+]
+_PLANET_SYLLABLES = ["ka", "ra", "to", "mi", "ne", "zu", "lo", "ar", "ix", "on", "ta", "ve", "sh", "dr", "qu", "el"]
+
+
+def _zipf_cum_weights(n: int, s: float = 1.1) -> list[float]:
+    return list(itertools.accumulate(1.0 / (rank ** s) for rank in range(1, n + 1)))
+
+
+def _compose(rng: random.Random, count: int, pools: list[list[str]]) -> list[str]:
+    """count distinct names from the product of the word pools (without replacement).
+    Each pool has distinct words, at most one of them empty, so distinct picks give distinct names."""
+    space = math.prod(len(p) for p in pools)
+    if count > space:
+        raise ValueError(f"Only {space} distinct names available, {count} requested")
+    names = []
+    for index in rng.sample(range(space), count):
+        words = []
+        for pool in pools:
+            index, pick = divmod(index, len(pool))
+            words.append(pool[pick])
+        names.append(" ".join(w for w in words if w))
+    return names
+
+
+def _typo(rng: random.Random, word: str) -> str:
+    if len(word) < 5:
+        return word
+    i = rng.randrange(1, len(word) - 2)
+    kind = rng.randrange(3)
+    if kind == 0:
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    if kind == 1:
+        return word[:i] + word[i] + word[i:]
+    return word[:i] + word[i + 1:]
+
+
+def _planet_names(rng: random.Random, count: int) -> list[str]:
+    names = set()
+    while len(names) < count:
+        syllables = rng.randint(2, 4)
+        name = "".join(rng.choice(_PLANET_SYLLABLES) for _ in range(syllables)).capitalize()
+        if rng.random() < 0.15:
+            name += f" {rng.choice(['Prime', 'Minor', 'IV', 'VII', 'Beta'])}"
+        names.add(name)
+    return sorted(names)
+
+
+def generate(scale: int, seed: int = 0) -> tuple[list[dict], dict[str, int], list[str], list[list[float]]]:
+    """(menus, dish_mapping, planets, distance matrix) for the given scale."""
+    rng = random.Random(seed * 100_003 + scale)
+    n_menus = BASE_MENUS * scale
+    n_dishes = BASE_DISHES * scale
+    n_planets = min(BASE_PLANETS * scale, MAX_PLANETS)
+
+    vocabulary = scale ** HEAPS_EXPONENT
+    ingredients = _compose(rng, round(BASE_INGREDIENTS * vocabulary),
+                           [_ING_HEADS, ["di"], _ING_SOURCES, _ING_QUALIFIERS, _ING_ORIGINS])
+    techniques = _compose(rng, round(BASE_TECHNIQUES * vocabulary),
+                          [_TECH_HEADS, _TECH_QUALIFIERS, _TECH_VARIANTS, _TECH_LEVELS])
+    dish_names = _compose(rng, n_dishes, [_DISH_HEADS, _DISH_MIDDLES, _DISH_TAILS, _DISH_CODAS, _DISH_STYLES])
+    restaurants = _compose(rng, n_menus, [_RESTAURANT_WORDS, _RESTAURANT_WORDS, ["", "di", "del"],
+                                          _PERSON_FIRST + _PERSON_LAST])
+    planets = _planet_names(rng, n_planets)
+    ingredient_weights = _zipf_cum_weights(len(ingredients))
+    technique_weights = _zipf_cum_weights(len(techniques))
+    license_codes = list(LICENSE_NAMES)
+
+    menus = []
+    # Menu sizes vary around the real average (~8.4 dishes per menu)
+    cuts = sorted(rng.sample(range(1, n_dishes), n_menus - 1))
+    bounds = [0, *cuts, n_dishes]
+    for m, restaurant in enumerate(restaurants):
+        dishes = []
+        for name in dish_names[bounds[m]:bounds[m + 1]]:
+            picked = rng.choices(ingredients, cum_weights=ingredient_weights, k=rng.randint(3, 8))
+            dish_ingredients = list(dict.fromkeys(picked))
+            dish_ingredients = [_typo(rng, i) if rng.random() < TYPO_RATE else i for i in dish_ingredients]
+            picked = rng.choices(techniques, cum_weights=technique_weights, k=rng.randint(1, 4))
+            dish_techniques = list(dict.fromkeys(picked))
+            dishes.append({"name": name, "ingredients": dish_ingredients, "techniques": dish_techniques})
+        licenses = {code: rng.randint(0, 6) for code in rng.sample(license_codes, rng.randint(1, 4))}
+        menus.append({
+            "restaurant": restaurant,
+            "planet": planets[m % n_planets] if m < n_planets else rng.choice(planets),
+            "chef": {"name": f"{rng.choice(_PERSON_FIRST)} {rng.choice(_PERSON_LAST)}", "licenses": licenses},
+            "dishes": dishes,
+        })
+
+    mapping = {}
+    for dish_id, name in enumerate(dish_names):
+        mapping[name.upper() if rng.random() < MAPPING_CASE_RATE else name] = dish_id
+
+    coords = [(rng.uniform(0, 1000), rng.uniform(0, 1000), rng.uniform(0, 300)) for _ in planets]
+    distances = [[round(math.dist(a, b)) for b in coords] for a in coords]
+    return menus, mapping, planets, distances
+
+
+def write_dataset(scale: int, out_dir: Path | None = None, seed: int = 0) -> dict[str, Path]:
+    """Generate and write one scaled dataset; returns its file paths."""
+    out_dir = out_dir or SYNTHETIC_DIR / f"x{scale}"
+    out_dir.mkdir(parents=True, exist_ok=True)
+    menus, mapping, planets, distances = generate(scale, seed)
+    paths = {
+        "menus": out_dir / "menus.json",
+        "mapping": out_dir / "dish_mapping.json",
+        "distances": out_dir / "Distanze.csv",
+    }
+    paths["menus"].write_text(json.dumps(menus, indent=2, ensure_ascii=False), encoding="utf-8")
+    paths["mapping"].write_text(json.dumps(mapping, indent=2, ensure_ascii=False), encoding="utf-8")
+    with open(paths["distances"], "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["/", *planets])
+        for planet, row in zip(planets, distances):
+            writer.writerow([planet, *row])
+    return paths
+
+
+def ensure_dataset(scale: int, seed: int = 0) -> dict[str, Path]:
+    """Paths of the scaled dataset, generating it on first use."""
+    out_dir = SYNTHETIC_DIR / f"x{scale}"
+    paths = {
+        "menus": out_dir / "menus.json",
+        "mapping": out_dir / "dish_mapping.json",
+        "distances": out_dir / "Distanze.csv",
+    }
+    if all(p.exists() for p in paths.values()):
+        return paths
+    return write_dataset(scale, out_dir, seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate scaled synthetic datasets")
+    parser.add_argument("--scales", default="10,100,1000", help="Comma-separated scale factors")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for scale in [int(s) for s in args.scales.split(",") if s.strip()]:
+        start = time.time()
+        paths = write_dataset(scale, seed=args.seed)
+        sizes = ", ".join(f"{p.name} {p.stat().st_size / 2**20:.1f} MiB" for p in paths.values())
+        print(f"x{scale}: {sizes} ({time.time() - start:.1f}s) -> {paths['menus'].parent}")
+
+
+if __name__ == "__main__":
+    main()
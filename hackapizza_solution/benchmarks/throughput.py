@@ -0,0 +1,205 @@
+"""Offline end-to-end throughput benchmark.
+
+Runs the real agent graph (create_session: orchestrator + sub-agents, or the DAG
+with --dag) and the real tools over domande.csv, with the three network services
+replaced by the stand-ins in fakes.py: a scripted LLM with configurable latency, a
+hash embedder and an in-memory vector store filled from the Codice, the Manuale
+and the blog posts. For each worker count it reports questions/second, p50/p95 per
+span kind (agent, llm, llm_wait, tool, rag) and the process RSS, so changes to the
+scheduler, the memo or the DAG can be measured without API keys or Qdrant.
+
+Usage:
+    cd <project_root>
+    ./pizza_env/bin/python -m hackapizza_solution.benchmarks.throughput \
+        [--workers 1,4,8] [--limit 50] [--llm-latency 0.3] [--dag] [--json out.json]
+"""
+
+import argparse
+import csv
+import json
+import re
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+from hackapizza_solution.config import (
+    BLOGPOST_DIR, CODICE_PDF, COLLECTION_BLOG, COLLECTION_CODICE, COLLECTION_MANUALE,
+    DOMANDE_CSV, MANUALE_PDF, MODEL_FAST, MODEL_STRONG,
+)
+from hackapizza_solution.profiling import peak_rss_mb, rss_mb
+
+_CHUNK_CHARS = 2000
+_CHUNK_OVERLAP = 100
+_STAGES = ("question", "agent", "cascade", "llm", "llm_wait", "tool", "rag", "fast_path")
+
+
+def _chunks(text: str) -> list[str]:
+    text = re.sub(r"\s+", " ", text).strip()
+    step = _CHUNK_CHARS - _CHUNK_OVERLAP
+    return [text[i:i + _CHUNK_CHARS] for i in range(0, len(text), step)] if text else []
+
+
+def build_vectorstore(embedder, store):
+    """Fill the in-memory store with the same three collections ingest_rag.py creates."""
+    from hackapizza_solution.data_preparation.pdf_text import join_pages, read_pages
+
+    for pdf_path, collection in ((CODICE_PDF, COLLECTION_CODICE), (MANUALE_PDF, COLLECTION_MANUALE)):
+        if pdf_path.exists():
+            store.add_texts(collection, _chunks(join_pages(read_pages(pdf_path))), embedder)
+        else:
+            print(f"  {pdf_path.name} not found, collection '{collection}' left empty")
+    for html_file in sorted(BLOGPOST_DIR.glob("*.html")) if BLOGPOST_DIR.exists() else []:
+        text = re.sub(r"<[^>]+>", " ", html_file.read_text(encoding="utf-8"))
+        store.add_texts(COLLECTION_BLOG, _chunks(text), embedder)
+
+
+def install_fakes(llm_latency_s: float, strong_factor: float, embed_latency_s: float,
+                  search_latency_s: float, real_limits: bool, confidence: float = 0.9):
+    """Route every LLM, embedding and vector search call to the offline stand-ins."""
+    from hackapizza_solution.benchmarks.fakes import HashEmbedder, InMemoryVectorstore, scripted_client_factory
+    from hackapizza_solution.llm import cache, scheduler
+    from hackapizza_solution.llm.client import set_client_factory
+    from hackapizza_solution.tools import rag_tools
+
+    set_client_factory(scripted_client_factory(llm_latency_s, strong_factor, confidence=confidence))
+    cache.set_cache_mode("off")
+    if not real_limits:
+        unlimited = {"rpm": 1_000_000, "tpm": 1_000_000_000, "max_concurrency": 1024, "latency_target_s": 3600.0}
+        scheduler._scheduler = scheduler.LLMScheduler({MODEL_FAST: unlimited, MODEL_STRONG: unlimited})
+
+    embedder = HashEmbedder(latency_s=embed_latency_s)
+    store = InMemoryVectorstore(latency_s=search_latency_s)
+    start = time.perf_counter()
+    build_vectorstore(embedder, store)
+    sizes = ", ".join(f"{name}={n} chunks" for name, n in store.collection_sizes().items()) or "empty"
+    print(f"In-memory vector store: {sizes} ({time.perf_counter() - start:.1f}s)")
+    with rag_tools._clients_lock:
+        rag_tools._embedder = embedder
+        rag_tools._retriever = store
+
+
+def _load_questions(limit: int | None) -> list[tuple[int, str]]:
+    with open(DOMANDE_CSV, encoding="utf-8") as f:
+        questions = [(i, row["domanda"]) for i, row in enumerate(csv.DictReader(f), 1)]
+    return questions[:limit] if limit else questions
+
+
+def run_round(questions: list[tuple[int, str]], workers: int) -> dict:
+    """Answer all questions on `workers` threads (one session per thread, as run_batch does)."""
+    from hackapizza_solution.agents.session import create_session
+    from hackapizza_solution.main import _process_question
+    from hackapizza_solution.tools.memo import start_run
+    from hackapizza_solution.tracing import _percentile, collect_finished
+
+    start_run()
+    collect_finished(clear=True)
+    local = threading.local()
+    sessions = []
+
+    def work(item: tuple[int, str]) -> dict:
+        if not hasattr(local, "session"):
+            local.session = create_session()
+            sessions.append(local.session)
+        return _process_question(local.session, *item)
+
+    rss_before = rss_mb()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bench") as pool:
+        results = list(pool.map(work, questions))
+    elapsed = time.perf_counter() - start
+    for session in sessions:
+        session.close()
+
+    durations: dict[str, list[float]] = {}
+    for trace in collect_finished(clear=True):
+        for kind, _, dur in trace["spans"]:
+            durations.setdefault(kind, []).append(dur)
+    stages = {
+        kind: {
+            "n": len(values),
+            "p50_s": round(_percentile(values, 50), 4),
+            "p95_s": round(_percentile(values, 95), 4),
+            "total_s": round(sum(values), 3),
+        }
+        for kind, values in durations.items()
+    }
+    return {
+        "workers": workers,
+        "questions": len(results),
+        "elapsed_s": round(elapsed, 3),
+        "qps": round(len(results) / elapsed, 3) if elapsed else 0.0,
+        "answered": sum(1 for r in results if r["ids"] != "0"),
+        "fast_path": sum(1 for r in results if r.get("path") == "fast"),
+        "rss_mb": round(rss_mb(), 1),
+        "rss_delta_mb": round(rss_mb() - rss_before, 1),
+        "stages": stages,
+        "results": results,
+    }
+
+
+def print_round(r: dict):
+    print(f"\n--- {r['workers']} worker(s): {r['questions']} questions in {r['elapsed_s']:.1f}s "
+          f"= {r['qps']:.2f} q/s ({r['answered']} non-empty, {r['fast_path']} fast path) ---")
+    print(f"  RSS {r['rss_mb']:.0f} MiB ({r['rss_delta_mb']:+.0f} MiB during the round)")
+    for kind in _STAGES:
+        s = r["stages"].get(kind)
+        if s:
+            print(f"  {kind:<10} n={s['n']:<6} p50={s['p50_s'] * 1000:8.1f}ms "
+                  f"p95={s['p95_s'] * 1000:8.1f}ms total={s['total_s']:8.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline throughput benchmark (no network)")
+    parser.add_argument("--workers", default="1,4,8", help="Comma-separated worker counts")
+    parser.add_argument("--limit", type=int, default=None, help="Only the first N questions")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="Scripted LLM seconds per call (fast model)")
+    parser.add_argument("--strong-factor", type=float, default=2.0, help="Latency multiplier for the strong model")
+    parser.add_argument("--embed-latency", type=float, default=0.05, help="Seconds per embedding call")
+    parser.add_argument("--search-latency", type=float, default=0.01, help="Seconds per vector search")
+    parser.add_argument("--real-limits", action="store_true", help="Keep the configured LLM rate limits")
+    parser.add_argument("--dag", action="store_true", help="Answer through the category DAG")
+    parser.add_argument("--fast-path", action="store_true", help="Let simple questions take the fast path")
+    parser.add_argument("--deadline", type=float, default=0.0, help="Per-question deadline in seconds (0 = none)")
+    parser.add_argument("--cascade", action="store_true", help="Fast-to-strong cascade for compliance/order")
+    parser.add_argument("--confidence", type=float, default=0.9,
+                        help="Confidence the scripted fast model states in cascade mode")
+    parser.add_argument("--json", type=Path, default=None, help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    from hackapizza_solution import deadline, fast_path, tracing
+    from hackapizza_solution.agents import cascade, dag
+
+    fast_path.set_enabled(args.fast_path)
+    dag.set_enabled(args.dag)
+    cascade.set_enabled(args.cascade)
+    deadline.set_budget(args.deadline)
+    # Span timings come from the tracer; the per-question files go to a scratch directory
+    tracing.TRACE_DIR = Path(tempfile.mkdtemp(prefix="hackapizza-bench-traces-"))
+    tracing.set_enabled(True)
+
+    install_fakes(args.llm_latency, args.strong_factor, args.embed_latency, args.search_latency, args.real_limits,
+                  args.confidence)
+    questions = _load_questions(args.limit)
+    print(f"{len(questions)} questions, LLM latency {args.llm_latency}s "
+          f"(x{args.strong_factor} strong), {'DAG' if args.dag else 'orchestrator'} mode")
+
+    rounds = []
+    for workers in [int(w) for w in args.workers.split(",") if w.strip()]:
+        rounds.append(run_round(questions, workers))
+        print_round(rounds[-1])
+        deadline.print_deadline_summary(rounds[-1].pop("results"))
+    cascade.print_cascade_summary()
+    print(f"\nPeak RSS {peak_rss_mb():.0f} MiB")
+
+    if args.json:
+        args.json.write_text(json.dumps({"args": {k: str(v) for k, v in vars(args).items()}, "rounds": rounds},
+                                        indent=2), encoding="utf-8")
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+"""Hybrid question classification: rule scores plus precomputed category centroids.
+
+question_classifier's rules are fast but miss paraphrases, and its embedding mode
+costs an API call per question and rebuilds the category representations each
+time, so we ran rules only. Here the embedding side is made cheap:
+
+- --prepare embeds, per category, its description and the domande.csv questions the
+  rules assign to it alone with high confidence, and stores the normalized mean of
+  each category as one matrix in CATEGORY_CENTROIDS_NPZ (build_centroids);
+- question embeddings go through an on-disk cache (EmbeddingCache), so a question
+  is embedded at most once across runs;
+- scoring is one matrix product for any number of questions: the cosine
+  similarities to the centroids go through a softmax and are blended with the rule
+  confidences (score_matrix);
+- classify_many() embeds all its uncached questions in one embed request (split at
+  CLASSIFIER_EMBED_BATCH texts, the provider's limit); run_batch primes the cache
+  for the whole batch this way, so per-question classification makes no API call.
+
+Enabled with --hybrid-classifier (or HYBRID_CLASSIFIER=1). Without the centroid
+file, or when the embed call fails, classify() returns the rule result. The fast
+path keeps the rules: its confidence threshold is calibrated on them.
+"""
+
+import csv
+import hashlib
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from hackapizza_solution.config import (
+    CATEGORY_CENTROIDS_NPZ, CLASSIFIER_EMBED_BATCH, CLASSIFIER_EXEMPLAR_MIN_CONFIDENCE,
+    CLASSIFIER_EXEMPLARS_PER_CATEGORY, CLASSIFIER_MIN_SCORE, CLASSIFIER_RULE_WEIGHT,
+    CLASSIFIER_TEMPERATURE, COHERE_API_KEY, COHERE_ENDPOINT, DOMANDE_CSV, EMBED_MODEL,
+    EMBEDDING_CACHE_DB, HYBRID_CLASSIFIER_ENABLED,
+)
+from hackapizza_solution.tracing import span
+
+# Cohere input type for texts compared with each other (questions and exemplars)
+_INPUT_TYPE = "classification"
+
+_enabled = HYBRID_CLASSIFIER_ENABLED
+_embedder = None
+_index: "CentroidIndex | None" = None
+_index_loaded = False
+_cache: "EmbeddingCache | None" = None
+_lock = threading.Lock()
+_stats = {"questions": 0, "changed": 0, "fallbacks": 0, "embed_calls": 0, "embedded": 0}
+
+
+def set_enabled(enabled: bool):
+    global _enabled
+    _enabled = enabled
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def _unit(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+class EmbeddingCache:
+    """Text embeddings (float32, unit length) in memory and in SQLite, keyed by model and text."""
+
+    def __init__(self, path: Path = EMBEDDING_CACHE_DB):
+        self.path = path
+        self.stats = {"hits": 0, "misses": 0, "writes": 0}
+        self._memory: dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    @staticmethod
+    def key(text: str) -> str:
+        return hashlib.sha256(f"{EMBED_MODEL}\0{_INPUT_TYPE}\0{text.strip()}".encode("utf-8")).hexdigest()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, created REAL, vector BLOB)"
+            )
+        return self._conn
+
+    def get_many(self, texts: list[str]) -> dict[str, np.ndarray]:
+        """text -> vector for the texts in the cache."""
+        keys = {self.key(t): t for t in texts}
+        found = {}
+        with self._lock:
+            pending = []
+            for key, text in keys.items():
+                if key in self._memory:
+                    found[text] = self._memory[key]
+                else:
+                    pending.append(key)
+            # SQLite caps the number of bound parameters per statement
+            for i in range(0, len(pending), 500):
+                chunk = pending[i:i + 500]
+                rows = self._connection().execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                for key, blob in rows:
+                    self._memory[key] = np.frombuffer(blob, dtype=np.float32)
+                    found[keys[key]] = self._memory[key]
+            self.stats["hits"] += len(found)
+            self.stats["misses"] += len(keys) - len(found)
+        return found
+
+    def put_many(self, vectors: dict[str, np.ndarray]):
+        now = time.time()
+        rows = []
+        with self._lock:
+            for text, vector in vectors.items():
+                key = self.key(text)
+                self._memory[key] = np.ascontiguousarray(vector, dtype=np.float32)
+                rows.append((key, now, self._memory[key].tobytes()))
+            self._connection().executemany(
+                "INSERT OR REPLACE INTO embeddings (key, created, vector) VALUES (?, ?, ?)", rows
+            )
+            self._conn.commit()
+            self.stats["writes"] += len(rows)
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    global _cache
+    with _lock:
+        if _cache is None:
+            _cache = EmbeddingCache()
+        return _cache
+
+
+def _get_embedder():
+    global _embedder
+    with _lock:
+        if _embedder is None:
+            from datapizza.embedders.cohere import CohereEmbedder
+
+            _embedder = CohereEmbedder(
+                api_key=COHERE_API_KEY,
+                base_url=COHERE_ENDPOINT,
+                model_name=EMBED_MODEL,
+                input_type=_INPUT_TYPE,
+            )
+        return _embedder
+
+
+def embed_texts(texts: list[str]) -> np.ndarray:
+    """(len(texts), dim) unit vectors; only texts missing from the cache are sent, in as few requests as possible."""
+    cache = get_embedding_cache()
+    found = cache.get_many(texts)
+    missing = list(dict.fromkeys(t for t in texts if t not in found))
+    for i in range(0, len(missing), CLASSIFIER_EMBED_BATCH):
+        batch = missing[i:i + CLASSIFIER_EMBED_BATCH]
+        with span("classify", "embed", texts=len(batch)):
+            vectors = _unit(np.asarray(_get_embedder().embed(batch), dtype=np.float32).reshape(len(batch), -1))
+        fresh = dict(zip(batch, vectors))
+        cache.put_many(fresh)
+        found.update(fresh)
+        with _lock:
+            _stats["embed_calls"] += 1
+            _stats["embedded"] += len(batch)
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+    return np.stack([found[t] for t in texts])
+
+
+class CentroidIndex:
+    """One unit-length centroid row per category code."""
+
+    def __init__(self, codes: list[str], centroids: np.ndarray, model: str):
+        self.codes = codes
+        self.centroids = centroids
+        self.model = model
+        self.column = {code: j for j, code in enumerate(codes)}
+
+    def save(self, path: Path = CATEGORY_CENTROIDS_NPZ):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(path, codes=np.array(self.codes), centroids=self.centroids, model=np.array(self.model))
+
+    @classmethod
+    def load(cls, path: Path = CATEGORY_CENTROIDS_NPZ) -> "CentroidIndex":
+        with np.load(path) as data:
+            return cls([str(c) for c in data["codes"]], data["centroids"].astype(np.float32), str(data["model"]))
+
+
+def _exemplars() -> dict[str, list[str]]:
+    """Per category: its description, then the questions the rules give to it alone with high confidence."""
+    from question_classifier import CATEGORIES, classify as classify_rules
+
+    exemplars = {code: [f"{cat.name}: {cat.description_it}"] for code, cat in sorted(CATEGORIES.items())}
+    if not DOMANDE_CSV.exists():
+        return exemplars
+    with open(DOMANDE_CSV, encoding="utf-8") as f:
+        questions = list(dict.fromkeys(row["domanda"] for row in csv.DictReader(f)))
+    for question in questions:
+        categories = classify_rules(question, use_embeddings=False).categories
+        if len(categories) != 1:
+            continue
+        (code, confidence), = categories.items()
+        if (code in exemplars and confidence >= CLASSIFIER_EXEMPLAR_MIN_CONFIDENCE
+                and len(exemplars[code]) <= CLASSIFIER_EXEMPLARS_PER_CATEGORY):
+            exemplars[code].append(question)
+    return exemplars
+
+
+def build_centroids(path: Path = CATEGORY_CENTROIDS_NPZ) -> CentroidIndex:
+    """Embed the exemplars of every category (one request) and store their normalized means."""
+    global _index, _index_loaded
+    exemplars = _exemplars()
+    codes = list(exemplars)
+    texts = [text for code in codes for text in exemplars[code]]
+    vectors = embed_texts(texts)
+    rows, start = [], 0
+    for code in codes:
+        rows.append(vectors[start:start + len(exemplars[code])].mean(axis=0))
+        start += len(exemplars[code])
+    index = CentroidIndex(codes, _unit(np.stack(rows)), EMBED_MODEL)
+    index.save(path)
+    with _lock:
+        _index, _index_loaded = index, True
+    print(f"  {len(codes)} category centroids from {len(texts)} exemplars -> {path.name}")
+    return index
+
+
+def get_index() -> CentroidIndex | None:
+    """The centroids from --prepare, None (with a warning) when missing or built for another model."""
+    global _index, _index_loaded
+    with _lock:
+        if not _index_loaded:
+            _index_loaded = True
+            if not CATEGORY_CENTROIDS_NPZ.exists():
+                print(f"  Hybrid classifier: {CATEGORY_CENTROIDS_NPZ.name} not found (run --prepare), using rules only")
+            else:
+                index = CentroidIndex.load(CATEGORY_CENTROIDS_NPZ)
+                if index.model == EMBED_MODEL:
+                    _index = index
+                else:
+                    print(f"  Hybrid classifier: centroids built with {index.model}, not {EMBED_MODEL}; "
+                          f"using rules only until --prepare is re-run")
+        return _index
+
+
+def score_matrix(rule_scores: np.ndarray, similarities: np.ndarray) -> np.ndarray:
+    """(questions, categories) rule confidences and cosine similarities -> hybrid scores."""
+    logits = similarities / CLASSIFIER_TEMPERATURE
+    probabilities = np.exp(logits - logits.max(axis=1, keepdims=True))
+    probabilities /= probabilities.sum(axis=1, keepdims=True)
+    return CLASSIFIER_RULE_WEIGHT * rule_scores + (1 - CLASSIFIER_RULE_WEIGHT) * probabilities
+
+
+class HybridResult:
+    """Same shape as question_classifier's result: categories {code: score}, is_composite."""
+
+    def __init__(self, categories: dict[str, float], rule_categories: dict[str, float]):
+        self.categories = categories
+        self.rule_categories = rule_categories
+
+    @property
+    def is_composite(self) -> bool:
+        return len(self.categories) > 1
+
+
+def classify_many(questions: list[str]) -> list:
+    """Classify all questions with one embed request for the uncached ones; rule results when disabled."""
+    from question_classifier import classify as classify_rules
+
+    rules = [classify_rules(q, use_embeddings=False) for q in questions]
+    index = get_index() if _enabled and questions else None
+    if index is None:
+        return rules
+    try:
+        vectors = embed_texts(questions)
+    except Exception as e:
+        print(f"  Hybrid classifier: embedding failed ({type(e).__name__}: {e}), using rules")
+        with _lock:
+            _stats["questions"] += len(questions)
+            _stats["fallbacks"] += len(questions)
+        return rules
+
+    rule_scores = np.zeros((len(questions), len(index.codes)), dtype=np.float32)
+    for i, result in enumerate(rules):
+        for code, score in result.categories.items():
+            if code in index.column:
+                rule_scores[i, index.column[code]] = score
+    hybrid = score_matrix(rule_scores, vectors @ index.centroids.T)
+
+    results = []
+    for i, result in enumerate(rules):
+        picked = np.flatnonzero(hybrid[i] >= CLASSIFIER_MIN_SCORE)
+        if not len(picked):
+            picked = [int(hybrid[i].argmax())]
+        categories = {index.codes[j]: round(float(hybrid[i, j]), 3) for j in picked}
+        results.append(HybridResult(categories, dict(result.categories)))
+    with _lock:
+        _stats["questions"] += len(questions)
+        _stats["changed"] += sum(1 for r in results if set(r.categories) != set(r.rule_categories))
+    return results
+
+
+def classify(question: str):
+    """Hybrid classification of one question (rules only when disabled or unavailable)."""
+    return classify_many([question])[0]
+
+
+def prime(questions: list[str]) -> tuple[int, int]:
+    """Embed the questions not yet cached, batched; returns (embedded now, already cached)."""
+    if not (_enabled and questions and get_index() is not None):
+        return 0, 0
+    unique = list(dict.fromkeys(questions))
+    before = _stats["embedded"]
+    embed_texts(unique)
+    embedded = _stats["embedded"] - before
+    return embedded, len(unique) - embedded
+
+
+def print_classification_summary():
+    if not _enabled or not _stats["questions"]:
+        return
+    s = _stats
+    cache = get_embedding_cache().stats
+    print("\n--- HYBRID CLASSIFIER ---")
+    print(f"  {s['questions']} classifications, {s['changed']} with categories different from the rules, "
+          f"{s['fallbacks']} fell back to rules")
+    print(f"  {s['embedded']} texts embedded in {s['embed_calls']} requests; "
+          f"embedding cache {cache['hits']} hits / {cache['hits'] + cache['misses']} lookups")
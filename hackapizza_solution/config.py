@@ -16,6 +16,115 @@ QDRANT_PORT = int(os.getenv("QDRANT_PORT", "6333"))
 MODEL_FAST = "gpt-5-mini"
 MODEL_STRONG = "gpt-5"
 
+# --- LLM scheduling: per-model provider limits shared by all agents/workers ---
+# rpm/tpm: requests and tokens per minute; max_concurrency: AIMD ceiling;
+# latency_target_s: calls slower than this shrink the concurrency limit
+LLM_LIMITS = {
+    MODEL_FAST: {"rpm": 5000, "tpm": 2_000_000, "max_concurrency": 32, "latency_target_s": 45.0},
+    MODEL_STRONG: {"rpm": 1000, "tpm": 500_000, "max_concurrency": 16, "latency_target_s": 90.0},
+}
+LLM_MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", "6"))
+
+# --- Per-question deadlines (--deadline): 0 = unbounded. Agents' max_steps shrink to
+# the LLM steps that fit in the time left (running estimate, initially this value) ---
+QUESTION_DEADLINE_S = float(os.getenv("QUESTION_DEADLINE_S", "0"))
+DEADLINE_STEP_ESTIMATE_S = 10.0
+
+# --- HTTP service mode (--serve): at most --workers questions run, SERVE_QUEUE_DEPTH
+# more wait for a session, the rest get 503 ---
+SERVE_HOST = os.getenv("SERVE_HOST", "127.0.0.1")
+SERVE_PORT = int(os.getenv("SERVE_PORT", "8080"))
+SERVE_QUEUE_DEPTH = int(os.getenv("SERVE_QUEUE_DEPTH", "16"))
+SERVE_MAX_BODY_BYTES = 64 * 1024
+SERVE_LATENCY_BUCKETS_S = (0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+# --- Hedged requests (--hedge): duplicate a call still running after the model's
+# recent p90 latency; the budget caps duplicates at ~HEDGE_BUDGET_RATIO of calls ---
+HEDGE_ENABLED = os.getenv("LLM_HEDGE", "0") == "1"
+HEDGE_PERCENTILE = 90.0
+HEDGE_WINDOW = 200
+HEDGE_MIN_SAMPLES = 20
+HEDGE_MIN_DELAY_S = 1.0
+HEDGE_BUDGET_RATIO = float(os.getenv("LLM_HEDGE_BUDGET", "0.1"))
+HEDGE_BUDGET_BURST = 5.0
+HEDGE_MAX_WORKERS = 128
+
+# --- On-disk LLM response cache: off | record | replay | read-through ---
+LLM_CACHE_MODE = os.getenv("LLM_CACHE_MODE", "off")
+LLM_CACHE_MAX_ENTRIES = 50_000
+LLM_CACHE_MAX_AGE_DAYS = 30
+
+# --- Answer cache (--answer-cache): ID sets of agent answers reused for the same question
+# (normalized text) or a paraphrase (same entities, categories, numbers and negations, and
+# embedding cosine >= ANSWER_CACHE_MIN_SIMILARITY); dropped when the data version changes ---
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE", "0") == "1"
+ANSWER_CACHE_MIN_SIMILARITY = 0.95
+ANSWER_CACHE_MAX_AGE_DAYS = 30
+
+# --- Deterministic fast path (--fast-path) for simple single-category questions ---
+FAST_PATH_ENABLED = os.getenv("FAST_PATH", "0") == "1"
+FAST_PATH_MIN_CONFIDENCE = 0.6
+
+# --- Hybrid classification (--hybrid-classifier): rule scores blended with the
+# similarity to per-category centroids embedded by --prepare ---
+HYBRID_CLASSIFIER_ENABLED = os.getenv("HYBRID_CLASSIFIER", "0") == "1"
+CLASSIFIER_RULE_WEIGHT = 0.6
+# Softmax temperature over the cosine similarities to the centroids
+CLASSIFIER_TEMPERATURE = 0.05
+CLASSIFIER_MIN_SCORE = 0.3
+# Texts per embed request (Cohere accepts at most 96)
+CLASSIFIER_EMBED_BATCH = 96
+# Centroid exemplars: the category description plus up to N domande.csv questions the
+# rules assign to that category alone with at least this confidence
+CLASSIFIER_EXEMPLARS_PER_CATEGORY = 20
+CLASSIFIER_EXEMPLAR_MIN_CONFIDENCE = 0.8
+
+# --- DAG execution of sub-agents (--dag): independent branches run concurrently ---
+DAG_EXECUTION = os.getenv("DAG_EXECUTION", "0") == "1"
+DAG_MAX_PARALLEL = 4
+
+# --- Model cascade (--cascade): compliance/order agents try MODEL_FAST first and
+# escalate to MODEL_STRONG on low self-assessed confidence or a failed data check ---
+CASCADE_ENABLED = os.getenv("CASCADE", "0") == "1"
+CASCADE_MIN_CONFIDENCE = float(os.getenv("CASCADE_MIN_CONFIDENCE", "0.8"))
+
+# --- Run-scoped memoization of tool calls (tools/memo.py) ---
+TOOL_MEMO_ENABLED = os.getenv("TOOL_MEMO", "1") != "0"
+TOOL_MEMO_MAX_ENTRIES = 4096
+# Concurrent lookups in the --plan batch pre-pass (batch_planner.py)
+PREFETCH_WORKERS = 8
+
+# --- Tracing (--trace): per-question Chrome-trace JSON in TRACE_DIR ---
+TRACE_ENABLED = os.getenv("TRACE", "0") == "1"
+
+# --- Profiling (--profile cpu|mem): per-question profiles in PROFILE_DIR ---
+PROFILE_SAMPLE_INTERVAL_S = 0.005
+PROFILE_TOP_N = 10
+# Warn when the process RSS exceeds this many MiB (checked after every profiled question)
+RSS_BUDGET_MB = int(os.getenv("RSS_BUDGET_MB", "4096"))
+
+# --- Startup budgets (benchmarks/importtime.py): cumulative -X importtime per module
+# in ms, modules the CLI must not import before they are needed, and the wall time
+# from process start to the first LLM request of `main -q` ---
+IMPORT_TIME_BUDGETS_MS = {
+    "hackapizza_solution.main": 150,
+    "hackapizza_solution.agents.registry": 700,
+    "hackapizza_solution.agents.menu_search": 900,
+    "hackapizza_solution.tools.rag_tools": 700,
+}
+STARTUP_LAZY_MODULES = ("datapizza.embedders.cohere", "datapizza.vectorstores.qdrant", "qdrant_client")
+FIRST_REQUEST_BUDGET_S = 1.0
+
+# --- Shared HTTP connection pool for all LLM clients ---
+HTTP_POOL = {
+    "max_connections": int(os.getenv("HTTP_MAX_CONNECTIONS", "64")),
+    "max_keepalive_connections": int(os.getenv("HTTP_MAX_KEEPALIVE", "32")),
+    "keepalive_expiry_s": 90.0,
+    "http2": os.getenv("HTTP2", "1") != "0",
+    "timeout_s": 600.0,
+    "connect_timeout_s": 10.0,
+}
+
 # --- Embedding ---
 EMBED_MODEL = "embed-v4.0"
 EMBED_DIM = 1536
@@ -36,6 +145,18 @@ DOMANDE_CSV = DATASET_DIR / "domande.csv"
 
 MENUS_JSON = DATA_DIR / "menus.json"
 BLOGPOST_PCT_JSON = DATA_DIR / "blogpost_percentages.json"
+BLOGPOST_MANIFEST_JSON = DATA_DIR / "blogpost_manifest.json"
+RAG_MANIFEST_JSON = DATA_DIR / "rag_manifest.json"
+PDF_TEXT_CACHE_DIR = DATA_DIR / "pdf_text_cache"
+SUBMISSION_CSV = DATA_DIR / "submission.csv"
+RESULTS_DETAILED_JSON = DATA_DIR / "results_detailed.json"
+BATCH_JOURNAL_JSONL = DATA_DIR / "batch_journal.jsonl"
+LLM_CACHE_DB = DATA_DIR / "llm_cache.sqlite"
+CATEGORY_CENTROIDS_NPZ = DATA_DIR / "category_centroids.npz"
+EMBEDDING_CACHE_DB = DATA_DIR / "embedding_cache.sqlite"
+ANSWER_CACHE_DB = DATA_DIR / "answer_cache.sqlite"
+TRACE_DIR = DATA_DIR / "traces"
+PROFILE_DIR = DATA_DIR / "profiles"
 
 # --- Qdrant collections ---
 COLLECTION_CODICE = "codice_galattico"
@@ -1,7 +1,7 @@
 """Extract structured menu data from 34 PDF restaurant menus using LLM.
 
-Uses pypdfium2 for fast PDF text extraction, then gpt-5-mini with Pydantic
-structured output to extract restaurant, chef, licenses, dishes, ingredients,
+Uses pypdfium2 for fast PDF text extraction (parallel, page-level, cached by file
+hash - see pdf_text.py), then gpt-5-mini with Pydantic structured output to extract restaurant, chef, licenses, dishes, ingredients,
 and techniques.
 
 Usage:
@@ -14,13 +14,19 @@ import sys
 from pathlib import Path
 from pydantic import BaseModel
 
-import pypdfium2 as pdfium
 from datapizza.clients.openai import OpenAIClient
 from dotenv import load_dotenv
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
 from hackapizza_solution.config import (
-    OPENAI_API_KEY, MODEL_FAST, MENU_DIR, MENUS_JSON, DATA_DIR,
+    MODEL_FAST, MENU_DIR, MENUS_JSON, DATA_DIR,
+)
+from hackapizza_solution.llm.client import create_client
+from hackapizza_solution.data_preparation.pdf_text import (
+    extract_pages, join_pages, read_pages,
+)
+from hackapizza_solution.data_preparation.menu_preparser import (
+    build_llm_input, merge_preparsed, preparse_menu,
 )
 
 load_dotenv()
@@ -67,22 +73,27 @@ CRITICAL RULES:
 - Do NOT skip any dish, ingredient, or technique
 - Keep original Italian names exactly as written"""
 
+# Used when the deterministic pre-parser already extracted the mechanical fields:
+# the LLM only validates them and focuses on the dish blocks.
+PREPARSED_EXTRACTION_PROMPT = """You are a data extraction expert. You receive a restaurant menu split into:
+PRE-EXTRACTED FIELDS (parsed deterministically), the MENU HEADER and the DISHES section.
+
+CRITICAL RULES:
+- Copy restaurant, planet, chef name and licenses from PRE-EXTRACTED FIELDS unless the header clearly contradicts them
+- Fill any field that is null in PRE-EXTRACTED FIELDS from the header text
+- License codes: P, t, G, e+, Mx, Q, c, LTK (grades are integers)
+- For each dish: extract the EXACT name, ALL ingredients listed, and ALL techniques listed
+- Do NOT skip any dish, ingredient, or technique
+- Keep original Italian names exactly as written"""
+
 
 def parse_pdf_to_text(pdf_path: Path) -> str:
-    """Fast PDF text extraction using pypdfium2."""
-    pdf = pdfium.PdfDocument(str(pdf_path))
-    pages_text = []
-    for page in pdf:
-        textpage = page.get_textpage()
-        pages_text.append(textpage.get_text_range())
-        textpage.close()
-        page.close()
-    pdf.close()
-    return "\n\n".join(pages_text)
+    """Fast PDF text extraction using pypdfium2 (served from the text cache when possible)."""
+    return join_pages(read_pages(pdf_path))
 
 
 def extract_menu(client: OpenAIClient, pdf_text: str) -> RestaurantMenu:
-    """Use LLM structured output to extract menu data."""
+    """Use LLM structured output to extract menu data from the full menu text."""
     response = client.structured_response(
         input=f"{EXTRACTION_PROMPT}\n\n--- MENU TEXT ---\n{pdf_text}",
         output_cls=RestaurantMenu,
@@ -90,29 +101,55 @@ def extract_menu(client: OpenAIClient, pdf_text: str) -> RestaurantMenu:
     return response.structured_data[0]
 
 
-def run():
+def extract_menu_preparsed(client: OpenAIClient, pdf_text: str) -> tuple[dict, list[str]]:
+    """Pre-parse the mechanical fields, send the LLM only the reduced input to validate,
+    then fill what it left out from the deterministic values. Returns a menus.json entry
+    and the fields where the LLM overruled the pre-parser."""
+    pre = preparse_menu(pdf_text)
+    response = client.structured_response(
+        input=f"{PREPARSED_EXTRACTION_PROMPT}\n\n{build_llm_input(pre, pdf_text)}",
+        output_cls=RestaurantMenu,
+    )
+    menu_dict = _to_menu_dict(response.structured_data[0])
+    return merge_preparsed(menu_dict, pre)
+
+
+def _to_menu_dict(menu: RestaurantMenu) -> dict:
+    menu_dict = menu.model_dump()
+    licenses_dict = {lic["code"]: lic["grade"] for lic in menu_dict["chef"]["licenses"]}
+    menu_dict["chef"]["licenses"] = licenses_dict
+    return menu_dict
+
+
+def run(use_preparser: bool = True):
     DATA_DIR.mkdir(parents=True, exist_ok=True)
 
-    client = OpenAIClient(
-        api_key=OPENAI_API_KEY,
-        model=MODEL_FAST,
-    )
+    client = create_client(MODEL_FAST)
 
     pdf_files = sorted(MENU_DIR.glob("*.pdf"))
     print(f"Found {len(pdf_files)} menu PDFs to process\n")
 
     all_menus = []
-    for i, pdf_path in enumerate(pdf_files, 1):
+    to_review = []
+    # Text extraction runs ahead on a process pool while the LLM handles earlier menus
+    for i, (pdf_path, pages, error) in enumerate(extract_pages(pdf_files), 1):
         print(f"[{i}/{len(pdf_files)}] Processing {pdf_path.name}...")
+        if error:
+            print(f"  ERROR: {error}")
+            continue
         try:
-            text = parse_pdf_to_text(pdf_path)
+            text = join_pages(pages)
             if not text.strip():
                 print(f"  WARNING: No text extracted, skipping")
                 continue
-            menu = extract_menu(client, text)
-            menu_dict = menu.model_dump()
-            licenses_dict = {lic["code"]: lic["grade"] for lic in menu_dict["chef"]["licenses"]}
-            menu_dict["chef"]["licenses"] = licenses_dict
+            if use_preparser:
+                menu_dict, conflicts = extract_menu_preparsed(client, text)
+                for conflict in conflicts:
+                    print(f"  CHECK: {conflict}, keeping the LLM value")
+                if conflicts:
+                    to_review.append(pdf_path.name)
+            else:
+                menu_dict = _to_menu_dict(extract_menu(client, text))
             all_menus.append(menu_dict)
             n_dishes = len(menu_dict["dishes"])
             print(f"  -> {menu_dict['restaurant']} ({menu_dict['planet']}) - {n_dishes} dishes, chef: {menu_dict['chef']['name']}")
@@ -124,7 +161,9 @@ def run():
         json.dumps(all_menus, indent=2, ensure_ascii=False), encoding="utf-8"
     )
     print(f"\nSaved {len(all_menus)} menus to {MENUS_JSON}")
+    if to_review:
+        print(f"LLM and pre-parser disagree on {len(to_review)} menus (see CHECK lines): {', '.join(to_review)}")
 
 
 if __name__ == "__main__":
-    run()
+    run(use_preparser="--no-preparser" not in sys.argv)
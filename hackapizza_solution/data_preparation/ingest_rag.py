@@ -1,12 +1,18 @@
 """Ingest Codice Galattico, Manuale di Cucina, and Blogpost HTML into Qdrant.
 
 Creates 3 separate collections for targeted RAG retrieval by specialized agents.
+RAG_MANIFEST_JSON records a content fingerprint of each collection (digest of the
+source files, chunking and embedding model); the answer cache's data version
+includes it, so re-ingested content invalidates cached answers even when the
+collection sizes do not change.
 
 Usage:
     cd <project_root>
     ./pizza_env/bin/python -m hackapizza_solution.data_preparation.ingest_rag
 """
 
+import hashlib
+import json
 import os
 import sys
 from pathlib import Path
@@ -26,11 +32,15 @@ from hackapizza_solution.config import (
     EMBED_MODEL, EMBED_DIM,
     CODICE_PDF, MANUALE_PDF, BLOGPOST_DIR,
     COLLECTION_CODICE, COLLECTION_MANUALE, COLLECTION_BLOG,
+    DATA_DIR, RAG_MANIFEST_JSON,
 )
+from hackapizza_solution.data_preparation.parse_blogposts import _write_json_atomic
 
 load_dotenv()
 
 VECTOR_NAME = "embedding_vector"
+CHUNK_MAX_CHARS = 2000
+CHUNK_OVERLAP = 100
 
 
 def _make_embedder() -> ChunkEmbedder:
@@ -54,11 +64,40 @@ def _make_vector_store(collection_name: str) -> QdrantVectorstore:
     return vs
 
 
+def _sources_digest(paths: list[Path]) -> str:
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(path.name.encode("utf-8") + b"\0")
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def _record_ingestion(collection_name: str, sources: list[Path] | None):
+    """Write the content fingerprint of a collection to RAG_MANIFEST_JSON.
+    None removes it while the collection is being (re-)ingested, so an interrupted
+    ingestion never keeps the fingerprint of the previous contents."""
+    manifest = {}
+    if RAG_MANIFEST_JSON.exists():
+        manifest = json.loads(RAG_MANIFEST_JSON.read_text(encoding="utf-8"))
+    if sources is None:
+        manifest.pop(collection_name, None)
+    else:
+        manifest[collection_name] = {
+            "sources": _sources_digest(sources),
+            "files": len(sources),
+            "chunking": f"{CHUNK_MAX_CHARS}/{CHUNK_OVERLAP}",
+            "embed_model": EMBED_MODEL,
+        }
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    _write_json_atomic(RAG_MANIFEST_JSON, manifest)
+
+
 def ingest_pdf(file_path: Path, collection_name: str):
     """Parse a PDF, split, embed, and store in Qdrant."""
     print(f"\nIngesting {file_path.name} -> collection '{collection_name}'")
+    _record_ingestion(collection_name, None)
     parser = DoclingParser()
-    splitter = RecursiveSplitter(max_char=2000, overlap=100)
+    splitter = RecursiveSplitter(max_char=CHUNK_MAX_CHARS, overlap=CHUNK_OVERLAP)
     embedder = _make_embedder()
     vector_store = _make_vector_store(collection_name)
 
@@ -68,17 +107,20 @@ def ingest_pdf(file_path: Path, collection_name: str):
         collection_name=collection_name,
     )
     pipeline.run(file_path=str(file_path))
+    _record_ingestion(collection_name, [file_path])
     print(f"  Done: {file_path.name}")
 
 
 def ingest_html_files(directory: Path, collection_name: str):
     """Parse HTML files, split, embed, and store in Qdrant."""
     print(f"\nIngesting HTML from {directory} -> collection '{collection_name}'")
-    splitter = TextSplitter(max_char=2000, overlap=100)
+    _record_ingestion(collection_name, None)
+    splitter = TextSplitter(max_char=CHUNK_MAX_CHARS, overlap=CHUNK_OVERLAP)
     embedder = _make_embedder()
     vector_store = _make_vector_store(collection_name)
 
-    for html_file in sorted(directory.glob("*.html")):
+    html_files = sorted(directory.glob("*.html"))
+    for html_file in html_files:
         print(f"  Processing {html_file.name}...")
         from bs4 import BeautifulSoup
         text = BeautifulSoup(
@@ -90,6 +132,7 @@ def ingest_html_files(directory: Path, collection_name: str):
             chunk.metadata["source"] = html_file.name
         embedded_chunks = embedder.run(nodes=split_chunks)
         vector_store.add(embedded_chunks, collection_name)
+    _record_ingestion(collection_name, html_files)
     print(f"  Done: HTML files")
 
 
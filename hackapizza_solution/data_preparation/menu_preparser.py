@@ -0,0 +1,242 @@
+"""Deterministic pre-parser for menu PDF text.
+
+Extracts the mechanical fields (restaurant, planet, chef, license grades) with
+regexes and a roman-numeral converter, and splits the dish section into candidate
+blocks. extract_menus.py then sends the LLM only the dish blocks plus the
+pre-extracted fields to validate, instead of the full menu text.
+
+Usage:
+    cd <project_root>
+    ./pizza_env/bin/python -m hackapizza_solution.data_preparation.menu_preparser
+"""
+
+import json
+import re
+import sys
+from pathlib import Path
+
+from pydantic import BaseModel
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+from hackapizza_solution.config import MENU_DIR
+
+PLANETS = [
+    "Tatooine", "Asgard", "Namecc", "Arrakis", "Krypton",
+    "Pandora", "Cybertron", "Ego", "Montressosr", "Klyntar",
+]
+
+# Restaurant-name hints for planets that are not spelled out in the text
+PLANET_HINTS: dict[str, str] = {
+    "dune": "Arrakis",
+}
+
+# Full license names (Italian and English) -> license code used in menus.json
+LICENSE_CODES: dict[str, str] = {
+    "psionica": "P", "psionic": "P",
+    "temporale": "t", "temporal": "t",
+    "gravitazionale": "G", "gravitational": "G",
+    "antimateria": "e+", "antimatter": "e+",
+    "magnetica": "Mx", "magnetic": "Mx",
+    "quantistica": "Q", "quantum": "Q",
+    "luce": "c", "light": "c",
+    "ltk": "LTK",
+}
+
+_ROMAN_VALUES = {"I": 1, "V": 5, "X": 10, "L": 50, "C": 100}
+
+_LICENSE_RE = re.compile(
+    r"\b(?P<name>" + "|".join(sorted(LICENSE_CODES, key=len, reverse=True)) + r")\b"
+    r"[^\n\d]{0,30}?"
+    r"(?P<beyond>oltre\s+(?:il\s+)?(?:livello|grado)|superiore\s+(?:al?\s+)?(?:livello\s+|grado\s+)?"
+    r"|beyond\s+level|superior\s+to)?"
+    # Roman numerals must be uppercase, otherwise Italian words like "i" would match
+    r"\s*(?P<grade>\b(?-i:[IVXLC]+)\b|\b\d{1,2}\b)",
+    re.IGNORECASE,
+)
+_CHEF_RE = re.compile(
+    r"\bChef\b\s*[:\-–]?\s*(?P<name>[A-Z][\w'’.\-]+(?:[ \t]+[A-Z][\w'’.\-]+){0,3})"
+)
+_RESTAURANT_RE = re.compile(
+    r"\bRistorante\s*[:\-–]?\s*(?P<name>[^\n]{2,80})", re.IGNORECASE
+)
+_INGREDIENTS_MARKER_RE = re.compile(r"^\s*ingredienti\b", re.IGNORECASE)
+_TECHNIQUES_MARKER_RE = re.compile(r"^\s*tecniche\b", re.IGNORECASE)
+
+
+class PreParsedMenu(BaseModel):
+    restaurant: str | None = None
+    planet: str | None = None
+    chef_name: str | None = None
+    licenses: dict[str, int] = {}
+    dish_blocks: list[str] = []
+    header_text: str = ""
+
+
+def roman_to_int(numeral: str) -> int:
+    """Convert a roman numeral (I..C range) to int. Raises ValueError on invalid input."""
+    numeral = numeral.strip().upper()
+    if not numeral or any(ch not in _ROMAN_VALUES for ch in numeral):
+        raise ValueError(f"Not a roman numeral: {numeral!r}")
+    total = 0
+    for i, ch in enumerate(numeral):
+        value = _ROMAN_VALUES[ch]
+        if i + 1 < len(numeral) and value < _ROMAN_VALUES[numeral[i + 1]]:
+            total -= value
+        else:
+            total += value
+    return total
+
+
+def parse_grade(raw: str) -> int:
+    """Parse an arabic or (uppercase) roman license grade."""
+    raw = raw.strip()
+    return int(raw) if raw.isdigit() else roman_to_int(raw)
+
+
+def extract_licenses(text: str) -> dict[str, int]:
+    """Find license mentions and their grades. "beyond/oltre level X" maps to X+1.
+    If a license is mentioned more than once, the highest grade wins."""
+    licenses: dict[str, int] = {}
+    for m in _LICENSE_RE.finditer(text):
+        try:
+            grade = parse_grade(m.group("grade"))
+        except ValueError:
+            continue
+        if m.group("beyond"):
+            grade += 1
+        code = LICENSE_CODES[m.group("name").lower()]
+        licenses[code] = max(grade, licenses.get(code, 0))
+    return licenses
+
+
+def infer_planet(text: str, restaurant: str | None = None) -> str | None:
+    """Infer the planet from the restaurant name first, then from the most mentioned planet."""
+    if restaurant:
+        for planet in PLANETS:
+            if re.search(rf"\b{planet}\b", restaurant, re.IGNORECASE):
+                return planet
+        for hint, planet in PLANET_HINTS.items():
+            if hint in restaurant.lower():
+                return planet
+    counts = {
+        planet: len(re.findall(rf"\b{planet}\b", text, re.IGNORECASE)) for planet in PLANETS
+    }
+    best = max(counts, key=counts.get)
+    if counts[best] == 0:
+        return None
+    # Ambiguous if two planets are mentioned equally often
+    if sum(1 for c in counts.values() if c == counts[best]) > 1:
+        return None
+    return best
+
+
+def split_dish_blocks(text: str) -> tuple[str, list[str]]:
+    """Split menu text into (header, dish blocks). A dish block starts at the title line
+    preceding an "Ingredienti" marker and runs until the next dish title.
+    Returns (text, []) if no markers are found."""
+    lines = text.splitlines()
+    starts = []
+    for i, line in enumerate(lines):
+        if not _INGREDIENTS_MARKER_RE.match(line):
+            continue
+        title = i - 1
+        while title >= 0 and not lines[title].strip():
+            title -= 1
+        if title >= 0 and not _TECHNIQUES_MARKER_RE.match(lines[title]):
+            starts.append(title)
+    starts = sorted(set(starts))
+    if not starts:
+        return text, []
+    header = "\n".join(lines[:starts[0]]).strip()
+    blocks = []
+    for start, end in zip(starts, starts[1:] + [len(lines)]):
+        block = "\n".join(lines[start:end]).strip()
+        if block:
+            blocks.append(block)
+    return header, blocks
+
+
+def preparse_menu(text: str) -> PreParsedMenu:
+    """Extract the mechanical fields from a menu's text."""
+    header, blocks = split_dish_blocks(text)
+    # Licenses and chef live in the header; dish descriptions only add false positives
+    scope = header if blocks else text
+
+    restaurant = None
+    m = _RESTAURANT_RE.search(scope)
+    if m:
+        restaurant = m.group("name").strip()
+    else:
+        first_line = next((line.strip() for line in text.splitlines() if line.strip()), "")
+        restaurant = first_line or None
+
+    chef = _CHEF_RE.search(scope)
+    return PreParsedMenu(
+        restaurant=restaurant,
+        planet=infer_planet(text, restaurant),
+        chef_name=chef.group("name").strip() if chef else None,
+        licenses=extract_licenses(scope),
+        dish_blocks=blocks,
+        header_text=header,
+    )
+
+
+def build_llm_input(pre: PreParsedMenu, full_text: str) -> str:
+    """Compact LLM input: pre-extracted fields to validate plus only the dish section.
+    Falls back to the full text when no dish blocks were found."""
+    fields = {
+        "restaurant": pre.restaurant,
+        "planet": pre.planet,
+        "chef": pre.chef_name,
+        "licenses": pre.licenses,
+    }
+    prefix = f"--- PRE-EXTRACTED FIELDS ---\n{json.dumps(fields, ensure_ascii=False)}\n\n"
+    if not pre.dish_blocks:
+        return prefix + f"--- MENU TEXT ---\n{full_text}"
+    return (
+        prefix
+        + f"--- MENU HEADER ---\n{pre.header_text[:1500]}\n\n"
+        + "--- DISHES ---\n" + "\n\n".join(pre.dish_blocks)
+    )
+
+
+def merge_preparsed(menu_dict: dict, pre: PreParsedMenu) -> tuple[dict, list[str]]:
+    """Fill the mechanical fields of an LLM-extracted menu from the deterministic values.
+    The LLM validated the pre-extracted fields (its prompt says to keep them unless the
+    header contradicts them), so on a disagreement its value is kept and the field is
+    returned as a conflict to review; values only one side found are kept as they are."""
+    conflicts = []
+    llm_licenses = menu_dict["chef"]["licenses"]
+    for code, grade in pre.licenses.items():
+        if code not in llm_licenses:
+            llm_licenses[code] = grade
+        elif llm_licenses[code] != grade:
+            conflicts.append(f"license {code}: LLM={llm_licenses[code]} regex={grade}")
+    if pre.planet:
+        if not menu_dict.get("planet"):
+            menu_dict["planet"] = pre.planet
+        elif menu_dict["planet"] != pre.planet:
+            conflicts.append(f"planet: LLM={menu_dict['planet']} regex={pre.planet}")
+    return menu_dict, conflicts
+
+
+def run():
+    from hackapizza_solution.data_preparation.pdf_text import extract_pages, join_pages
+
+    pdf_files = sorted(MENU_DIR.glob("*.pdf"))
+    for pdf_path, pages, error in extract_pages(pdf_files):
+        if error:
+            print(f"{pdf_path.name}: ERROR {error}")
+            continue
+        text = join_pages(pages)
+        pre = preparse_menu(text)
+        reduced = build_llm_input(pre, text)
+        print(
+            f"{pdf_path.name}: {pre.restaurant} ({pre.planet}) chef={pre.chef_name} "
+            f"licenses={pre.licenses} dishes={len(pre.dish_blocks)} "
+            f"chars {len(text)} -> {len(reduced)}"
+        )
+
+
+if __name__ == "__main__":
+    run()
@@ -1,68 +1,243 @@
-"""Extract ingredient percentages from the two blogpost HTML reviews.
+"""Extract ingredient percentages from the blogpost HTML reviews.
 
 The blogposts contain exact percentage information for regulated ingredients
 used in specific dishes. This data is crucial for compliance checking (Cat. K).
 
+Every HTML file in BLOGPOST_DIR is parsed on a process pool. Percentage mentions
+("8% di Carne di Drago") are resolved against the dishes and ingredients in
+menus.json: the dish is the last one mentioned up to that sentence, the ingredient is the closest of that dish's ingredients in
+the same sentence. Results are written incrementally; files whose size/mtime did
+not change since the last run are skipped (see BLOGPOST_MANIFEST_JSON). The
+manifest records the digest of menus.json: when the menus change, every file is
+parsed again, since dishes and ingredients are resolved against them. At most
+2 * workers files are in flight on the pool.
+
+Requires menus.json (run extract_menus first).
+
 Usage:
     cd <project_root>
     ./pizza_env/bin/python -m hackapizza_solution.data_preparation.parse_blogposts
 """
 
+import hashlib
+import itertools
 import json
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 import sys
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
-from hackapizza_solution.config import BLOGPOST_PCT_JSON, DATA_DIR
-
-# Manually extracted from the two blogpost HTML files.
-# blog_etere_del_gusto.html (reviewer: Cassandra Stellaris, restaurant: L'Etere del Gusto, Pandora)
-# blog_sapore_del_dune.html (reviewer: Marco Stellaris, restaurant: Sapore del Dune)
-
-BLOGPOST_PERCENTAGES: dict[str, dict[str, float]] = {
-    # --- Blog: L'Etere del Gusto ---
-    "Il Risveglio del Drago Celeste": {
-        "Carne di Drago": 8.0,
-    },
-    "Cosmic Harmony Infusion": {
-        "Petali di Eco": 3.0,
-    },
-    "Sinfonia Multiversale in Otto Movimenti": {
-        "Muffa Lunare": 2.0,
-    },
-    # --- Blog: Sapore del Dune ---
-    "Sinfonia Quantistica delle Stelle": {
-        "Sale Temporale": 1.0,
-        "Nettare di Sirena": 0.1,
-    },
-    "Galassia di Sapore Quantico": {
-        "Polvere di Stelle": 1.0,
-        "Carne di Drago": 1.0,
-    },
-    "Evanescenza Quantica": {
-        "Cristalli di Memoria": 0.1,
-        "Petali di Eco": 0.1,
-    },
-    "Pioggia di Dimensioni Galattiche": {
-        "Essenza di Vuoto": 3.0,
-        "Nettare di Sirena": 0.1,
-    },
-    "Sinfonia Galattica": {
-        "Funghi dell'Etere": 2.0,
-        "Carne di Drago": 2.0,
-    },
-}
-
-
-def run():
+from hackapizza_solution.config import (
+    BLOGPOST_DIR, BLOGPOST_MANIFEST_JSON, BLOGPOST_PCT_JSON, DATA_DIR, MENUS_JSON,
+)
+
+# Flush results to disk every N processed files
+FLUSH_EVERY = 50
+
+_BLOCK_TAGS = ["p", "li", "td", "blockquote", "h1", "h2", "h3", "h4", "h5", "h6"]
+_PCT_RE = re.compile(r"(\d+(?:[.,]\d+)?)\s*%")
+# Text allowed between a percentage and the ingredient it quantifies ("8% di ...")
+_CONNECTOR_RE = re.compile(r"\s*(?:(?:di|del|dello|della|dei|degli|delle|dell'|d'|of)\s*)?", re.IGNORECASE)
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?;])\s+(?=[^\d\s])")
+
+# Set once per worker process by _init_worker
+_dish_index: dict[str, list[str]] = {}
+_dish_re: re.Pattern | None = None
+_dish_by_key: dict[str, str] = {}
+_ingredient_patterns: dict[str, tuple[re.Pattern, dict[str, str]]] = {}
+
+
+def _normalize(text: str) -> str:
+    return text.replace("’", "'").replace("\xa0", " ")
+
+
+def _alternation(names: list[str]) -> re.Pattern:
+    # Longest first so "Sinfonia Galattica" does not shadow a longer dish name
+    escaped = [re.escape(_normalize(n)) for n in sorted(names, key=len, reverse=True)]
+    return re.compile(r"(?<!\w)(?:" + "|".join(escaped) + r")(?!\w)", re.IGNORECASE)
+
+
+def build_dish_index(menus: list[dict]) -> dict[str, list[str]]:
+    """Map every dish name in menus.json to its ingredient list."""
+    return {
+        dish["name"]: list(dish["ingredients"])
+        for menu in menus
+        for dish in menu["dishes"]
+    }
+
+
+def _init_worker(dish_index: dict[str, list[str]]):
+    global _dish_index, _dish_re, _dish_by_key, _ingredient_patterns
+    _dish_index = dish_index
+    _ingredient_patterns = {}
+    _dish_by_key = {_normalize(name).lower(): name for name in dish_index}
+    _dish_re = _alternation(list(dish_index)) if dish_index else None
+
+
+def _html_blocks(html: str) -> list[str]:
+    """Paragraph-level text blocks, using lxml when installed (much faster than html.parser)."""
+    from bs4 import BeautifulSoup
+    try:
+        soup = BeautifulSoup(html, "lxml")
+    except Exception:
+        soup = BeautifulSoup(html, "html.parser")
+    blocks = []
+    for el in soup.find_all(_BLOCK_TAGS):
+        # Skip containers whose text is reported by a nested block element
+        if el.find(_BLOCK_TAGS):
+            continue
+        text = _normalize(el.get_text(" ", strip=True))
+        if text:
+            blocks.append(text)
+    if not blocks:
+        blocks = [_normalize(line) for line in soup.get_text("\n").splitlines() if line.strip()]
+    return blocks
+
+
+def _ingredient_pattern(dish: str) -> tuple[re.Pattern, dict[str, str]]:
+    if dish not in _ingredient_patterns:
+        ingredients = _dish_index[dish]
+        _ingredient_patterns[dish] = (
+            _alternation(ingredients),
+            {_normalize(i).lower(): i for i in ingredients},
+        )
+    return _ingredient_patterns[dish]
+
+
+def _closest_ingredient(sentence: str, pct_start: int, pct_end: int, dish: str) -> str | None:
+    """The dish ingredient a percentage refers to: the one right after "X% di", otherwise
+    the one mentioned closest to the percentage in the sentence."""
+    if not _dish_index[dish]:
+        return None
+    pattern, by_key = _ingredient_pattern(dish)
+    matches = list(pattern.finditer(sentence))
+    following = [m for m in matches if m.start() >= pct_end]
+    if following and _CONNECTOR_RE.fullmatch(sentence[pct_end:following[0].start()]):
+        return by_key[following[0].group(0).lower()]
+    best, best_dist = None, None
+    for m in matches:
+        dist = pct_start - m.end() if m.end() <= pct_start else m.start() - pct_end
+        if best_dist is None or dist < best_dist:
+            best, best_dist = by_key[m.group(0).lower()], dist
+    return best
+
+
+def extract_percentages(html: str) -> dict[str, dict[str, float]]:
+    """Extract {dish: {ingredient: percentage}} from one blogpost."""
+    results: dict[str, dict[str, float]] = {}
+    if _dish_re is None:
+        return results
+    current_dish = None
+    for block in _html_blocks(html):
+        if current_dish is None and not _dish_re.search(block):
+            continue
+        # The dish context carries across sentences and paragraphs until another dish is named
+        for sentence in _SENTENCE_SPLIT_RE.split(block):
+            mentioned = [_dish_by_key[m.group(0).lower()] for m in _dish_re.finditer(sentence)]
+            if mentioned:
+                current_dish = mentioned[-1]
+            if current_dish is None or "%" not in sentence:
+                continue
+            for pm in _PCT_RE.finditer(sentence):
+                ingredient = _closest_ingredient(sentence, pm.start(), pm.end(), current_dish)
+                if ingredient is None:
+                    continue
+                value = float(pm.group(1).replace(",", "."))
+                results.setdefault(current_dish, {})[ingredient] = value
+    return results
+
+
+def _process_file(path: Path) -> tuple[str, dict[str, dict[str, float]], str | None]:
+    try:
+        return path.name, extract_percentages(path.read_text(encoding="utf-8", errors="replace")), None
+    except Exception as e:
+        return path.name, {}, f"{type(e).__name__}: {e}"
+
+
+def _file_signature(path: Path) -> str:
+    stat = path.stat()
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def _menus_digest(menus_bytes: bytes) -> str:
+    return hashlib.sha256(menus_bytes).hexdigest()[:16]
+
+
+def _write_json_atomic(path: Path, data) -> None:
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+    tmp.replace(path)
+
+
+def _merge(files: dict[str, dict]) -> dict[str, dict[str, float]]:
+    """Merge per-file results; later files (by name) win on conflicting values."""
+    merged: dict[str, dict[str, float]] = {}
+    for name in sorted(files):
+        for dish, ings in files[name]["percentages"].items():
+            merged.setdefault(dish, {}).update(ings)
+    return merged
+
+
+def _flush(files: dict[str, dict], menus_digest: str) -> dict[str, dict[str, float]]:
+    merged = _merge(files)
+    _write_json_atomic(BLOGPOST_MANIFEST_JSON, {"menus_digest": menus_digest, "files": files})
+    _write_json_atomic(BLOGPOST_PCT_JSON, merged)
+    return merged
+
+
+def run(workers: int | None = None):
     DATA_DIR.mkdir(parents=True, exist_ok=True)
+    if not MENUS_JSON.exists():
+        print(f"ERROR: {MENUS_JSON} not found, blogpost percentages need the menu index. Skipping.")
+        return
+    menus_bytes = MENUS_JSON.read_bytes()
+    menus_digest = _menus_digest(menus_bytes)
+    dish_index = build_dish_index(json.loads(menus_bytes.decode("utf-8")))
+
+    files: dict[str, dict] = {}
+    if BLOGPOST_MANIFEST_JSON.exists():
+        manifest = json.loads(BLOGPOST_MANIFEST_JSON.read_text(encoding="utf-8"))
+        if manifest.get("menus_digest") == menus_digest:
+            files = manifest.get("files", {})
+        else:
+            print("menus.json changed since the last run: parsing every blogpost again")
+
+    html_files = sorted(BLOGPOST_DIR.glob("*.html"))
+    present = {p.name for p in html_files}
+    files = {name: entry for name, entry in files.items() if name in present}
+    todo = [p for p in html_files if files.get(p.name, {}).get("signature") != _file_signature(p)]
+    print(f"Blogposts: {len(html_files)} files, {len(todo)} new or changed")
+
+    workers = workers or os.cpu_count() or 1
+    done = 0
+    paths = iter(todo)
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(dish_index,)
+    ) as pool:
+        pending = deque()
+        while True:
+            # Top up to 2 * workers files in flight, collected in submission order
+            for path in itertools.islice(paths, workers * 2 - len(pending)):
+                pending.append((path, pool.submit(_process_file, path)))
+            if not pending:
+                break
+            path, future = pending.popleft()
+            name, percentages, error = future.result()
+            if error:
+                print(f"  ERROR {name}: {error}")
+                continue
+            files[name] = {"signature": _file_signature(path), "percentages": percentages}
+            done += 1
+            if done % FLUSH_EVERY == 0:
+                _flush(files, menus_digest)
+                print(f"  {done}/{len(todo)} files processed")
 
-    BLOGPOST_PCT_JSON.write_text(
-        json.dumps(BLOGPOST_PERCENTAGES, indent=2, ensure_ascii=False),
-        encoding="utf-8",
-    )
-    print(f"Saved {len(BLOGPOST_PERCENTAGES)} dishes to {BLOGPOST_PCT_JSON}")
-    for dish, ings in sorted(BLOGPOST_PERCENTAGES.items()):
+    merged = _flush(files, menus_digest)
+    print(f"Saved {len(merged)} dishes to {BLOGPOST_PCT_JSON}")
+    for dish, ings in sorted(merged.items()):
         print(f"  {dish}: {ings}")
 
 
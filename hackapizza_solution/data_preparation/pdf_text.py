@@ -0,0 +1,140 @@
+"""Parallel, page-level PDF text extraction with an on-disk text cache.
+
+pypdfium2 is not thread-safe, so documents are fanned out to a process pool.
+Results are yielded one document at a time with a bounded number of documents
+in flight, so large menu collections are never held in memory all at once.
+Extracted pages are cached by file hash, so re-runs skip the PDF pass entirely.
+
+Usage:
+    cd <project_root>
+    ./pizza_env/bin/python -m hackapizza_solution.data_preparation.pdf_text
+"""
+
+import hashlib
+import json
+import os
+import sys
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pypdfium2 as pdfium
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+from hackapizza_solution.config import MENU_DIR, PDF_TEXT_CACHE_DIR
+
+# (1-based page number, page text)
+PageText = tuple[int, str]
+
+
+def file_sha256(path: Path) -> str:
+    """Content hash of a file, read in 1 MiB blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def iter_pdf_pages(pdf_path: Path) -> Iterator[PageText]:
+    """Yield (page_number, text) for each page, loading one page at a time."""
+    pdf = pdfium.PdfDocument(str(pdf_path))
+    try:
+        for index in range(len(pdf)):
+            page = pdf[index]
+            textpage = page.get_textpage()
+            try:
+                yield index + 1, textpage.get_text_range()
+            finally:
+                textpage.close()
+                page.close()
+    finally:
+        pdf.close()
+
+
+def read_pages(pdf_path: Path, cache_dir: Path | None = PDF_TEXT_CACHE_DIR) -> list[PageText]:
+    """Return all pages of a PDF, served from the text cache when the file hash matches.
+    Pass cache_dir=None to always re-extract."""
+    if cache_dir is None:
+        return list(iter_pdf_pages(pdf_path))
+
+    cached = cache_dir / f"{file_sha256(pdf_path)}.json"
+    if cached.exists():
+        return [(number, text) for number, text in json.loads(cached.read_text(encoding="utf-8"))]
+
+    pages = list(iter_pdf_pages(pdf_path))
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    # Write-then-rename so concurrent workers never observe a half-written file
+    tmp = cached.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(pages, ensure_ascii=False), encoding="utf-8")
+    tmp.replace(cached)
+    return pages
+
+
+def join_pages(pages: Iterable[PageText]) -> str:
+    """Concatenate page texts the way the single-string extractor always did."""
+    return "\n\n".join(text for _, text in pages)
+
+
+def _read_pages_safe(pdf_path: Path, cache_dir: Path | None) -> tuple[list[PageText], str | None]:
+    try:
+        return read_pages(pdf_path, cache_dir), None
+    except Exception as e:
+        return [], f"{type(e).__name__}: {e}"
+
+
+def extract_pages(
+    pdf_paths: Iterable[Path],
+    workers: int | None = None,
+    cache_dir: Path | None = PDF_TEXT_CACHE_DIR,
+) -> Iterator[tuple[Path, list[PageText], str | None]]:
+    """Extract page texts from many PDFs on a process pool.
+
+    Yields (pdf_path, pages, error) in input order. At most 2 * workers documents
+    are in flight, so memory stays bounded regardless of collection size.
+    A failing document yields an empty page list and an error message instead of
+    aborting the whole pass.
+    """
+    paths = iter(pdf_paths)
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1:
+        for pdf_path in paths:
+            pages, error = _read_pages_safe(pdf_path, cache_dir)
+            yield pdf_path, pages, error
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+
+        def submit_next() -> bool:
+            pdf_path = next(paths, None)
+            if pdf_path is None:
+                return False
+            pending.append((pdf_path, pool.submit(_read_pages_safe, pdf_path, cache_dir)))
+            return True
+
+        for _ in range(workers * 2):
+            if not submit_next():
+                break
+        while pending:
+            pdf_path, future = pending.popleft()
+            submit_next()
+            pages, error = future.result()
+            yield pdf_path, pages, error
+
+
+def run():
+    pdf_files = sorted(MENU_DIR.glob("*.pdf"))
+    print(f"Extracting text from {len(pdf_files)} PDFs (cache: {PDF_TEXT_CACHE_DIR})\n")
+    for pdf_path, pages, error in extract_pages(pdf_files):
+        if error:
+            print(f"  ERROR {pdf_path.name}: {error}")
+            continue
+        n_chars = sum(len(text) for _, text in pages)
+        print(f"  {pdf_path.name}: {len(pages)} pages, {n_chars} chars")
+
+
+if __name__ == "__main__":
+    run()
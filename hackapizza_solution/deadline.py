@@ -0,0 +1,241 @@
+"""Per-question deadline budgets (--deadline SECONDS).
+
+A Deadline is opened per question (question_deadline) and held in a context
+variable, so it follows the question into DAG and hedging pool threads (they run
+with run_in_context). It is checked before every agent run, LLM attempt (including
+rate-limit waits and retry backoff) and RAG query; past the deadline these raise
+DeadlineExceeded instead of starting more work. Calls already in flight are not
+interrupted, which is why the batch summary reports the overrun past the budget.
+
+Agents also get an adaptive step budget: before each run, max_steps is lowered to
+the number of LLM steps that fit in the time left, using a running average of the
+LLM call duration (bound_agent).
+
+Every tool result of the question is recorded, so when the deadline hits, the
+question is answered with the best partial ID set the tools produced: the last
+map_dishes_to_ids result, else the dishes of the last ingredient/technique search (or
+planet/restaurant filter, when that was the last tool call), instead of "0".
+
+An interrupted batch (Ctrl-C) calls cancel_all: the same checks then raise
+BatchInterrupted in every question, with or without a deadline, so running questions
+stop at their next agent run, LLM attempt or RAG query instead of running to the end.
+"""
+
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from hackapizza_solution.config import DEADLINE_STEP_ESTIMATE_S, QUESTION_DEADLINE_S
+
+# Tools whose result lists dishes as "- Name (...)" lines. The searches are filtered by the
+# question's ingredients and techniques; the planet and restaurant filters list whole menus,
+# so they only stand for the answer when they were the question's last tool call.
+# get_all_dishes_with_details (every dish) never does.
+_DISH_SEARCH_TOOLS = ("search_dishes_by_technique", "search_dishes_by_ingredient")
+_DISH_SCOPE_TOOLS = ("filter_dishes_by_planet", "filter_dishes_by_restaurant")
+_DISH_LINE_RE = re.compile(r"^- (.+?)(?: \((?:restaurant|planet):.*\))?$", re.MULTILINE)
+# Weight of the newest LLM call duration in the running step estimate
+_STEP_EWMA_ALPHA = 0.1
+
+_current: ContextVar["Deadline | None"] = ContextVar("deadline", default=None)
+_budget_s = QUESTION_DEADLINE_S
+_step_estimate_s = DEADLINE_STEP_ESTIMATE_S
+_step_lock = threading.Lock()
+_cancelled = threading.Event()
+
+
+class DeadlineExceeded(RuntimeError):
+    """Raised instead of starting more work for a question past its deadline."""
+
+
+class BatchInterrupted(DeadlineExceeded):
+    """Raised instead of starting more work once the batch was interrupted (cancel_all)."""
+
+
+def cancel_all():
+    """Stop every running question at its next check (see BatchInterrupted)."""
+    _cancelled.set()
+
+
+def resume_all():
+    _cancelled.clear()
+
+
+def set_budget(seconds: float):
+    """Per-question budget in seconds; 0 disables deadlines."""
+    global _budget_s
+    _budget_s = seconds
+
+
+def get_budget() -> float:
+    return _budget_s
+
+
+class Deadline:
+    def __init__(self, budget_s: float):
+        self.budget_s = budget_s
+        self.expires_at = time.monotonic() + budget_s
+        self.hit_at: str | None = None
+        self.partial_source: str | None = None
+        self._tool_results: list[tuple[str, str]] = []
+        self._lock = threading.Lock()
+
+    def remaining(self) -> float:
+        return self.expires_at - time.monotonic()
+
+    @property
+    def hit(self) -> bool:
+        return self.hit_at is not None
+
+    def check(self, what: str, needed_s: float = 0.0):
+        """Raise DeadlineExceeded if `what` (needing needed_s seconds) cannot start in time."""
+        if self.remaining() > needed_s:
+            return
+        with self._lock:
+            if self.hit_at is None:
+                self.hit_at = what
+        raise DeadlineExceeded(f"Question deadline of {self.budget_s:g}s reached before {what}")
+
+    def note_tool_result(self, name: str, result):
+        if isinstance(result, str):
+            with self._lock:
+                self._tool_results.append((name, result))
+
+    def partial_ids(self) -> str | None:
+        """IDs from the tool results so far (source tool in partial_source), None if there are none."""
+        from hackapizza_solution.answer_ids import extract_ids_from_response
+        from hackapizza_solution.tools.output_tools import _load_mapping
+
+        with self._lock:
+            results = list(self._tool_results)
+        for name, text in reversed(results):
+            if name == "map_dishes_to_ids":
+                ids_str, _ = extract_ids_from_response(text)
+                if ids_str != "0":
+                    self.partial_source = name
+                    return ids_str
+        mapping = _load_mapping()
+        by_lower = {dish.lower(): dish_id for dish, dish_id in mapping.items()}
+        for index in range(len(results) - 1, -1, -1):
+            name, text = results[index]
+            last_step = index == len(results) - 1
+            if name not in _DISH_SEARCH_TOOLS and not (name in _DISH_SCOPE_TOOLS and last_step):
+                continue
+            ids = {by_lower.get(dish.strip().lower()) for dish in _DISH_LINE_RE.findall(text)} - {None}
+            if ids:
+                self.partial_source = name
+                return ",".join(str(i) for i in sorted(ids))
+        return None
+
+
+@contextmanager
+def question_deadline():
+    """Deadline for the current question (None when deadlines are disabled)."""
+    if _budget_s <= 0:
+        yield None
+        return
+    deadline = Deadline(_budget_s)
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+def current() -> Deadline | None:
+    return _current.get()
+
+
+def check(what: str, needed_s: float = 0.0):
+    if _cancelled.is_set():
+        raise BatchInterrupted(f"Batch interrupted before {what}")
+    deadline = _current.get()
+    if deadline is not None:
+        deadline.check(what, needed_s)
+
+
+def remaining() -> float | None:
+    deadline = _current.get()
+    return None if deadline is None else deadline.remaining()
+
+
+def note_tool_result(name: str, result):
+    deadline = _current.get()
+    if deadline is not None:
+        deadline.note_tool_result(name, result)
+
+
+def record_step(duration_s: float):
+    """Feed the duration of one provider call into the step estimate."""
+    global _step_estimate_s
+    with _step_lock:
+        _step_estimate_s += _STEP_EWMA_ALPHA * (duration_s - _step_estimate_s)
+
+
+def step_budget(max_steps: int | None) -> int | None:
+    """Steps that fit in the time left (at least 1, at most max_steps); max_steps without a deadline."""
+    left = remaining()
+    if left is None:
+        return max_steps
+    fitting = max(1, int(left / max(_step_estimate_s, 0.1)))
+    return fitting if max_steps is None else min(max_steps, fitting)
+
+
+def bound_agent(agent):
+    """Check the deadline before every run (run or a_run) of this agent and cap its step
+    limit to the time left."""
+    run = agent.run
+    a_run = agent.a_run
+    name = getattr(agent, "name", type(agent).__name__)
+    # datapizza's runner reads the private _max_steps
+    steps_attr = "_max_steps" if hasattr(agent, "_max_steps") else "max_steps"
+    configured = getattr(agent, steps_attr, None)
+
+    def bounded_run(*args, **kwargs):
+        check(f"agent {name}")
+        if _current.get() is None:
+            return run(*args, **kwargs)
+        setattr(agent, steps_attr, step_budget(configured))
+        try:
+            return run(*args, **kwargs)
+        finally:
+            setattr(agent, steps_attr, configured)
+
+    async def bounded_a_run(*args, **kwargs):
+        check(f"agent {name}")
+        if _current.get() is None:
+            return await a_run(*args, **kwargs)
+        setattr(agent, steps_attr, step_budget(configured))
+        try:
+            return await a_run(*args, **kwargs)
+        finally:
+            setattr(agent, steps_attr, configured)
+
+    agent.run = bounded_run
+    agent.a_run = bounded_a_run
+    return agent
+
+
+def print_deadline_summary(results: list[dict]):
+    bounded = [r for r in results if "deadline_s" in r]
+    if not bounded:
+        return
+    hit = [r for r in bounded if r.get("deadline_hit")]
+    partial = [r for r in hit if r.get("deadline_partial")]
+    overruns = sorted(r["overrun_s"] for r in hit)
+    print(f"\n--- DEADLINES ({bounded[0]['deadline_s']:g}s per question) ---")
+    print(f"  {len(hit)}/{len(bounded)} questions hit the deadline: {len(partial)} answered with partial IDs, "
+          f"{len(hit) - len(partial)} with \"0\"")
+    if overruns:
+        print(f"  Overrun past the deadline: mean {sum(overruns) / len(overruns):.1f}s, "
+              f"max {overruns[-1]:.1f}s (in-flight calls are not interrupted)")
+        stages = {}
+        for r in hit:
+            stage = (r.get("deadline_hit_at") or "?").split(" (")[0]
+            stages[stage] = stages.get(stage, 0) + 1
+        print("  Reached before: " + ", ".join(f"{s} {n}" for s, n in sorted(stages.items(), key=lambda kv: -kv[1])))
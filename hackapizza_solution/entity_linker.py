@@ -0,0 +1,286 @@
+"""Entity linker: tags every known name mentioned in a question in one pass.
+
+The vocabulary (ingredients, techniques, dishes, restaurants, planets, licenses
+and professional orders) is built once from menus.json, dish_mapping.json and
+Distanze.csv and compiled into an Aho-Corasick automaton over normalized text
+(lowercase, no accents, unified apostrophes, collapsed whitespace). link()
+walks the question once, keeps matches that sit on word boundaries and resolves
+overlaps longest-first. Word spans not covered by an exact match (or extending
+one) are then compared with difflib against names of similar length, so
+misspellings are still linked (marked fuzzy=True).
+
+Mention offsets refer to the normalized question (see normalize()).
+"""
+
+import difflib
+import re
+import sys
+import threading
+import unicodedata
+from collections import deque
+from pathlib import Path
+from typing import NamedTuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from hackapizza_solution.config import DISH_MAPPING_JSON, DISTANZE_CSV, MENUS_JSON
+from hackapizza_solution.data_preparation.menu_preparser import LICENSE_CODES
+from hackapizza_solution.tools.distance_tools import _load_distances
+from hackapizza_solution.tools.memo import resets_on_change
+from hackapizza_solution.tools.menu_tools import _load_menus
+from hackapizza_solution.tools.output_tools import _load_mapping
+
+ENTITY_KINDS = ("ingredient", "technique", "dish", "restaurant", "planet", "license", "order")
+
+LICENSE_NAMES = {
+    "P": "Psionica", "t": "Temporale", "G": "Gravitazionale", "e+": "Antimateria",
+    "Mx": "Magnetica", "Q": "Quantistica", "c": "Luce", "LTK": "Livello di Sviluppo Tecnologico",
+}
+# "luce" is also the unit in "anni luce": only link it when introduced as a license
+_AMBIGUOUS_LICENSE_WORDS = {"luce", "light"}
+_LICENSE_PREFIXES = ("licenza ", "licenza di ", "licenza della ", "license ")
+
+ORDER_ALIASES = {
+    "Ordine di Andromeda": ("ordine di andromeda", "ordine della galassia di andromeda", "andromeda"),
+    "Ordine dei Naturalisti": ("ordine dei naturalisti", "naturalisti"),
+    "Ordine degli Armonisti": ("ordine degli armonisti", "armonisti"),
+}
+
+FUZZY_CUTOFF = 0.85
+FUZZY_MIN_LENGTH = 5
+FUZZY_MAX_WORDS = 4
+_STOPWORDS = {
+    "quali", "quale", "sono", "piatti", "piatto", "che", "con", "senza", "almeno", "della",
+    "delle", "degli", "dello", "nella", "nelle", "preparati", "preparato", "contengono",
+    "contiene", "utilizzano", "usano", "ristorante", "ristoranti", "pianeta", "pianeti",
+}
+_WORD_RE = re.compile(r"\w+")
+
+
+def normalize(text: str) -> str:
+    """Lowercase, strip accents, unify apostrophes and collapse whitespace."""
+    text = unicodedata.normalize("NFKD", text.replace("’", "'"))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return re.sub(r"\s+", " ", text.lower()).strip()
+
+
+class Mention(NamedTuple):
+    start: int
+    end: int
+    kind: str
+    name: str
+    surface: str
+    fuzzy: bool = False
+
+
+class AhoCorasick:
+    """Character-level Aho-Corasick automaton mapping keys to payload lists."""
+
+    def __init__(self):
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[int]] = [[]]
+        self.keys: list[str] = []
+        self.payloads: list[list[tuple[str, str]]] = []
+        self._key_ids: dict[str, int] = {}
+
+    def add(self, key: str, payload: tuple[str, str]):
+        if not key:
+            return
+        key_id = self._key_ids.get(key)
+        if key_id is not None:
+            if payload not in self.payloads[key_id]:
+                self.payloads[key_id].append(payload)
+            return
+        key_id = self._key_ids[key] = len(self.keys)
+        self.keys.append(key)
+        self.payloads.append([payload])
+        state = 0
+        for ch in key:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append(key_id)
+
+    def build(self):
+        """Compute failure links (BFS) and merge outputs along them."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def iter_matches(self, text: str):
+        """(start, end, key_id) for every key occurrence in text."""
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            for key_id in self._out[state]:
+                yield i + 1 - len(self.keys[key_id]), i + 1, key_id
+
+
+def _is_boundary(text: str, start: int, end: int) -> bool:
+    return (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum())
+
+
+def _resolve_overlaps(candidates: list[Mention]) -> list[Mention]:
+    """Keep the longest mentions; mentions sharing the exact chosen span are all kept."""
+    chosen: list[Mention] = []
+    for cand in sorted(candidates, key=lambda m: (-(m.end - m.start), m.start)):
+        same_span = any(c.start == cand.start and c.end == cand.end for c in chosen)
+        if same_span or all(cand.end <= c.start or cand.start >= c.end for c in chosen):
+            chosen.append(cand)
+    return sorted(chosen)
+
+
+class EntityLinker:
+    def __init__(self, names: dict[str, set[str]]):
+        """names: kind -> canonical names; extra aliases are added per kind below."""
+        self.automaton = AhoCorasick()
+        for kind, values in names.items():
+            for name in values:
+                self._add_alias(normalize(name), kind, name)
+        for code, name in LICENSE_NAMES.items():
+            self._add_alias(normalize(name), "license", name)
+        for alias, code in LICENSE_CODES.items():
+            if alias in _AMBIGUOUS_LICENSE_WORDS:
+                continue
+            self._add_alias(alias, "license", LICENSE_NAMES[code])
+        for word in _AMBIGUOUS_LICENSE_WORDS:
+            for prefix in _LICENSE_PREFIXES:
+                self._add_alias(prefix + word, "license", LICENSE_NAMES["c"])
+        for name, aliases in ORDER_ALIASES.items():
+            for alias in aliases:
+                self._add_alias(alias, "order", name)
+        self.automaton.build()
+
+        # Keys by length, for the fuzzy fallback
+        self._fuzzy_index: dict[int, list[int]] = {}
+        for key_id, key in enumerate(self.automaton.keys):
+            if len(key) >= FUZZY_MIN_LENGTH:
+                self._fuzzy_index.setdefault(len(key), []).append(key_id)
+
+    def _add_alias(self, alias: str, kind: str, name: str):
+        if alias in _AMBIGUOUS_LICENSE_WORDS and kind == "license":
+            return
+        self.automaton.add(alias, (kind, name))
+
+    def _exact(self, q: str) -> list[Mention]:
+        found = []
+        for start, end, key_id in self.automaton.iter_matches(q):
+            if not _is_boundary(q, start, end):
+                continue
+            for kind, name in self.automaton.payloads[key_id]:
+                found.append(Mention(start, end, kind, name, q[start:end]))
+        return found
+
+    def _fuzzy(self, q: str, taken: list[Mention]) -> list[Mention]:
+        words = list(_WORD_RE.finditer(q))
+        matcher = difflib.SequenceMatcher(autojunk=False)
+        found = []
+        for i in range(len(words)):
+            for j in range(i, min(i + FUZZY_MAX_WORDS, len(words))):
+                start, end = words[i].start(), words[j].end()
+                if any(not _is_contiguous(q, words[k], words[k + 1]) for k in range(i, j)):
+                    break
+                # A span may cover exact mentions only to extend them ("carne di dragho" over "carne")
+                if any(t.start < end and start < t.end and not (start <= t.start and t.end <= end)
+                       or (t.start, t.end) == (start, end) for t in taken):
+                    continue
+                span = q[start:end]
+                # A name never starts or ends with a stopword or a short connector ("con polvere di stele e")
+                if len(span) < FUZZY_MIN_LENGTH or not (_name_edge(words[i]) and _name_edge(words[j])):
+                    continue
+                matcher.set_seq2(span)
+                best, best_id = FUZZY_CUTOFF, None
+                for length in range(int(len(span) * 0.8), int(len(span) * 1.25) + 1):
+                    for key_id in self._fuzzy_index.get(length, ()):
+                        matcher.set_seq1(self.automaton.keys[key_id])
+                        if matcher.real_quick_ratio() < best or matcher.quick_ratio() < best:
+                            continue
+                        ratio = matcher.ratio()
+                        if ratio > best:
+                            best, best_id = ratio, key_id
+                if best_id is not None:
+                    for kind, name in self.automaton.payloads[best_id]:
+                        found.append(Mention(start, end, kind, name, span, fuzzy=True))
+        return found
+
+    def link(self, question: str, kinds: tuple[str, ...] | None = None,
+             fuzzy: bool = True) -> list[Mention]:
+        """All non-overlapping mentions in the question, in text order.
+        kinds restricts linking to the given entity kinds."""
+        q = normalize(question)
+        exact = [m for m in self._exact(q) if kinds is None or m.kind in kinds]
+        mentions = _resolve_overlaps(exact)
+        if fuzzy:
+            extra = [m for m in self._fuzzy(q, mentions) if kinds is None or m.kind in kinds]
+            mentions = _resolve_overlaps(mentions + extra) if extra else mentions
+        return mentions
+
+
+def _name_edge(word: re.Match) -> bool:
+    return len(word.group()) > 2 and word.group() not in _STOPWORDS
+
+
+def _is_contiguous(q: str, left: re.Match, right: re.Match) -> bool:
+    """Words separated only by spaces/apostrophes (no punctuation) can form one name."""
+    return q[left.end():right.start()] in (" ", "'", " '", "' ")
+
+
+def format_mentions(mentions: list[Mention]) -> str:
+    """One line per linked entity, for agent prompts and tool output."""
+    lines = []
+    for m in mentions:
+        note = f" (fuzzy match for '{m.surface}')" if m.fuzzy else ""
+        lines.append(f"  {m.kind}: {m.name}{note}")
+    return "\n".join(lines)
+
+
+_linker: EntityLinker | None = None
+_linker_lock = threading.Lock()
+
+
+def build_linker() -> EntityLinker:
+    names: dict[str, set[str]] = {kind: set() for kind in ("ingredient", "technique", "dish", "restaurant", "planet")}
+    for menu in _load_menus():
+        names["restaurant"].add(menu["restaurant"])
+        names["planet"].add(menu["planet"])
+        for dish in menu["dishes"]:
+            names["dish"].add(dish["name"])
+            names["ingredient"].update(dish["ingredients"])
+            names["technique"].update(dish["techniques"])
+    names["dish"].update(_load_mapping())
+    names["planet"].update(_load_distances())
+    return EntityLinker(names)
+
+
+def get_linker() -> EntityLinker:
+    """Process-wide linker, built on first use."""
+    global _linker
+    with _linker_lock:
+        if _linker is None:
+            _linker = build_linker()
+        return _linker
+
+
+@resets_on_change(MENUS_JSON, DISH_MAPPING_JSON, DISTANZE_CSV)
+def _reset_linker():
+    global _linker
+    with _linker_lock:
+        _linker = None
+
+
+def link_entities(question: str, kinds: tuple[str, ...] | None = None, fuzzy: bool = True) -> list[Mention]:
+    return get_linker().link(question, kinds=kinds, fuzzy=fuzzy)
@@ -0,0 +1,178 @@
+"""Deterministic fast path for simple questions, in front of the agent pipeline.
+
+When the rule-based classifier is confident that a question is a single simple
+category (A, B, C, D, E, F or I), the entities are extracted from the question
+text, the query is executed directly on menus.json / Distanze.csv and the dish
+IDs come straight from dish_mapping.json, without any LLM call. Whenever the
+question does not fit the expected shape (no entity, unexpected extra entities,
+an empty result, a dish missing from the mapping) try_fast_path returns None and
+the question falls through to the orchestrator.
+
+Dishes are matched the way the agents' tools match them (case-insensitive partial
+match, see menu_tools._has_ingredient / _has_technique), so both paths agree.
+A negation (category D) covers the ingredients and techniques named after it;
+when a positive requirement or another clause follows the negated ones ("senza X
+ma con Y", "che non usano X e usano Y"), its scope is ambiguous and the question
+goes to the agents.
+
+Opt-in with --fast-path (or FAST_PATH=1).
+"""
+
+import re
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from hackapizza_solution.config import FAST_PATH_ENABLED, FAST_PATH_MIN_CONFIDENCE
+from hackapizza_solution.entity_linker import Mention, link_entities, normalize
+from hackapizza_solution.tools.distance_tools import _load_distances
+from hackapizza_solution.tools.menu_tools import (
+    _expand_ingredient_search_variants, _has_ingredient, _has_technique, _load_menus,
+)
+from hackapizza_solution.tools.output_tools import _load_mapping
+
+FAST_PATH_CATEGORIES = {"A", "B", "C", "D", "E", "F", "I"}
+_FAST_PATH_KINDS = ("ingredient", "technique", "restaurant", "planet")
+
+_NEGATION_RE = re.compile(r"\b(?:senza|non|tranne|escludendo|evitando|ad eccezione)\b", re.IGNORECASE)
+# After the negated ingredients: a positive requirement or the start of another clause
+_AFTER_NEGATION_RE = re.compile(
+    r"[,;:]|\b(?:ma|pero|invece|con|che|usano|usa|utilizzano|utilizza|contengono|contiene|"
+    r"includono|include|hanno|ha|prevedono|richiedono|preparati|preparato)\b",
+    re.IGNORECASE,
+)
+_AT_LEAST_RE = re.compile(r"\balmeno\s+(\d+|un[oa]?|due|tre|quattro|cinque|sei)\b", re.IGNORECASE)
+_RADIUS_RE = re.compile(r"(\d+(?:[.,]\d+)?)\s*anni\s*luce", re.IGNORECASE)
+_NUMBER_WORDS = {"un": 1, "uno": 1, "una": 1, "due": 2, "tre": 3, "quattro": 4, "cinque": 5, "sei": 6}
+
+_enabled = FAST_PATH_ENABLED
+
+
+def set_enabled(enabled: bool):
+    global _enabled
+    _enabled = enabled
+
+
+def extract_entities(question: str) -> list[Mention]:
+    """Exact mentions of known ingredients, techniques, restaurants and planets."""
+    return link_entities(question, kinds=_FAST_PATH_KINDS, fuzzy=False)
+
+
+def _dish_has(dish: dict, kind: str, name: str) -> bool:
+    if kind == "technique":
+        return _has_technique(dish, name)
+    return _has_ingredient(dish, _expand_ingredient_search_variants(name))
+
+
+def _all_dishes(menus: list[dict]):
+    for menu in menus:
+        for dish in menu["dishes"]:
+            yield menu, dish
+
+
+def _features(mentions: list[Mention]) -> list[tuple[str, str]]:
+    return [(m.kind, m.name) for m in mentions if m.kind in ("ingredient", "technique")]
+
+
+def _query(question: str, code: str, menus: list[dict], mentions: list[Mention]) -> list[str] | None:
+    """Dish names answering the question, or None if the question does not fit category `code`."""
+    features = _features(mentions)
+    places = [(m.kind, m.name) for m in mentions if m.kind in ("restaurant", "planet")]
+
+    if code in ("A", "B"):
+        kind = "ingredient" if code == "A" else "technique"
+        if len(features) != 1 or features[0][0] != kind or places:
+            return None
+        return [d["name"] for _, d in _all_dishes(menus) if _dish_has(d, *features[0])]
+
+    if code == "C":
+        if len(features) < 2 or places:
+            return None
+        return [d["name"] for _, d in _all_dishes(menus) if all(_dish_has(d, *f) for f in features)]
+
+    if code == "D":
+        text = normalize(question)
+        cue = _NEGATION_RE.search(text)
+        if cue is None or places:
+            return None
+        positive = _features([m for m in mentions if m.end <= cue.start()])
+        negated = [m for m in mentions if m.start >= cue.end() and m.kind in ("ingredient", "technique")]
+        if not negated or _AFTER_NEGATION_RE.search(text, negated[0].end):
+            return None
+        negative = _features(negated)
+        return [
+            d["name"] for _, d in _all_dishes(menus)
+            if all(_dish_has(d, *f) for f in positive) and not any(_dish_has(d, *f) for f in negative)
+        ]
+
+    if code == "E":
+        m = _AT_LEAST_RE.search(question)
+        if m is None or places or len(features) < 2:
+            return None
+        raw = m.group(1).lower()
+        n = int(raw) if raw.isdigit() else _NUMBER_WORDS[raw]
+        return [
+            d["name"] for _, d in _all_dishes(menus)
+            if sum(_dish_has(d, *f) for f in features) >= n
+        ]
+
+    if code == "F":
+        if not places:
+            return None
+        restaurants = {name for kind, name in places if kind == "restaurant"}
+        planets = {name for kind, name in places if kind == "planet"}
+        return [
+            d["name"] for menu, d in _all_dishes(menus)
+            if (menu["restaurant"] in restaurants or menu["planet"] in planets)
+            and all(_dish_has(d, *f) for f in features)
+        ]
+
+    if code == "I":
+        radius = _RADIUS_RE.search(question)
+        planets = [name for kind, name in places if kind == "planet"]
+        if radius is None or len(planets) != 1 or any(k == "restaurant" for k, _ in places):
+            return None
+        distances = _load_distances().get(planets[0])
+        if distances is None:
+            return None
+        limit = float(radius.group(1).replace(",", "."))
+        nearby = {p for p, dist in distances.items() if dist <= limit}
+        return [
+            d["name"] for menu, d in _all_dishes(menus)
+            if menu["planet"] in nearby and all(_dish_has(d, *f) for f in features)
+        ]
+
+    return None
+
+
+def try_fast_path(question: str) -> tuple[str, str] | None:
+    """Answer a simple question deterministically. Returns (ids_str, explanation),
+    or None to fall through to the agents."""
+    if not _enabled:
+        return None
+    from question_classifier import classify
+
+    result = classify(question, use_embeddings=False)
+    if result.is_composite or not result.categories:
+        return None
+    code = max(result.categories, key=result.categories.get)
+    confidence = result.categories[code]
+    if code not in FAST_PATH_CATEGORIES or confidence < FAST_PATH_MIN_CONFIDENCE:
+        return None
+
+    menus = _load_menus()
+    mentions = extract_entities(question)
+    dish_names = _query(question, code, menus, mentions)
+    if not dish_names:
+        return None
+
+    mapping = _load_mapping()
+    by_lower = {name.lower(): dish_id for name, dish_id in mapping.items()}
+    ids = set()
+    for name in dish_names:
+        dish_id = mapping.get(name, by_lower.get(name.lower()))
+        if dish_id is None:
+            return None
+        ids.add(dish_id)
+    entities = ", ".join(f"{m.kind}={m.name}" for m in mentions)
+    return ",".join(str(i) for i in sorted(ids)), f"fast path cat. {code} ({confidence:.0%}): {entities}"
@@ -0,0 +1,139 @@
+"""Append-only batch journal: one JSON line per answered question.
+
+Every result is flushed and fsynced as soon as the question finishes, so a crash
+or Ctrl-C loses at most the questions that were in flight (a record cut short by
+the crash is removed before the next run appends to the journal). submission.csv and
+results_detailed.json are always materialized from the journal (last record per
+row_id wins) with write-then-rename, so they are never half-written.
+"""
+
+import csv
+import io
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from hackapizza_solution.config import (
+    BATCH_JOURNAL_JSONL, RESULTS_DETAILED_JSON, SUBMISSION_CSV,
+)
+
+NOT_ANSWERED_CAUSE = "Not answered yet (interrupted run) - use --resume to finish"
+
+
+class BatchJournal:
+    def __init__(self, path: Path = BATCH_JOURNAL_JSONL):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+
+    def load(self) -> dict[int, dict]:
+        """Last record per row_id. A truncated trailing line (crash mid-write) is ignored."""
+        records: dict[int, dict] = {}
+        if not self.path.exists():
+            return records
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                records[int(record["row_id"])] = record
+        return records
+
+    def start_fresh(self):
+        """Archive the previous journal (if any) and start an empty one."""
+        if self.path.exists():
+            archived = self.path.with_name(f"{self.path.stem}.{int(time.time())}{self.path.suffix}")
+            self.path.replace(archived)
+            print(f"Previous journal archived to {archived.name}")
+
+    def _drop_partial_line(self):
+        """Cut a truncated trailing line (crash mid-write), so that the next record does not
+        get appended to it and lost along with it."""
+        if not self.path.exists():
+            return
+        data = self.path.read_bytes()
+        if not data or data.endswith(b"\n"):
+            return
+        with open(self.path, "r+b") as f:
+            f.truncate(data.rfind(b"\n") + 1)
+            os.fsync(f.fileno())
+
+    def append(self, record: dict):
+        with self._lock:
+            if self._file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._drop_partial_line()
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(json.dumps({**record, "journaled_at": time.time()}, ensure_ascii=False) + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def _write_atomic(path: Path, content: str):
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(content, encoding="utf-8", newline="")
+    tmp.replace(path)
+
+
+def materialize(questions: list[tuple[int, str]], records: dict[int, dict]) -> list[dict]:
+    """Write submission.csv and results_detailed.json from journal records.
+    Rows without a record are written as "0" so the submission is always complete.
+    Returns the detailed results in row order."""
+    detailed = []
+    for row_id, question in questions:
+        record = records.get(row_id)
+        if record is None or record.get("question") != question:
+            record = {"row_id": row_id, "question": question, "ids": "0",
+                      "raw_response": "", "zero_cause": NOT_ANSWERED_CAUSE}
+        detailed.append({k: v for k, v in record.items() if k != "journaled_at"})
+
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=["row_id", "result"], lineterminator="\n")
+    writer.writeheader()
+    writer.writerows({"row_id": r["row_id"], "result": r["ids"]} for r in detailed)
+    SUBMISSION_CSV.parent.mkdir(parents=True, exist_ok=True)
+    _write_atomic(SUBMISSION_CSV, buf.getvalue())
+    _write_atomic(RESULTS_DETAILED_JSON, json.dumps(detailed, indent=2, ensure_ascii=False))
+    return detailed
+
+
+def select_rows(
+    questions: list[tuple[int, str]],
+    records: dict[int, dict],
+    resume: bool = False,
+    only: str | None = None,
+    rows: set[int] | None = None,
+) -> list[tuple[int, str]]:
+    """Pick the questions to (re-)run.
+    - rows: exactly these row_ids
+    - only="zero-results": rows whose journaled answer is "0" (or that have no answer)
+    - resume: rows not yet journaled for the current question text
+    Filters combine (all must match)."""
+    def answered(row_id: int, question: str) -> bool:
+        record = records.get(row_id)
+        return record is not None and record.get("question") == question
+
+    selected = []
+    for row_id, question in questions:
+        if rows is not None and row_id not in rows:
+            continue
+        if only == "zero-results" and answered(row_id, question) and records[row_id].get("ids") != "0":
+            continue
+        if resume and answered(row_id, question):
+            continue
+        selected.append((row_id, question))
+    return selected
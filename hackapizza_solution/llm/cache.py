@@ -0,0 +1,239 @@
+"""On-disk cache of LLM responses, keyed by everything that determines the answer.
+
+The key is a hash of (model, call kind, input, memory, system prompt, tools schema
+and generation arguments), so an agent turn whose prompt and inputs did not change
+is served from SQLite instead of the provider. Modes:
+
+- off:          no caching
+- record:       always call the provider, store every response
+- replay:       only serve from the cache; a miss raises LLMCacheMissError (offline runs)
+- read-through: serve hits, call and store on a miss
+
+Responses are pickled; tool objects inside function-call blocks are stored by
+name and re-bound to the tools of the current call on load (agent-as-tool
+closures are not picklable and must be the live objects anyway).
+"""
+
+import hashlib
+import io
+import json
+import pickle
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+from datapizza.tools import Tool
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+from hackapizza_solution.config import (
+    LLM_CACHE_DB, LLM_CACHE_MAX_AGE_DAYS, LLM_CACHE_MAX_ENTRIES, LLM_CACHE_MODE,
+)
+
+CACHE_MODES = ("off", "record", "replay", "read-through")
+
+# Run eviction every N writes
+_EVICT_EVERY = 200
+
+
+class LLMCacheMissError(RuntimeError):
+    """Raised in replay mode when a call is not in the cache."""
+
+
+def _tool_fingerprint(tool) -> dict:
+    return {
+        "name": getattr(tool, "name", repr(tool)),
+        "description": getattr(tool, "description", None),
+        "properties": _canonical(getattr(tool, "properties", None)),
+        "required": _canonical(getattr(tool, "required", None)),
+    }
+
+
+def _canonical(obj, depth: int = 0):
+    """JSON-able, order-stable view of call arguments (memory turns, blocks, tools...)."""
+    if depth > 12:
+        return repr(obj)
+    if obj is None or isinstance(obj, (str, int, float, bool)):
+        return obj
+    if isinstance(obj, Tool):
+        return _tool_fingerprint(obj)
+    if isinstance(obj, dict):
+        return {str(k): _canonical(v, depth + 1) for k, v in sorted(obj.items(), key=lambda kv: str(kv[0]))}
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        items = [_canonical(v, depth + 1) for v in obj]
+        return sorted(items, key=repr) if isinstance(obj, (set, frozenset)) else items
+    if hasattr(obj, "to_dict"):
+        try:
+            return _canonical(obj.to_dict(), depth + 1)
+        except Exception:
+            pass
+    if hasattr(obj, "__iter__") and not hasattr(obj, "__dict__"):
+        return [_canonical(v, depth + 1) for v in obj]
+    if hasattr(obj, "__dict__"):
+        fields = {k: v for k, v in vars(obj).items() if not k.startswith("_") and not callable(v)}
+        return {"__type__": type(obj).__name__, **_canonical(fields, depth + 1)}
+    if hasattr(obj, "__iter__"):
+        return [_canonical(v, depth + 1) for v in obj]
+    return repr(obj)
+
+
+def cache_key(model: str, kind: str, args: tuple, kwargs: dict) -> str:
+    payload = {"model": model, "kind": kind, "args": _canonical(args), "kwargs": _canonical(kwargs)}
+    blob = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=repr)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class _ToolPickler(pickle.Pickler):
+    def persistent_id(self, obj):
+        if isinstance(obj, Tool):
+            return ("tool", getattr(obj, "name", None))
+        return None
+
+
+class _ToolUnpickler(pickle.Unpickler):
+    def __init__(self, file, tools_by_name: dict):
+        super().__init__(file)
+        self.tools_by_name = tools_by_name
+
+    def persistent_load(self, pid):
+        kind, name = pid
+        if kind == "tool" and name in self.tools_by_name:
+            return self.tools_by_name[name]
+        raise pickle.UnpicklingError(f"Cached response references unknown tool {name!r}")
+
+
+def _tools_by_name(args: tuple, kwargs: dict) -> dict:
+    tools = kwargs.get("tools") or next((a for a in args if isinstance(a, list) and a and isinstance(a[0], Tool)), [])
+    return {getattr(t, "name", None): t for t in tools or []}
+
+
+class LLMResponseCache:
+    def __init__(self, path: Path = LLM_CACHE_DB, mode: str = LLM_CACHE_MODE,
+                 max_entries: int = LLM_CACHE_MAX_ENTRIES, max_age_days: float = LLM_CACHE_MAX_AGE_DAYS):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown LLM cache mode {mode!r}, expected one of {CACHE_MODES}")
+        self.path = path
+        self.mode = mode
+        self.max_entries = max_entries
+        self.max_age_s = max_age_days * 86400
+        self.stats = {"hits": 0, "misses": 0, "writes": 0, "errors": 0}
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._writes_since_evict = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, model TEXT, created REAL, last_access REAL,"
+                " hits INTEGER DEFAULT 0, payload BLOB)"
+            )
+            self._evict()
+        return self._conn
+
+    def _evict(self):
+        conn = self._conn
+        conn.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.max_age_s,))
+        (count,) = conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+        if count > self.max_entries:
+            conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                " SELECT key FROM responses ORDER BY last_access ASC LIMIT ?)",
+                (count - self.max_entries,),
+            )
+        conn.commit()
+
+    def get(self, key: str, args: tuple, kwargs: dict):
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT payload FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            try:
+                response = _ToolUnpickler(io.BytesIO(row[0]), _tools_by_name(args, kwargs)).load()
+            except Exception:
+                self.stats["errors"] += 1
+                self.stats["misses"] += 1
+                return None
+            self._conn.execute(
+                "UPDATE responses SET last_access = ?, hits = hits + 1 WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+            self.stats["hits"] += 1
+            return response
+
+    def put(self, key: str, model: str, response):
+        buf = io.BytesIO()
+        try:
+            _ToolPickler(buf, protocol=pickle.HIGHEST_PROTOCOL).dump(response)
+        except Exception:
+            self.stats["errors"] += 1
+            return
+        now = time.time()
+        with self._lock:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO responses (key, model, created, last_access, hits, payload)"
+                " VALUES (?, ?, ?, ?, 0, ?)",
+                (key, model, now, now, buf.getvalue()),
+            )
+            self._conn.commit()
+            self.stats["writes"] += 1
+            self._writes_since_evict += 1
+            if self._writes_since_evict >= _EVICT_EVERY:
+                self._writes_since_evict = 0
+                self._evict()
+
+    def call(self, model: str, kind: str, fn, args: tuple, kwargs: dict):
+        """Serve fn(*args, **kwargs) according to the cache mode."""
+        if not self.enabled:
+            return fn(*args, **kwargs)
+        key = cache_key(model, kind, args, kwargs)
+        if self.mode in ("replay", "read-through"):
+            cached = self.get(key, args, kwargs)
+            if cached is not None:
+                return cached
+            if self.mode == "replay":
+                raise LLMCacheMissError(f"No cached {model} response for key {key[:12]} (replay mode)")
+        response = fn(*args, **kwargs)
+        self.put(key, model, response)
+        return response
+
+
+_cache: LLMResponseCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMResponseCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMResponseCache()
+        return _cache
+
+
+def set_cache_mode(mode: str):
+    """Switch the process-wide cache mode (e.g. from the --llm-cache CLI flag)."""
+    global _cache
+    with _cache_lock:
+        _cache = LLMResponseCache(mode=mode)
+
+
+def print_cache_summary():
+    cache = get_llm_cache()
+    if not cache.enabled:
+        return
+    s = cache.stats
+    total = s["hits"] + s["misses"]
+    rate = s["hits"] / total if total else 0.0
+    print(f"\n--- LLM CACHE ({cache.mode}) ---")
+    print(f"  {s['hits']} hits / {total} lookups ({rate:.0%}), {s['writes']} writes, {s['errors']} errors")
@@ -0,0 +1,128 @@
+"""LLM client factory used by every agent.
+
+create_client() returns an OpenAIClient whose calls go through the process-wide
+LLMScheduler (rate limits, adaptive concurrency, retries, circuit breaker), so all
+agents and all batch workers share one view of the provider limits, and whose
+requests share one pooled HTTP transport (see transport.py). Calls are served from
+the on-disk response cache first when it is enabled (see cache.py); provider calls
+are hedged against slow outliers when hedging is on (see hedging.py).
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+from datapizza.clients.openai import OpenAIClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+from hackapizza_solution.config import OPENAI_API_KEY
+from hackapizza_solution import deadline
+from hackapizza_solution.llm import hedging
+from hackapizza_solution.llm.cache import get_llm_cache
+from hackapizza_solution.llm.scheduler import get_scheduler
+from hackapizza_solution.llm.transport import get_http_client, request_timeout
+from hackapizza_solution.tracing import span
+
+# Rough prompt size used for the token bucket until the real usage is known
+_CHARS_PER_TOKEN = 4
+_BASE_TOKENS = 800
+
+
+def response_tokens(response) -> tuple[int, int]:
+    """(prompt_tokens, completion_tokens) reported on a client or agent response, 0 if unavailable."""
+    if response is None:
+        return 0, 0
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        return (
+            int(getattr(usage, "prompt_tokens", 0) or 0),
+            int(getattr(usage, "completion_tokens", 0) or 0),
+        )
+    return (
+        int(getattr(response, "prompt_tokens_used", 0) or 0),
+        int(getattr(response, "completion_tokens_used", 0) or 0),
+    )
+
+
+def estimate_tokens(*args, **kwargs) -> int:
+    """Cheap upper-bound guess of the prompt size of an invoke() call."""
+    chars = sum(len(str(a)) for a in args)
+    chars += sum(len(str(v)) for k, v in kwargs.items() if k in ("input", "memory", "system_prompt"))
+    return _BASE_TOKENS + chars // _CHARS_PER_TOKEN
+
+
+class ScheduledOpenAIClient(OpenAIClient):
+    """OpenAIClient whose calls are served by the response cache or admitted and
+    retried by the shared LLM scheduler."""
+
+    def __init__(self, *args, model: str, **kwargs):
+        super().__init__(*args, model=model, **kwargs)
+        self.scheduled_model = model
+
+    def _scheduled(self, fn, *args, **kwargs):
+        hedger = hedging.get_hedger() if hedging.is_enabled() else None
+
+        def attempt():
+            return get_scheduler().call(
+                self.scheduled_model,
+                lambda: fn(*args, **kwargs),
+                estimated_tokens=estimate_tokens(*args, **kwargs),
+                actual_tokens=lambda r: sum(response_tokens(r)),
+                on_latency=None if hedger is None else lambda s: hedger.record_latency(self.scheduled_model, s),
+            )
+
+        if hedger is None:
+            return attempt()
+        return hedger.call(self.scheduled_model, attempt, tokens=lambda r: sum(response_tokens(r)))
+
+    def _cached(self, kind: str, fn, *args, **kwargs):
+        with span("llm", self.scheduled_model, call=kind) as attrs:
+            attrs["provider_call"] = False
+
+            def scheduled(*a, **k):
+                attrs["provider_call"] = True
+                start = time.monotonic()
+                result = self._scheduled(fn, *a, **k)
+                deadline.record_step(time.monotonic() - start)
+                return result
+
+            response = get_llm_cache().call(self.scheduled_model, kind, scheduled, args, kwargs)
+            attrs["prompt_tokens"], attrs["completion_tokens"] = response_tokens(response)
+            return response
+
+    def invoke(self, *args, **kwargs):
+        return self._cached("invoke", super().invoke, *args, **kwargs)
+
+    def structured_response(self, *args, **kwargs):
+        return self._cached("structured_response", super().structured_response, *args, **kwargs)
+
+    async def a_invoke(self, *args, **kwargs):
+        # The scheduler is thread-based; keep async callers under the same limits
+        return await asyncio.to_thread(self.invoke, *args, **kwargs)
+
+
+_client_factory = None
+
+
+def set_client_factory(factory):
+    """Build every agent's client with factory(model) instead (e.g. the offline
+    benchmark's scripted client); None restores the default."""
+    global _client_factory
+    _client_factory = factory
+
+
+def create_client(model: str) -> OpenAIClient:
+    """Client for one agent, sharing the process-wide scheduler and connection pool.
+
+    The SDK's own retries are off: the scheduler is the only retry layer, so every
+    429 and 5xx reaches its limiter and circuit breaker."""
+    if _client_factory is not None:
+        return _client_factory(model)
+    return ScheduledOpenAIClient(
+        api_key=OPENAI_API_KEY,
+        model=model,
+        http_client=get_http_client(),
+        timeout=request_timeout(),
+        max_retries=0,
+    )
@@ -0,0 +1,225 @@
+"""Hedged LLM requests: cut the latency tail caused by calls that hang.
+
+With hedging on (--hedge), every provider call of ScheduledOpenAIClient runs on a
+thread pool. If it has not returned after the model's recent HEDGE_PERCENTILE latency
+(over the last HEDGE_WINDOW calls, measured by the scheduler around the provider call
+only, so time queued on rate limits does not raise it), an identical duplicate is
+issued and the first successful attempt wins. Each attempt goes through the scheduler on its own, so
+both count against the rate limits and get their own retries.
+
+The extra spend is capped by a budget: every call earns HEDGE_BUDGET_RATIO of a hedge
+credit (up to HEDGE_BUDGET_BURST) and every hedge costs one, so at most ~10% more
+requests are sent by default. No hedge is sent before HEDGE_MIN_SAMPLES latencies are
+known for the model. A losing attempt cannot be cancelled mid-request; it finishes in
+the background and its result (and tokens, counted as extra spend) is discarded.
+
+Cache hits never reach this layer (see client.py). Within a question deadline the
+caller stops waiting at the deadline (see deadline.py); the attempts run on.
+"""
+
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FutureTimeout, wait
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+from hackapizza_solution import deadline
+from hackapizza_solution.config import (
+    HEDGE_BUDGET_BURST, HEDGE_BUDGET_RATIO, HEDGE_ENABLED, HEDGE_MAX_WORKERS, HEDGE_MIN_DELAY_S,
+    HEDGE_MIN_SAMPLES, HEDGE_PERCENTILE, HEDGE_WINDOW,
+)
+from hackapizza_solution.tracing import run_in_context, span
+
+_enabled = HEDGE_ENABLED
+
+
+def set_enabled(enabled: bool):
+    global _enabled
+    _enabled = enabled
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+class LatencyTracker:
+    """Latencies of the last `window` completed attempts of one model."""
+
+    def __init__(self, window: int = HEDGE_WINDOW):
+        self._samples: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency_s: float):
+        with self._lock:
+            self._samples.append(latency_s)
+
+    def percentile(self, pct: float, min_samples: int = HEDGE_MIN_SAMPLES) -> float | None:
+        with self._lock:
+            if len(self._samples) < min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class HedgeBudget:
+    """Hedge credits: `ratio` earned per call, at most `burst` banked, one spent per hedge."""
+
+    def __init__(self, ratio: float = HEDGE_BUDGET_RATIO, burst: float = HEDGE_BUDGET_BURST):
+        self.ratio = ratio
+        self.burst = burst
+        self.credits = burst
+        self._lock = threading.Lock()
+
+    def earn(self):
+        with self._lock:
+            self.credits = min(self.burst, self.credits + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self.credits < 1:
+                return False
+            self.credits -= 1
+            return True
+
+
+class ModelHedger:
+    def __init__(self):
+        self.latency = LatencyTracker()
+        self.budget = HedgeBudget()
+        self.stats = {
+            "calls": 0, "hedged": 0, "hedge_wins": 0, "primary_wins": 0, "budget_denied": 0,
+            "extra_tokens": 0, "saved_s": 0.0,
+        }
+        self._stats_lock = threading.Lock()
+
+    def _count(self, key: str, amount: float = 1):
+        with self._stats_lock:
+            self.stats[key] += amount
+
+
+class Hedger:
+    def __init__(self, percentile: float = HEDGE_PERCENTILE, min_delay_s: float = HEDGE_MIN_DELAY_S,
+                 max_workers: int = HEDGE_MAX_WORKERS):
+        self.percentile = percentile
+        self.min_delay_s = min_delay_s
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-hedge")
+        self._models: dict[str, ModelHedger] = {}
+        self._lock = threading.Lock()
+
+    def for_model(self, model: str) -> ModelHedger:
+        with self._lock:
+            if model not in self._models:
+                self._models[model] = ModelHedger()
+            return self._models[model]
+
+    def hedge_delay(self, model: str) -> float | None:
+        """Seconds after which a duplicate is sent; None while too few latencies are known."""
+        threshold = self.for_model(model).latency.percentile(self.percentile)
+        return None if threshold is None else max(self.min_delay_s, threshold)
+
+    def record_latency(self, model: str, latency_s: float):
+        """Provider latency of one successful attempt (fed by the scheduler)."""
+        self.for_model(model).latency.record(latency_s)
+
+    def _submit(self, fn):
+        return self._pool.submit(run_in_context(fn))
+
+    @staticmethod
+    def _result(future, model: str):
+        try:
+            return future.result(timeout=deadline.remaining())
+        except FutureTimeout:
+            deadline.check(f"LLM response ({model})")
+            raise
+
+    def call(self, model: str, fn, tokens=None):
+        """fn() with a duplicate issued once it is slower than the model's hedge delay.
+        tokens(result) -> int, if given, counts the discarded attempt's usage as extra spend."""
+        mh = self.for_model(model)
+        mh._count("calls")
+        mh.budget.earn()
+        delay = self.hedge_delay(model)
+        primary = self._submit(fn)
+        left = deadline.remaining()
+        # No duplicate can help when the deadline comes before the hedge delay
+        if delay is None or (left is not None and left <= delay) or wait([primary], timeout=delay).done:
+            return self._result(primary, model)
+        if not mh.budget.try_spend():
+            mh._count("budget_denied")
+            return self._result(primary, model)
+
+        mh._count("hedged")
+        with span("llm_hedge", model, delay_s=round(delay, 3)) as attrs:
+            hedge = self._submit(fn)
+            pending = {primary, hedge}
+            winner = None
+            while pending and winner is None:
+                done, pending = wait(pending, timeout=deadline.remaining(), return_when=FIRST_COMPLETED)
+                if not done:
+                    attrs["winner"] = None
+                    deadline.check(f"LLM response ({model})")
+                winner = next((f for f in (primary, hedge) if f in done and f.exception() is None), None)
+            if winner is None:
+                # Both attempts failed: surface the primary's error, as without hedging
+                attrs["winner"] = None
+                return primary.result()
+            loser = hedge if winner is primary else primary
+            attrs["winner"] = "hedge" if winner is hedge else "primary"
+            mh._count("hedge_wins" if winner is hedge else "primary_wins")
+            if winner is hedge:
+                # Saved time is how much later the primary returned, known only once it does
+                won_at = time.monotonic()
+                loser.add_done_callback(lambda f: mh._count(
+                    "saved_s", time.monotonic() - won_at if f.exception() is None else 0.0))
+            if tokens is not None:
+                loser.add_done_callback(lambda f: mh._count(
+                    "extra_tokens", tokens(f.result()) if f.exception() is None else 0))
+            return winner.result()
+
+    def summary(self) -> dict[str, dict]:
+        return {
+            model: {
+                **mh.stats,
+                "saved_s": round(mh.stats["saved_s"], 1),
+                "hedge_delay_s": self.hedge_delay(model),
+                "credits": round(mh.budget.credits, 2),
+            }
+            for model, mh in self._models.items()
+        }
+
+
+_hedger: Hedger | None = None
+_hedger_lock = threading.Lock()
+
+
+def get_hedger() -> Hedger:
+    global _hedger
+    with _hedger_lock:
+        if _hedger is None:
+            _hedger = Hedger()
+        return _hedger
+
+
+def print_hedging_summary():
+    if _hedger is None:
+        return
+    summary = _hedger.summary()
+    if not summary:
+        return
+    print("\n--- LLM HEDGING ---")
+    for model, stats in summary.items():
+        delay = stats["hedge_delay_s"]
+        wins = stats["hedge_wins"] / stats["hedged"] if stats["hedged"] else 0.0
+        extra = stats["hedged"] / stats["calls"] if stats["calls"] else 0.0
+        print(
+            f"  {model}: {stats['calls']} calls, {stats['hedged']} hedged ({extra:.1%} extra requests), "
+            f"hedge won {stats['hedge_wins']} ({wins:.0%}), primary won {stats['primary_wins']}, "
+            f"{stats['budget_denied']} denied by budget"
+        )
+        print(
+            f"    hedge delay {'-' if delay is None else f'{delay:.2f}s'} (p{HEDGE_PERCENTILE:.0f}), "
+            f"{stats['extra_tokens']} tokens spent on discarded attempts, "
+            f"{stats['saved_s']}s saved on slow primaries that finished"
+        )
@@ -0,0 +1,324 @@
+"""Process-wide scheduler for LLM calls, shared by every agent client.
+
+Per model it keeps:
+- two token buckets (requests/min and tokens/min, from config.LLM_LIMITS)
+- an AIMD concurrency limit: +1 slot per window of successful calls, halved on
+  a 429, shrunk gently when latency exceeds the model's target
+- a circuit breaker that fails fast after consecutive transient failures
+Failed calls are retried with exponential backoff and full jitter (honouring
+Retry-After when the provider sends it). No attempt, wait or backoff is started
+that would end past the question's deadline (see deadline.py).
+"""
+
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+from hackapizza_solution import deadline
+from hackapizza_solution.config import LLM_LIMITS, LLM_MAX_ATTEMPTS
+from hackapizza_solution.tracing import span
+
+DEFAULT_LIMITS = {"rpm": 500, "tpm": 200_000, "max_concurrency": 8, "latency_target_s": 60.0}
+
+BACKOFF_BASE_S = 1.0
+BACKOFF_CAP_S = 60.0
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without calling the provider while a model's circuit breaker is open."""
+
+
+def error_status(exc: Exception) -> int | None:
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def classify_error(exc: Exception) -> str:
+    """Classify an exception as "rate_limit", "transient" (worth retrying) or "fatal"."""
+    status = error_status(exc)
+    name = type(exc).__name__
+    if status == 429 or name == "RateLimitError":
+        # An exhausted quota is also a 429 but will not recover by waiting
+        return "fatal" if "insufficient_quota" in str(exc) else "rate_limit"
+    if status in (408, 409, 500, 502, 503, 504) or (status is not None and status > 500):
+        return "transient"
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return "transient"
+    if any(key in name for key in ("Timeout", "Connect", "InternalServer", "ServiceUnavailable")):
+        return "transient"
+    return "fatal"
+
+
+def retry_after_s(exc: Exception) -> float | None:
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        value = headers.get("retry-after")
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, exc: Exception | None = None) -> float:
+    """Exponential backoff with full jitter; Retry-After wins when present."""
+    hinted = retry_after_s(exc) if exc is not None else None
+    if hinted is not None:
+        return min(hinted, BACKOFF_CAP_S)
+    return random.uniform(0, min(BACKOFF_CAP_S, BACKOFF_BASE_S * 2 ** attempt))
+
+
+class TokenBucket:
+    """Refills rate_per_minute units per minute up to one minute of capacity.
+    Reservations may go into debt; the caller sleeps for the returned wait."""
+
+    def __init__(self, rate_per_minute: float):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(rate_per_minute)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        """Take amount units and return how long to wait before using them."""
+        with self._lock:
+            self._refill()
+            self.level -= amount
+            return 0.0 if self.level >= 0 else -self.level / self.rate
+
+    def adjust(self, delta: float):
+        """Give back (delta > 0) or take (delta < 0) units after the real cost is known."""
+        with self._lock:
+            self._refill()
+            self.level = min(self.capacity, self.level + delta)
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit: additive increase per window of successes,
+    multiplicative decrease on throttling or high latency."""
+
+    def __init__(self, max_limit: int, latency_target_s: float, initial: int | None = None):
+        self.max_limit = max_limit
+        self.latency_target_s = latency_target_s
+        self.limit = float(initial or max(1, max_limit // 4))
+        self.in_flight = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self, latency_s: float, throttled: bool = False, failed: bool = False):
+        with self._cond:
+            self.in_flight -= 1
+            if failed:
+                pass
+            elif throttled:
+                self.limit = max(1.0, self.limit / 2)
+            elif latency_s > self.latency_target_s:
+                self.limit = max(1.0, self.limit * 0.9)
+            else:
+                # +1 slot once per "window" of `limit` successful calls
+                self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive transient failures; after `cooldown_s`
+    one probe call is let through (half-open) and closes it again on success."""
+
+    def __init__(self, threshold: int = 8, cooldown_s: float = 30.0):
+        self.threshold = threshold
+        self.cooldown_s = cooldown_s
+        self.failures = 0
+        self.opened_at: float | None = None
+        self.probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if self.probing else "open"
+
+    def check(self, model: str) -> bool:
+        """Raise CircuitOpenError while open; True when this call is the half-open probe."""
+        with self._lock:
+            if self.opened_at is None:
+                return False
+            if time.monotonic() - self.opened_at < self.cooldown_s or self.probing:
+                raise CircuitOpenError(f"Circuit open for {model}: too many consecutive failures")
+            self.probing = True
+            return True
+
+    def release_probe(self):
+        """Give up the probe without an outcome (it never reached the provider), so that the
+        next call can probe instead of the circuit staying open."""
+        with self._lock:
+            self.probing = False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.probing or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+                self.probing = False
+
+
+class ModelScheduler:
+    def __init__(self, model: str, limits: dict):
+        self.model = model
+        self.requests = TokenBucket(limits["rpm"])
+        self.tokens = TokenBucket(limits["tpm"])
+        self.limiter = AdaptiveLimiter(limits["max_concurrency"], limits["latency_target_s"])
+        self.breaker = CircuitBreaker()
+        self.stats = {"calls": 0, "retries": 0, "throttled": 0, "failed": 0, "wait_s": 0.0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, key: str, amount: float = 1):
+        with self._stats_lock:
+            self.stats[key] += amount
+
+
+class LLMScheduler:
+    def __init__(self, limits: dict[str, dict] | None = None, max_attempts: int = LLM_MAX_ATTEMPTS):
+        self.limits = limits or {}
+        self.max_attempts = max_attempts
+        self._models: dict[str, ModelScheduler] = {}
+        self._lock = threading.Lock()
+
+    def for_model(self, model: str) -> ModelScheduler:
+        with self._lock:
+            if model not in self._models:
+                self._models[model] = ModelScheduler(
+                    model, {**DEFAULT_LIMITS, **self.limits.get(model, {})}
+                )
+            return self._models[model]
+
+    def call(self, model: str, fn, estimated_tokens: int = 0, actual_tokens=None, on_latency=None):
+        """Run fn() under the model's rate limits, concurrency limit and breaker,
+        retrying rate-limit and transient errors. actual_tokens(result) -> int, if given,
+        reconciles the token bucket with the real usage. on_latency(seconds), if given,
+        receives the duration of the successful fn() call alone (no rate-limit, concurrency
+        or backoff waits)."""
+        ms = self.for_model(model)
+        for attempt in range(self.max_attempts):
+            deadline.check(f"LLM call ({model})")
+            probe = ms.breaker.check(model)
+            try:
+                wait = max(ms.requests.reserve(1), ms.tokens.reserve(estimated_tokens))
+                if wait > 0:
+                    deadline.check(f"LLM rate-limit wait ({model})", needed_s=wait)
+                    ms._count("wait_s", wait)
+                    with span("llm_wait", model, reason="rate_limit"):
+                        time.sleep(wait)
+                ms.limiter.acquire()
+            except BaseException:
+                # e.g. DeadlineExceeded before the provider was called: no outcome to record
+                if probe:
+                    ms.breaker.release_probe()
+                raise
+            start = time.monotonic()
+            # Stays "fatal" when fn() raises a non-Exception (KeyboardInterrupt, SystemExit)
+            kind = "fatal"
+            try:
+                result = fn()
+                kind = None
+            except Exception as e:
+                kind = classify_error(e)
+                error = e
+            except BaseException:
+                # Interrupted, not answered: nothing to record, but the probe must not stay taken
+                if probe:
+                    ms.breaker.release_probe()
+                raise
+            finally:
+                latency = time.monotonic() - start
+                # The slot is given back however fn() ends
+                ms.limiter.release(
+                    latency,
+                    throttled=kind == "rate_limit",
+                    failed=kind not in (None, "rate_limit"),
+                )
+            if kind is not None:
+                if kind == "transient":
+                    ms.breaker.record_failure()
+                else:
+                    # The provider answered (429 or a client error): it is reachable
+                    ms.breaker.record_success()
+                if kind == "fatal":
+                    ms._count("failed")
+                    raise error
+                if kind == "rate_limit":
+                    ms._count("throttled")
+                if attempt == self.max_attempts - 1:
+                    ms._count("failed")
+                    raise error
+                delay = backoff_delay(attempt, error)
+                deadline.check(f"LLM retry ({model})", needed_s=delay)
+                ms._count("retries")
+                with span("llm_wait", model, reason=f"backoff ({kind})"):
+                    time.sleep(delay)
+                continue
+            ms.breaker.record_success()
+            ms._count("calls")
+            if on_latency is not None:
+                on_latency(latency)
+            if actual_tokens is not None:
+                used = actual_tokens(result)
+                if used:
+                    ms.tokens.adjust(estimated_tokens - used)
+            return result
+
+    def summary(self) -> dict[str, dict]:
+        return {
+            model: {
+                **ms.stats,
+                "wait_s": round(ms.stats["wait_s"], 1),
+                "concurrency_limit": round(ms.limiter.limit, 1),
+                "breaker": ms.breaker.state,
+            }
+            for model, ms in self._models.items()
+        }
+
+
+_scheduler: LLMScheduler | None = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> LLMScheduler:
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = LLMScheduler(LLM_LIMITS)
+        return _scheduler
+
+
+def print_scheduler_summary():
+    summary = get_scheduler().summary()
+    if not summary:
+        return
+    print("\n--- LLM SCHEDULER ---")
+    for model, stats in summary.items():
+        print(
+            f"  {model}: {stats['calls']} calls, {stats['retries']} retries, "
+            f"{stats['throttled']} throttled (429), {stats['failed']} failed, "
+            f"rate-limit wait {stats['wait_s']}s, concurrency limit {stats['concurrency_limit']}, "
+            f"breaker {stats['breaker']}"
+        )
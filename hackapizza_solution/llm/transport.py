@@ -0,0 +1,58 @@
+"""Shared HTTP transport for all LLM clients.
+
+One keep-alive connection pool per process instead of one per agent: an
+orchestrator holds eight OpenAIClient objects and every batch worker holds its
+own orchestrator, so without sharing, sockets and TLS handshakes multiply with
+agents x workers. HTTP/2 is used when the optional `h2` package is installed
+(many concurrent requests are then multiplexed over a few connections).
+"""
+
+import atexit
+import importlib.util
+import sys
+import threading
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+from hackapizza_solution.config import HTTP_POOL
+
+_http_client: httpx.Client | None = None
+_lock = threading.Lock()
+
+
+def http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+def request_timeout() -> httpx.Timeout:
+    return httpx.Timeout(HTTP_POOL["timeout_s"], connect=HTTP_POOL["connect_timeout_s"])
+
+
+def get_http_client() -> httpx.Client:
+    """Process-wide pooled httpx client (created on first use)."""
+    global _http_client
+    with _lock:
+        if _http_client is None:
+            _http_client = httpx.Client(
+                http2=HTTP_POOL["http2"] and http2_available(),
+                limits=httpx.Limits(
+                    max_connections=HTTP_POOL["max_connections"],
+                    max_keepalive_connections=HTTP_POOL["max_keepalive_connections"],
+                    keepalive_expiry=HTTP_POOL["keepalive_expiry_s"],
+                ),
+                timeout=request_timeout(),
+            )
+        return _http_client
+
+
+def close_http_client():
+    global _http_client
+    with _lock:
+        if _http_client is not None:
+            _http_client.close()
+            _http_client = None
+
+
+atexit.register(close_http_client)
@@ -2,27 +2,30 @@
 
 Modes:
     Interactive: ./pizza_env/bin/python -m hackapizza_solution.main -q "question..."
-    Batch:       ./pizza_env/bin/python -m hackapizza_solution.main --batch
+    Batch:       ./pizza_env/bin/python -m hackapizza_solution.main --batch [--workers N]
+                 [--resume] [--only zero-results] [--rows 3,17]
     Prepare:     ./pizza_env/bin/python -m hackapizza_solution.main --prepare
+    Service:     ./pizza_env/bin/python -m hackapizza_solution.main --serve [--workers N] [--port 8080]
 """
 
 import argparse
 import csv
-import json
-import re
+import itertools
 import sys
+import threading
 import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 from hackapizza_solution.config import (
-    DOMANDE_CSV, MENUS_JSON, BLOGPOST_PCT_JSON, DATA_DIR,
+    DOMANDE_CSV, MENUS_JSON, BLOGPOST_PCT_JSON,
+    SUBMISSION_CSV, RESULTS_DETAILED_JSON,
     QDRANT_HOST, QDRANT_PORT,
     COLLECTION_CODICE, COLLECTION_MANUALE, COLLECTION_BLOG,
+    SERVE_HOST, SERVE_PORT,
 )
-
-# Valid dish ID range (from dish_mapping.json)
-VALID_ID_MIN, VALID_ID_MAX = 0, 286
+from hackapizza_solution.answer_ids import extract_ids_from_response
 
 
 def _check_qdrant_collections() -> list[str]:
@@ -30,92 +33,347 @@ def _check_qdrant_collections() -> list[str]:
     try:
         from qdrant_client import QdrantClient
         client = QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT)
-        required = [COLLECTION_CODICE, COLLECTION_MANUALE, COLLECTION_BLOG]
-        missing = [c for c in required if not client.collection_exists(c)]
-        return missing
+        try:
+            required = [COLLECTION_CODICE, COLLECTION_MANUALE, COLLECTION_BLOG]
+            return [c for c in required if not client.collection_exists(c)]
+        finally:
+            client.close()
     except Exception as e:
         return [f"Qdrant unreachable: {e}"]
 
 
-def extract_ids_from_response(text: str) -> tuple[str, str | None]:
-    """Extract numeric IDs from the LLM response. Only trusts explicit ID patterns to avoid
-    false positives (e.g. percentages, years, distances). Returns (ids_str, zero_cause)."""
-    def _filter_valid_ids(nums: list[int]) -> list[int]:
-        return sorted(set(n for n in nums if VALID_ID_MIN <= n <= VALID_ID_MAX))
-
-    # Try to find "IDS: X,Y,Z" pattern first (from our formatter tool - explicit output)
-    ids_match = re.search(r"IDS:\s*([\d,\s]+)", text, re.IGNORECASE)
-    if ids_match:
-        raw = ids_match.group(1)
-        nums = [int(x.strip()) for x in raw.split(",") if x.strip().isdigit()]
-        valid = _filter_valid_ids(nums)
-        if valid:
-            return ",".join(str(n) for n in valid), None
-        if nums:
-            invalid = [n for n in nums if n < VALID_ID_MIN or n > VALID_ID_MAX]
-            return "0", f"Formatter returned IDs outside valid range ({VALID_ID_MIN}-{VALID_ID_MAX}): {invalid[:5]}"
-        return "0", "Formatter returned IDS: but no valid IDs"
-
-    # Fallback: if the entire response is ONLY numbers and commas (orchestrator passthrough)
-    clean = text.strip()
-    if re.match(r"^[\d,\s]+$", clean):
-        nums = [int(x.strip()) for x in clean.split(",") if x.strip().isdigit()]
-        valid = _filter_valid_ids(nums)
-        if valid:
-            return ",".join(str(n) for n in valid), None
-        if nums:
-            invalid = [n for n in nums if n < VALID_ID_MIN or n > VALID_ID_MAX]
-            return "0", f"Response contains numbers outside valid ID range ({VALID_ID_MIN}-{VALID_ID_MAX}): {invalid[:5]}"
-        return "0", "Response is numeric but empty"
-
-    # No fallback: do NOT extract numbers from free text (avoids false positives from
-    # percentages, distances, years, counts, etc.)
-    if not text or not text.strip():
-        return "0", "Empty response from LLM"
-    if "NOT FOUND" in text or "NON TROVATI" in text:
-        return "0", "Dish names not found in mapping (NOT FOUND in response)"
-    if "nessun" in text.lower() or "no dish" in text.lower() or "no chef" in text.lower():
-        return "0", "Agents reported no matching dishes/chefs"
-    return "0", "No explicit IDs in response - LLM may not have invoked formatter or returned unexpected format"
-
-
 def prepare_data():
     """Run all data preparation steps (Phase 0)."""
     print("=" * 60)
     print("PHASE 0: Data preparation")
     print("=" * 60)
 
-    print("\n--- Step 1: Parsing blogposts ---")
-    from hackapizza_solution.data_preparation.parse_blogposts import run as parse_blogs
-    parse_blogs()
+    from hackapizza_solution.profiling import profile_section
 
     if not MENUS_JSON.exists():
-        print("\n--- Step 2: Extracting menus from PDFs (LLM) ---")
+        print("\n--- Step 1: Extracting menus from PDFs (LLM) ---")
         from hackapizza_solution.data_preparation.extract_menus import run as extract_menus
-        extract_menus()
+        with profile_section("prepare-extract_menus"):
+            extract_menus()
     else:
-        print(f"\n--- Step 2: menus.json already present, skip ---")
+        print(f"\n--- Step 1: menus.json already present, skip ---")
+
+    # Blogpost percentages are resolved against the menu index, so menus come first
+    print("\n--- Step 2: Parsing blogposts ---")
+    from hackapizza_solution.data_preparation.parse_blogposts import run as parse_blogs
+    with profile_section("prepare-parse_blogposts"):
+        parse_blogs()
 
     print("\n--- Step 3: Ingesting documents into Qdrant ---")
     from hackapizza_solution.data_preparation.ingest_rag import run as ingest_rag
-    ingest_rag()
+    with profile_section("prepare-ingest_rag"):
+        ingest_rag()
+
+    print("\n--- Step 4: Embedding category centroids for the hybrid classifier ---")
+    from hackapizza_solution.classification import build_centroids
+    with profile_section("prepare-category_centroids"):
+        build_centroids()
 
     print("\n" + "=" * 60)
     print("Data preparation complete!")
     print("=" * 60)
 
 
+def _fast_path(question: str) -> tuple[str, str] | None:
+    """Deterministic answer for simple questions, None to use the agents."""
+    from hackapizza_solution.fast_path import try_fast_path
+    from hackapizza_solution.tracing import span
+
+    try:
+        with span("fast_path", "try_fast_path") as attrs:
+            result = try_fast_path(question)
+            attrs["hit"] = result is not None
+            return result
+    except Exception as e:
+        print(f"  Fast path skipped ({type(e).__name__}: {e})")
+        return None
+
+
 def run_single_question(question: str) -> str:
-    """Process a single question through the orchestrator."""
-    from hackapizza_solution.agents.orchestrator import create_orchestrator
+    """Process a single question (fast path first, then the answer cache, then the orchestrator)."""
+    from hackapizza_solution import answer_cache
+
+    fast = _fast_path(question)
+    if fast is not None:
+        ids, explanation = fast
+        return f"IDS: {ids}\n({explanation})"
+    cached = answer_cache.lookup(question)
+    if cached is not None:
+        return f"IDS: {cached.ids}\n({_cache_explanation(cached)})"
 
-    orchestrator = create_orchestrator()
-    response = orchestrator.run(question)
+    from hackapizza_solution.agents.registry import create_cached_session
+
+    session = create_cached_session()
+    try:
+        response = session.run(question)
+    finally:
+        session.close()
+    answer_cache.store(question, extract_ids_from_response(response.text)[0])
     return response.text
 
 
-def run_batch():
-    """Process all questions from domande.csv and produce Kaggle CSV."""
+def _cache_explanation(cached) -> str:
+    if cached.match == "exact":
+        return "answer cache, same question"
+    return f"answer cache, paraphrase of \"{cached.question[:100]}\" (similarity {cached.similarity:.2f})"
+
+
+def _answer_question(session, question: str) -> tuple[str, str, str | None]:
+    """Run one question through the orchestrator session with retries on transient errors.
+    Past the question's deadline, falls back to the partial IDs the tools produced.
+    Returns (ids_str, raw_answer, zero_cause)."""
+    from hackapizza_solution.deadline import DeadlineExceeded, current
+    from hackapizza_solution.llm.scheduler import backoff_delay, classify_error
+
+    zero_cause = None
+    raw_answer = ""
+    ids_str = "0"
+    max_retries = 3
+    for attempt in range(max_retries):
+        try:
+            response = session.run(question)
+            raw_answer = response.text
+            ids_str, zero_cause = extract_ids_from_response(raw_answer)
+            break
+        except DeadlineExceeded as e:
+            raw_answer = str(e)
+            zero_cause = f"Deadline exceeded: {e}"
+            break
+        except Exception as e:
+            # LLM calls are already retried by the shared scheduler; this re-runs the whole
+            # question on transient errors from anywhere else (Qdrant, Cohere, network)
+            is_transient = classify_error(e) in ("transient", "rate_limit")
+            wait = backoff_delay(attempt + 2, e)
+            left = current().remaining() if current() is not None else None
+            if is_transient and attempt < max_retries - 1 and (left is None or wait < left):
+                print(f"  Retry {attempt + 1}/{max_retries - 1} after {wait:.1f}s...")
+                time.sleep(wait)
+            else:
+                raw_answer = str(e)
+                ids_str = "0"
+                err_msg = str(e)
+                if "404" in err_msg and "doesn't exist" in err_msg.lower():
+                    zero_cause = f"Qdrant collection missing: {err_msg[:150]}... Run --prepare first."
+                else:
+                    zero_cause = f"Exception during processing: {type(e).__name__}: {e}"
+                break
+
+    deadline = current()
+    if ids_str == "0" and deadline is not None and deadline.hit:
+        partial = deadline.partial_ids()
+        if partial is not None:
+            print(f"  Deadline reached: partial IDs from {deadline.partial_source}")
+            raw_answer = f"{raw_answer}\n[deadline: partial IDs from {deadline.partial_source}]"
+            return partial, raw_answer, None
+    return ids_str, raw_answer, zero_cause
+
+
+def _question_categories(question: str) -> list[str]:
+    from hackapizza_solution.classification import classify
+
+    return sorted(classify(question).categories)
+
+
+def _process_question(session, row_id: int, question: str) -> dict:
+    """Answer one question and build its detailed result record (traced with --trace,
+    profiled with --profile)."""
+    from hackapizza_solution.deadline import question_deadline
+    from hackapizza_solution.profiling import profile_section
+    from hackapizza_solution.tracing import is_enabled, start_trace
+
+    categories = _question_categories(question) if is_enabled() else None
+    with profile_section(f"q{row_id}"), start_trace(row_id, question, categories) as trace, \
+            question_deadline():
+        result = _answer_record(session, row_id, question)
+    if trace is not None:
+        result["spans"] = trace.breakdown()
+    return result
+
+
+def _answer_record(session, row_id: int, question: str) -> dict:
+    from hackapizza_solution import answer_cache
+
+    start = time.time()
+    fast = _fast_path(question)
+    if fast is not None:
+        ids_str, explanation = fast
+        return {
+            "row_id": row_id,
+            "question": question,
+            "ids": ids_str,
+            "raw_response": explanation,
+            "time_s": round(time.time() - start, 3),
+            "path": "fast",
+        }
+    cached = answer_cache.lookup(question)
+    if cached is not None:
+        return {
+            "row_id": row_id,
+            "question": question,
+            "ids": cached.ids,
+            "raw_response": _cache_explanation(cached),
+            "time_s": round(time.time() - start, 3),
+            "path": "cache",
+            "cache_match": cached.match,
+        }
+    ids_str, raw_answer, zero_cause = _answer_question(session, question)
+    elapsed = time.time() - start
+    deadline_stats = _deadline_stats(elapsed)
+    if not deadline_stats.get("deadline_hit"):
+        answer_cache.store(question, ids_str)
+    return {
+        "row_id": row_id,
+        "question": question,
+        "ids": ids_str,
+        "raw_response": raw_answer,
+        "time_s": round(elapsed, 1),
+        "path": "agents",
+        **session.last_stats,
+        **deadline_stats,
+        **({"zero_cause": zero_cause} if zero_cause else {}),
+    }
+
+
+def _deadline_stats(elapsed: float) -> dict:
+    from hackapizza_solution.deadline import current
+
+    deadline = current()
+    if deadline is None:
+        return {}
+    stats = {"deadline_s": deadline.budget_s, "deadline_hit": deadline.hit}
+    if deadline.hit:
+        stats["deadline_hit_at"] = deadline.hit_at
+        stats["overrun_s"] = round(max(0.0, elapsed - deadline.budget_s), 1)
+        stats["deadline_partial"] = deadline.partial_source is not None
+    return stats
+
+
+def _print_result(result: dict):
+    print(f"IDs: {result['ids']}")
+    print(f"Time: {result['time_s']:.1f}s")
+    if result["ids"] == "0" and result.get("zero_cause"):
+        raw_answer = result["raw_response"]
+        print(f"  >>> ZERO CAUSE: {result['zero_cause']}")
+        preview = raw_answer[:400] + ("..." if len(raw_answer) > 400 else "")
+        print(f"  >>> Raw response preview: {preview}")
+
+
+def _run_sequential(questions: list[tuple[int, str]], on_result) -> list[dict]:
+    from hackapizza_solution.agents.session import create_session
+
+    session = create_session()
+    results = []
+    try:
+        for i, (row_id, question) in enumerate(questions, 1):
+            print(f"\n{'='*60}")
+            print(f"[{i}/{len(questions)}] row_id={row_id}")
+            print(f"Question: {question[:100]}{'...' if len(question) > 100 else ''}")
+            print("-" * 60)
+            result = _process_question(session, row_id, question)
+            on_result(result)
+            _print_result(result)
+            results.append(result)
+    finally:
+        session.close()
+    return results
+
+
+def _run_concurrent(questions: list[tuple[int, str]], workers: int, on_result) -> list[dict]:
+    """Answer questions on a thread pool. Each worker thread owns its orchestrator
+    (the orchestrator is stateful); at most 2 * workers questions are in flight.
+    on_result is called from the calling thread as each question completes."""
+    from hackapizza_solution.agents.session import create_session
+    from hackapizza_solution.deadline import cancel_all, resume_all
+
+    local = threading.local()
+    sessions = []
+    sessions_lock = threading.Lock()
+
+    def work(row_id: int, question: str) -> dict:
+        if not hasattr(local, "session"):
+            local.session = create_session()
+            with sessions_lock:
+                sessions.append(local.session)
+        return _process_question(local.session, row_id, question)
+
+    results: dict[int, dict] = {}
+    batch_start = time.time()
+    pending = iter(questions)
+    in_flight = {}
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch")
+
+    def submit_next() -> bool:
+        item = next(pending, None)
+        if item is None:
+            return False
+        in_flight[pool.submit(work, *item)] = item
+        return True
+
+    try:
+        for _ in range(workers * 2):
+            if not submit_next():
+                break
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                row_id, question = in_flight.pop(future)
+                result = future.result()
+                results[row_id] = result
+                on_result(result)
+                submit_next()
+                elapsed = time.time() - batch_start
+                rate = len(results) / elapsed if elapsed else 0.0
+                eta = (len(questions) - len(results)) / rate if rate else 0.0
+                print(
+                    f"[{len(results)}/{len(questions)}] row_id={row_id} "
+                    f"IDs: {result['ids']} ({result['time_s']:.1f}s) | "
+                    f"in flight: {len(in_flight)} | elapsed {elapsed:.0f}s, ETA {eta:.0f}s"
+                )
+                if result["ids"] == "0" and result.get("zero_cause"):
+                    print(f"  >>> ZERO CAUSE: {result['zero_cause']}")
+    finally:
+        # On Ctrl-C queued questions are dropped and running ones stop at their next agent run,
+        # LLM attempt or RAG query (a provider call already sent still completes). Their results
+        # are never passed to on_result, so the journal leaves those rows for --resume.
+        if in_flight:
+            cancel_all()
+        try:
+            pool.shutdown(wait=True, cancel_futures=True)
+        finally:
+            resume_all()
+            with sessions_lock:
+                for session in sessions:
+                    session.close()
+    # Ordered collection: results come back in completion order
+    return [results[row_id] for row_id, _ in questions]
+
+
+def _load_questions() -> list[tuple[int, str]]:
+    with open(DOMANDE_CSV, encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        return [(i, row["domanda"]) for i, row in enumerate(reader, 1)]
+
+
+def run_batch(
+    workers: int = 1,
+    resume: bool = False,
+    only: str | None = None,
+    rows: set[int] | None = None,
+    plan: bool = False,
+):
+    """Process all questions from domande.csv and produce Kaggle CSV.
+    With workers > 1, questions run concurrently, one orchestrator per worker.
+    Every answer is appended to the batch journal as soon as it is ready; resume,
+    only and rows select which questions to (re-)run against the existing journal
+    (see journal.select_rows). Output files are materialized from the journal.
+    With plan, a pre-pass groups the questions and warms shared lookups (batch_planner)."""
+    from hackapizza_solution.journal import BatchJournal, materialize, select_rows
+
     # Pre-flight: verify Qdrant collections exist
     missing = _check_qdrant_collections()
     if missing:
@@ -125,77 +383,72 @@ def run_batch():
         print("\nRun 'python -m hackapizza_solution.main --prepare' to create collections.")
         sys.exit(1)
 
-    from hackapizza_solution.agents.orchestrator import create_orchestrator
-
-    orchestrator = create_orchestrator()
-
-    with open(DOMANDE_CSV, encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        questions = [row["domanda"] for row in reader]
-
-    print(f"Processing {len(questions)} questions...\n")
-
-    kaggle_rows = []
-    detailed_results = []
-
-    for i, question in enumerate(questions, 1):
-        row_id = i
-        print(f"\n{'='*60}")
-        print(f"[{i}/{len(questions)}] row_id={row_id}")
-        print(f"Question: {question[:100]}{'...' if len(question) > 100 else ''}")
-        print("-" * 60)
-
-        start = time.time()
-        zero_cause = None
-        raw_answer = ""
-        max_retries = 3
-        last_error = None
-        for attempt in range(max_retries):
-            try:
-                response = orchestrator.run(question)
-                raw_answer = response.text
-                ids_str, zero_cause = extract_ids_from_response(raw_answer)
-                break
-            except Exception as e:
-                last_error = e
-                err_str = str(e).lower()
-                # Retry on transient errors (connection refused, timeout, 5xx)
-                is_transient = (
-                    "connection refused" in err_str or "errno 61" in err_str
-                    or "timeout" in err_str or "timed out" in err_str
-                    or "503" in err_str or "502" in err_str or "504" in err_str
-                )
-                if is_transient and attempt < max_retries - 1:
-                    wait = 5 * (attempt + 1)
-                    print(f"  Retry {attempt + 1}/{max_retries - 1} after {wait}s...")
-                    time.sleep(wait)
-                else:
-                    raw_answer = str(e)
-                    ids_str = "0"
-                    err_msg = str(e)
-                    if "404" in err_msg and "doesn't exist" in err_msg.lower():
-                        zero_cause = f"Qdrant collection missing: {err_msg[:150]}... Run --prepare first."
-                    else:
-                        zero_cause = f"Exception during processing: {type(e).__name__}: {e}"
-                    break
-        elapsed = time.time() - start
-
-        print(f"IDs: {ids_str}")
-        print(f"Time: {elapsed:.1f}s")
-        if ids_str == "0" and zero_cause:
-            print(f"  >>> ZERO CAUSE: {zero_cause}")
-            preview = raw_answer[:400] + ("..." if len(raw_answer) > 400 else "")
-            print(f"  >>> Raw response preview: {preview}")
-
-        kaggle_rows.append({"row_id": row_id, "result": ids_str})
-        detailed_results.append({
-            "row_id": row_id,
-            "question": question,
-            "ids": ids_str,
-            "raw_response": raw_answer,
-            "time_s": round(elapsed, 1),
-            **({"zero_cause": zero_cause} if zero_cause else {}),
-        })
+    questions = _load_questions()
+    journal = BatchJournal()
+    selective = resume or only is not None or rows is not None
+    if not selective:
+        journal.start_fresh()
+    records = journal.load()
+    todo = select_rows(questions, records, resume=resume, only=only, rows=rows)
+    if selective:
+        print(f"Journal has {len(records)} answered rows; {len(todo)} selected to run")
+
+    def on_result(result: dict):
+        journal.append(result)
+        records[result["row_id"]] = result
+
+    print(f"Processing {len(todo)} questions with {workers} worker(s)...\n")
+
+    from hackapizza_solution.tools.memo import start_run
+    start_run()
+    batch_start = time.time()
+    from hackapizza_solution import classification
+    if classification.is_enabled() and todo:
+        embedded, cached = classification.prime([question for _, question in todo])
+        print(f"Hybrid classifier: {embedded} questions embedded, {cached} from the embedding cache")
+    if plan and todo:
+        from hackapizza_solution.batch_planner import plan_and_prefetch
+        todo = plan_and_prefetch(todo)
+    run_results = []
+    try:
+        if workers > 1:
+            run_results = _run_concurrent(todo, workers, on_result)
+        else:
+            run_results = _run_sequential(todo, on_result)
+    except KeyboardInterrupt:
+        print(f"\nInterrupted: {len(records)} rows journaled. Re-run with --resume to continue.")
+    finally:
+        journal.close()
+        detailed_results = materialize(questions, records)
+    print(f"\nBatch wall time: {time.time() - batch_start:.1f}s")
+    fast = [r for r in run_results if r.get("path") == "fast"]
+    if run_results:
+        cached = sum(1 for r in run_results if r.get("path") == "cache")
+        print(f"Fast path: {len(fast)}/{len(run_results)} questions answered without LLM calls"
+              + (f", answer cache: {cached}" if cached else ""))
+
+    from hackapizza_solution.agents.cascade import print_cascade_summary
+    from hackapizza_solution.answer_cache import print_answer_cache_summary
+    from hackapizza_solution.classification import print_classification_summary
+    from hackapizza_solution.deadline import print_deadline_summary
+    from hackapizza_solution.agents.dag import print_dag_summary
+    from hackapizza_solution.tools.memo import print_memo_summary
+    from hackapizza_solution.tracing import print_trace_summary
+    from hackapizza_solution.agents.session import print_token_summary
+    from hackapizza_solution.llm.cache import print_cache_summary
+    from hackapizza_solution.llm.hedging import print_hedging_summary
+    from hackapizza_solution.llm.scheduler import print_scheduler_summary
+    print_token_summary(run_results)
+    print_answer_cache_summary()
+    print_classification_summary()
+    print_dag_summary(run_results)
+    print_cascade_summary()
+    print_deadline_summary(run_results)
+    print_memo_summary()
+    print_trace_summary()
+    print_scheduler_summary()
+    print_hedging_summary()
+    print_cache_summary()
 
     # Summary of zero-result cases for debugging
     zero_cases = [r for r in detailed_results if r.get("ids") == "0" and r.get("zero_cause")]
@@ -204,22 +457,10 @@ def run_batch():
         for r in zero_cases:
             print(f"  row_id={r['row_id']}: {r['zero_cause']}")
 
-    # Write Kaggle submission CSV
-    kaggle_csv = DATA_DIR / "submission.csv"
-    with open(kaggle_csv, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=["row_id", "result"])
-        writer.writeheader()
-        writer.writerows(kaggle_rows)
-    print(f"\nKaggle CSV saved to {kaggle_csv}")
-
-    # Write detailed results JSON for debugging
-    debug_json = DATA_DIR / "results_detailed.json"
-    debug_json.write_text(
-        json.dumps(detailed_results, indent=2, ensure_ascii=False), encoding="utf-8"
-    )
-    print(f"Detailed results saved to {debug_json}")
+    print(f"\nKaggle CSV saved to {SUBMISSION_CSV}")
+    print(f"Detailed results saved to {RESULTS_DETAILED_JSON}")
 
-    return kaggle_rows
+    return [{"row_id": r["row_id"], "result": r["ids"]} for r in detailed_results]
 
 
 def main():
@@ -232,17 +473,151 @@ def main():
         "--batch", action="store_true",
         help="Process all questions from domande.csv and produce Kaggle CSV",
     )
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="Batch / service mode: number of questions answered concurrently (one orchestrator each)",
+    )
+    parser.add_argument(
+        "--resume", action="store_true",
+        help="Batch mode: skip rows already answered in the batch journal",
+    )
+    parser.add_argument(
+        "--only", choices=["zero-results"], default=None,
+        help="Batch mode: re-run only rows whose journaled answer is 0",
+    )
+    parser.add_argument(
+        "--rows", type=str, default=None,
+        help="Batch mode: comma-separated row_ids to re-run (e.g. 3,17)",
+    )
+    parser.add_argument(
+        "--plan", action="store_true",
+        help="Batch mode: classify and group all questions first and prefetch shared lookups",
+    )
+    parser.add_argument(
+        "--trace", action="store_true",
+        help="Batch mode: write a Chrome-trace JSON per question and print p50/p95 per span type",
+    )
+    parser.add_argument(
+        "--llm-cache", choices=["off", "record", "replay", "read-through"], default=None,
+        help="LLM response cache mode (default: LLM_CACHE_MODE env, off)",
+    )
+    parser.add_argument(
+        "--fast-path", action="store_true",
+        help="Answer simple single-category questions deterministically, without the agents (also FAST_PATH=1)",
+    )
+    parser.add_argument(
+        "--dag", action="store_true",
+        help="Run sub-agents as a per-category DAG (independent branches concurrently) "
+             "instead of orchestrator delegation",
+    )
+    parser.add_argument(
+        "--deadline", type=float, default=None, metavar="SECONDS",
+        help="Per-question time budget for agents, LLM calls and RAG queries; past it the question "
+             "is answered with the partial IDs the tools produced (default QUESTION_DEADLINE_S, 0 = none)",
+    )
+    parser.add_argument(
+        "--hedge", action="store_true",
+        help="Send a duplicate of LLM calls slower than the model's recent p90 latency (first answer wins)",
+    )
+    parser.add_argument(
+        "--answer-cache", action="store_true",
+        help="Reuse stored agent answers for the same question or a paraphrase (same entities, categories "
+             "and numbers, similar embedding); invalidated when the data changes (also ANSWER_CACHE=1)",
+    )
+    parser.add_argument(
+        "--hybrid-classifier", action="store_true",
+        help="Blend the rule classifier with similarity to the category centroids built by --prepare "
+             "(also HYBRID_CLASSIFIER=1)",
+    )
+    parser.add_argument(
+        "--cascade", action="store_true",
+        help="Compliance and order agents try the fast model first and escalate to the strong "
+             "model on low confidence or a failed data check",
+    )
+    parser.add_argument(
+        "--profile", choices=["cpu", "mem"], default=None,
+        help="Profile every question (or prepare step): sampled CPU stacks in folded format, "
+             "or tracemalloc/RSS growth with top allocation sites; output in data/profiles/",
+    )
+    parser.add_argument(
+        "--rss-budget", type=int, default=None,
+        help="With --profile: warn when RSS exceeds this many MiB (default: RSS_BUDGET_MB env, 4096)",
+    )
+    parser.add_argument(
+        "--serve", action="store_true",
+        help="Run a local HTTP/JSON service (POST /answer, GET /health, GET /metrics) "
+             "with --workers warm sessions",
+    )
+    parser.add_argument("--host", default=SERVE_HOST, help="Service mode: bind address")
+    parser.add_argument("--port", type=int, default=SERVE_PORT, help="Service mode: port (0 = any free port)")
+    parser.add_argument(
+        "--fake-llm", type=float, default=None, metavar="LATENCY_S",
+        help="Service mode: scripted LLM with this latency, hash embedder and in-memory vector store "
+             "(load testing without API keys or Qdrant)",
+    )
     parser.add_argument(
         "--prepare", action="store_true",
         help="Run data preparation (Phase 0): extract menus, parse blogs, ingest RAG",
     )
     args = parser.parse_args()
 
+    if args.fast_path:
+        from hackapizza_solution.fast_path import set_enabled
+        set_enabled(True)
+
+    if args.dag:
+        from hackapizza_solution.agents.dag import set_enabled as set_dag_enabled
+        set_dag_enabled(True)
+
+    if args.deadline is not None:
+        from hackapizza_solution.deadline import set_budget
+        set_budget(args.deadline)
+
+    if args.hedge:
+        from hackapizza_solution.llm.hedging import set_enabled as set_hedging_enabled
+        set_hedging_enabled(True)
+
+    if args.answer_cache:
+        from hackapizza_solution.answer_cache import set_enabled as set_answer_cache_enabled
+        set_answer_cache_enabled(True)
+
+    if args.hybrid_classifier:
+        from hackapizza_solution.classification import set_enabled as set_classifier_enabled
+        set_classifier_enabled(True)
+
+    if args.cascade:
+        from hackapizza_solution.agents.cascade import set_enabled as set_cascade_enabled
+        set_cascade_enabled(True)
+
+    if args.trace:
+        from hackapizza_solution.tracing import set_enabled as set_tracing_enabled
+        set_tracing_enabled(True)
+
+    if args.llm_cache:
+        from hackapizza_solution.llm.cache import set_cache_mode
+        set_cache_mode(args.llm_cache)
+
+    if args.profile:
+        from hackapizza_solution.config import RSS_BUDGET_MB
+        from hackapizza_solution.profiling import finish_profiling, start_profiling
+        start_profiling(args.profile, args.rss_budget or RSS_BUDGET_MB)
+        try:
+            _run_mode(args)
+        finally:
+            finish_profiling()
+    else:
+        _run_mode(args)
+
+
+def _run_mode(args):
     if args.prepare:
         prepare_data()
     elif args.question:
+        from hackapizza_solution.profiling import profile_section
+
         print(f"Question: {args.question}\n")
-        answer = run_single_question(args.question)
+        with profile_section("question"):
+            answer = run_single_question(args.question)
         ids, zero_cause = extract_ids_from_response(answer)
         print(f"\nRaw response:\n{answer}")
         print(f"\nExtracted IDs: {ids}")
@@ -252,29 +627,52 @@ def main():
         if not MENUS_JSON.exists():
             print("ERROR: menus.json not found. Run --prepare first")
             sys.exit(1)
-        run_batch()
+        rows = {int(r) for r in args.rows.split(",") if r.strip()} if args.rows else None
+        run_batch(
+            workers=max(1, args.workers), resume=args.resume, only=args.only, rows=rows,
+            plan=args.plan,
+        )
+    elif args.serve:
+        if not MENUS_JSON.exists():
+            print("ERROR: menus.json not found. Run --prepare first")
+            sys.exit(1)
+        from hackapizza_solution.server import serve
+        serve(args.host, args.port, max(1, args.workers), fake_llm=args.fake_llm is not None,
+              llm_latency_s=args.fake_llm or 0.0)
     else:
         print("Hackapizza Multi-Agent System")
         print("Type 'quit' to exit\n")
 
-        from hackapizza_solution.agents.orchestrator import create_orchestrator
-        orchestrator = create_orchestrator()
-
-        while True:
-            question = input("Question: ").strip()
-            if question.lower() in ("quit", "exit", "q"):
-                break
-            if not question:
-                continue
-            try:
-                response = orchestrator.run(question)
-                ids, zero_cause = extract_ids_from_response(response.text)
-                print(f"\nIDs: {ids}")
-                if ids == "0" and zero_cause:
-                    print(f">>> ZERO CAUSE: {zero_cause}")
-                print(f"Raw: {response.text}\n")
-            except Exception as e:
-                print(f"\nERROR: {e}\n")
+        from hackapizza_solution.agents.registry import create_cached_session
+        from hackapizza_solution.profiling import profile_section
+        # Each question gets a clean memory; a short summary of the previous one
+        # is kept so follow-up questions still work. Agents are built on first use
+        # and only for the categories the questions need
+        session = create_cached_session(keep_summary=True)
+
+        try:
+            for turn in itertools.count(1):
+                question = input("Question: ").strip()
+                if question.lower() in ("quit", "exit", "q"):
+                    break
+                if not question:
+                    continue
+                fast = _fast_path(question)
+                if fast is not None:
+                    print(f"\nIDs: {fast[0]}\n({fast[1]})\n")
+                    continue
+                try:
+                    with profile_section(f"repl{turn}"):
+                        response = session.run(question)
+                    ids, zero_cause = extract_ids_from_response(response.text)
+                    print(f"\nIDs: {ids}")
+                    if ids == "0" and zero_cause:
+                        print(f">>> ZERO CAUSE: {zero_cause}")
+                    print(f"Raw: {response.text}\n")
+                except Exception as e:
+                    print(f"\nERROR: {e}\n")
+        finally:
+            session.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,271 @@
+"""Built-in CPU and memory profiling of main.py runs (--profile cpu|mem).
+
+cpu: a background thread samples the stacks of all threads every
+     PROFILE_SAMPLE_INTERVAL_S (wall-clock sampling, so time spent waiting on the
+     LLM, Qdrant or locks shows up too). Samples of the thread answering a question
+     are also attributed to that question. Stacks are written in folded format
+     ("frame;frame;frame count"), ready for flamegraph.pl, speedscope or inferno:
+     PROFILE_DIR/<run>/total.folded and q<row_id>.folded.
+mem: tracemalloc runs for the whole process; after every question a snapshot is
+     compared with the previous one, and the RSS and the top allocation sites that
+     grew are appended to PROFILE_DIR/<run>/memory.jsonl. The end-of-run summary
+     lists the sites that grew most over the run and the largest live ones.
+
+In both modes the RSS is checked after every question (and prepare step) against
+RSS_BUDGET_MB. Attribution assumes one question per thread; with --workers > 1 the
+memory growth between snapshots includes the concurrent questions, and DAG pool
+threads are only in the run total.
+"""
+
+import json
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from hackapizza_solution.config import PROFILE_DIR, PROFILE_SAMPLE_INTERVAL_S, PROFILE_TOP_N, RSS_BUDGET_MB
+
+PROFILE_MODES = ("cpu", "mem")
+
+_profiler: "Profiler | None" = None
+
+
+def rss_mb() -> float:
+    """Current resident set size (MiB); peak RSS where /proc is not available."""
+    try:
+        resident_pages = int(Path("/proc/self/statm").read_text().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # KiB on Linux, bytes on macOS
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+def _folded_stack(frame) -> str:
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class StackSampler:
+    """Periodically records the folded stack of every thread but its own."""
+
+    def __init__(self, interval_s: float):
+        self.interval_s = interval_s
+        self.total: Counter[str] = Counter()
+        self.per_label: dict[str, Counter[str]] = {}
+        self.samples = 0
+        self._labels: dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def label_thread(self, label: str | None):
+        with self._lock:
+            if label is None:
+                self._labels.pop(threading.get_ident(), None)
+            else:
+                self._labels[threading.get_ident()] = label
+                self.per_label.setdefault(label, Counter())
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval_s):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            frames = sys._current_frames()
+            with self._lock:
+                self.samples += 1
+                for ident, frame in frames.items():
+                    if ident == own:
+                        continue
+                    stack = _folded_stack(frame)
+                    self.total[f"{names.get(ident, ident)};{stack}"] += 1
+                    label = self._labels.get(ident)
+                    if label is not None:
+                        self.per_label[label][stack] += 1
+
+
+def _write_folded(path: Path, stacks: Counter[str]):
+    path.write_text("".join(f"{stack} {count}\n" for stack, count in stacks.most_common()), encoding="utf-8")
+
+
+def _site(stat) -> str:
+    frame = stat.traceback[0]
+    return f"{frame.filename}:{frame.lineno}"
+
+
+class Profiler:
+    def __init__(self, mode: str, rss_budget_mb: float = RSS_BUDGET_MB):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode {mode!r}, expected one of {PROFILE_MODES}")
+        self.mode = mode
+        self.rss_budget_mb = rss_budget_mb
+        self.out_dir = PROFILE_DIR / f"{datetime.now():%Y%m%d-%H%M%S}-{mode}"
+        self.sampler = StackSampler(PROFILE_SAMPLE_INTERVAL_S) if mode == "cpu" else None
+        self.start_time = time.time()
+        self._first_snapshot = None
+        self._last_snapshot = None
+        self._warned_rss = 0.0
+        self._lock = threading.Lock()
+        self._sections: list[dict] = []
+
+    def start(self):
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        if self.sampler:
+            self.sampler.start()
+        else:
+            tracemalloc.start()
+            self._first_snapshot = self._last_snapshot = self._snapshot()
+
+    @staticmethod
+    def _snapshot():
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        ))
+
+    @contextmanager
+    def section(self, label: str):
+        if self.sampler:
+            self.sampler.label_thread(label)
+        rss_before = rss_mb()
+        start = time.time()
+        try:
+            yield
+        finally:
+            if self.sampler:
+                self.sampler.label_thread(None)
+            record = {
+                "label": label,
+                "time_s": round(time.time() - start, 3),
+                "rss_mb": round(rss_mb(), 1),
+                "rss_delta_mb": round(rss_mb() - rss_before, 1),
+            }
+            if not self.sampler:
+                self._memory_record(record)
+            with self._lock:
+                self._sections.append(record)
+            self._check_budget(label, record["rss_mb"])
+
+    def _memory_record(self, record: dict):
+        snapshot = self._snapshot()
+        with self._lock:
+            previous, self._last_snapshot = self._last_snapshot, snapshot
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        growth = [s for s in snapshot.compare_to(previous, "lineno") if s.size_diff > 0][:PROFILE_TOP_N]
+        record.update({
+            "traced_mb": round(current / 2**20, 2),
+            "peak_traced_mb": round(peak / 2**20, 2),
+            "top_growth": [
+                {"site": _site(s), "size_diff_kb": round(s.size_diff / 1024, 1), "count_diff": s.count_diff}
+                for s in growth
+            ],
+        })
+        with self._lock, open(self.out_dir / "memory.jsonl", "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def _check_budget(self, label: str, rss: float):
+        # Warn on the first crossing, then again for every further 10% of growth
+        with self._lock:
+            if rss <= self.rss_budget_mb or rss <= self._warned_rss * 1.1:
+                return
+            self._warned_rss = rss
+        print(f"  WARNING: RSS {rss:.0f} MiB exceeds the {self.rss_budget_mb:.0f} MiB budget after {label}"
+              + ("" if self.sampler else f" (allocation sites in {self.out_dir / 'memory.jsonl'})"))
+
+    def finish(self):
+        print(f"\n--- PROFILE ({self.mode}, {time.time() - self.start_time:.1f}s, "
+              f"RSS {rss_mb():.0f} MiB, peak {peak_rss_mb():.0f} MiB) ---")
+        if self.sampler:
+            self.sampler.stop()
+            self._finish_cpu()
+        else:
+            self._finish_mem()
+        sections = sorted(self._sections, key=lambda r: -r["rss_delta_mb"])[:5]
+        if sections and sections[0]["rss_delta_mb"] > 0:
+            print("  Largest RSS growth:")
+            for r in sections:
+                print(f"    {r['label']:<24} {r['rss_delta_mb']:+8.1f} MiB (RSS {r['rss_mb']:.0f} MiB)")
+        print(f"  Output in {self.out_dir}")
+
+    def _finish_cpu(self):
+        sampler = self.sampler
+        _write_folded(self.out_dir / "total.folded", sampler.total)
+        for label, stacks in sampler.per_label.items():
+            if stacks:
+                _write_folded(self.out_dir / f"{label}.folded", stacks)
+        leaves = Counter()
+        for stack, count in sampler.total.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        total = sum(sampler.total.values()) or 1
+        print(f"  {sampler.samples} samples every {sampler.interval_s * 1000:.0f}ms "
+              f"(folded stacks: flamegraph.pl / speedscope)")
+        print("  Top frames (self samples, all threads):")
+        for frame, count in leaves.most_common(PROFILE_TOP_N):
+            print(f"    {count / total:6.1%}  {frame}")
+        busiest = sorted(sampler.per_label.items(), key=lambda kv: -sum(kv[1].values()))[:5]
+        if busiest:
+            print("  Most sampled questions:")
+            for label, stacks in busiest:
+                print(f"    {label:<24} {sum(stacks.values()) * sampler.interval_s:7.2f}s")
+
+    def _finish_mem(self):
+        snapshot = self._snapshot()
+        tracemalloc.stop()
+        print("  Top growth over the run:")
+        for s in [s for s in snapshot.compare_to(self._first_snapshot, "lineno") if s.size_diff > 0][:PROFILE_TOP_N]:
+            print(f"    {s.size_diff / 2**20:+8.2f} MiB {s.count_diff:+8d} blocks  {_site(s)}")
+        print("  Largest live allocation sites:")
+        for s in snapshot.statistics("lineno")[:PROFILE_TOP_N]:
+            print(f"    {s.size / 2**20:8.2f} MiB {s.count:8d} blocks  {_site(s)}")
+
+
+def start_profiling(mode: str, rss_budget_mb: float = RSS_BUDGET_MB):
+    global _profiler
+    _profiler = Profiler(mode, rss_budget_mb)
+    _profiler.start()
+
+
+@contextmanager
+def profile_section(label: str):
+    """Profile one question (or prepare step); no-op unless --profile is active."""
+    if _profiler is None:
+        yield
+        return
+    with _profiler.section(label):
+        yield
+
+
+def finish_profiling():
+    global _profiler
+    if _profiler is not None:
+        _profiler.finish()
+        _profiler = None
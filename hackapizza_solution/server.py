@@ -0,0 +1,346 @@
+"""Long-lived HTTP/JSON service mode (--serve).
+
+One process keeps everything the CLI modes rebuild on every start warm: datapizza
+and the agent modules are imported once, `--workers` sessions (orchestrator + seven
+sub-agents each) are built up front and reused, and the data caches (menus, dish
+mapping, distances, entity linker, RAG clients) are loaded before the first request
+and shared by all sessions. The tool memo lives for the whole server run.
+
+Endpoints:
+    POST /answer   {"question": "..."} -> {"ids", "path", "time_s", "coalesced", ...}
+    GET  /health   readiness and pool occupancy
+    GET  /metrics  Prometheus text format (requests, latency histogram, coalescing,
+                   rejections, in-flight, LLM calls)
+
+Identical in-flight questions (whitespace/case-normalized) are coalesced: later
+requests wait for the running answer instead of taking a session. At most
+`--workers` questions run at once and SERVE_QUEUE_DEPTH more may wait for a
+session; beyond that requests get 503 with Retry-After (backpressure) instead of
+queueing without bound.
+
+With --fake-llm the LLM, the embedder and the vector store are replaced by the
+offline stand-ins of benchmarks/fakes.py, so the service can be load-tested locally
+(benchmarks/load_test.py) without API keys or Qdrant.
+"""
+
+import itertools
+import json
+import queue
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from hackapizza_solution.config import SERVE_LATENCY_BUCKETS_S, SERVE_MAX_BODY_BYTES, SERVE_QUEUE_DEPTH
+
+
+class _Pending:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: dict | None = None
+        self.error: BaseException | None = None
+
+
+class Metrics:
+    """Counters and a latency histogram, rendered in Prometheus text format."""
+
+    def __init__(self, buckets: tuple[float, ...] = SERVE_LATENCY_BUCKETS_S):
+        self.buckets = buckets
+        self.started = time.time()
+        self.requests: dict[tuple[str, int], int] = {}
+        self.answers: dict[str, int] = {}
+        self.coalesced = 0
+        self.rejected = 0
+        self.zero = 0
+        self.histogram: dict[str, list[int]] = {}
+        self.latency_sum: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def request(self, endpoint: str, status: int):
+        with self._lock:
+            self.requests[(endpoint, status)] = self.requests.get((endpoint, status), 0) + 1
+
+    def answer(self, path: str, seconds: float, ids: str, coalesced: bool):
+        with self._lock:
+            self.answers[path] = self.answers.get(path, 0) + 1
+            counts = self.histogram.setdefault(path, [0] * (len(self.buckets) + 1))
+            counts[next((i for i, b in enumerate(self.buckets) if seconds <= b), len(self.buckets))] += 1
+            self.latency_sum[path] = self.latency_sum.get(path, 0.0) + seconds
+            self.coalesced += coalesced
+            self.zero += ids == "0"
+
+    def reject(self):
+        with self._lock:
+            self.rejected += 1
+
+    def render(self, gauges: dict[str, float]) -> str:
+        from hackapizza_solution.llm.scheduler import get_scheduler
+        from hackapizza_solution.profiling import rss_mb
+
+        lines = []
+
+        def metric(name: str, kind: str, help_text: str, samples: list[tuple[str, float]]):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(f"{name}{labels} {value:g}" for labels, value in samples)
+
+        with self._lock:
+            metric("hackapizza_http_requests_total", "counter", "HTTP requests by endpoint and status",
+                   [(f'{{endpoint="{e}",status="{s}"}}', n) for (e, s), n in sorted(self.requests.items())])
+            metric("hackapizza_answers_total", "counter", "Answered questions by path (fast, agents)",
+                   [(f'{{path="{p}"}}', n) for p, n in sorted(self.answers.items())])
+            metric("hackapizza_answers_zero_total", "counter", "Answers with no dish IDs", [("", self.zero)])
+            metric("hackapizza_coalesced_total", "counter",
+                   "Requests served by an identical in-flight question", [("", self.coalesced)])
+            metric("hackapizza_rejected_total", "counter", "Requests rejected with 503 (backpressure)",
+                   [("", self.rejected)])
+            samples = []
+            for path, counts in sorted(self.histogram.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, counts):
+                    cumulative += count
+                    samples.append((f'_bucket{{path="{path}",le="{bound:g}"}}', cumulative))
+                samples.append((f'_bucket{{path="{path}",le="+Inf"}}', cumulative + counts[-1]))
+                samples.append((f'_sum{{path="{path}"}}', round(self.latency_sum[path], 3)))
+                samples.append((f'_count{{path="{path}"}}', sum(counts)))
+            metric("hackapizza_answer_seconds", "histogram", "Time to answer a question", samples)
+
+        for name, value in gauges.items():
+            metric(f"hackapizza_{name}", "gauge", name.replace("_", " ").capitalize(), [("", value)])
+        metric("hackapizza_uptime_seconds", "gauge", "Seconds since the server started",
+               [("", round(time.time() - self.started, 1))])
+        metric("hackapizza_process_rss_megabytes", "gauge", "Resident set size", [("", round(rss_mb(), 1))])
+        llm = get_scheduler().summary()
+        for key in ("calls", "retries", "throttled", "failed"):
+            metric(f"hackapizza_llm_{key}_total", "counter", f"LLM {key} by model (scheduler)",
+                   [(f'{{model="{m}"}}', s[key]) for m, s in sorted(llm.items())])
+        return "\n".join(lines) + "\n"
+
+
+class AnswerService:
+    """Warm session pool with coalescing and bounded admission."""
+
+    def __init__(self, workers: int, queue_depth: int = SERVE_QUEUE_DEPTH):
+        from hackapizza_solution.agents.session import create_session
+
+        self.workers = workers
+        self.sessions: queue.Queue = queue.Queue()
+        for _ in range(workers):
+            self.sessions.put(create_session())
+        self._admission = threading.BoundedSemaphore(workers + queue_depth)
+        self._in_flight: dict[str, _Pending] = {}
+        self._lock = threading.Lock()
+        self._row_ids = itertools.count(1)
+        self.running = 0
+        self.metrics = Metrics()
+
+    def close(self):
+        """Release the sessions' threads (DAG pools); called when the server stops."""
+        while True:
+            try:
+                self.sessions.get_nowait().close()
+            except queue.Empty:
+                return
+
+    @staticmethod
+    def _key(question: str) -> str:
+        return re.sub(r"\s+", " ", question).strip().casefold()
+
+    def answer(self, question: str) -> dict | None:
+        """The answer record, or None when the server is saturated (caller returns 503)."""
+        key = self._key(question)
+        with self._lock:
+            pending = self._in_flight.get(key)
+            owner = pending is None
+            if owner:
+                if not self._admission.acquire(blocking=False):
+                    self.metrics.reject()
+                    return None
+                pending = self._in_flight[key] = _Pending()
+
+        if not owner:
+            start = time.perf_counter()
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            result = {**pending.result, "coalesced": True, "time_s": round(time.perf_counter() - start, 3)}
+            self.metrics.answer(result["path"], result["time_s"], result["ids"], coalesced=True)
+            return result
+
+        try:
+            pending.result = self._run(question)
+            return pending.result
+        except BaseException as e:
+            pending.error = e
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            self._admission.release()
+            pending.done.set()
+
+    def _run(self, question: str) -> dict:
+        from hackapizza_solution.main import _process_question
+
+        start = time.perf_counter()
+        session = self.sessions.get()
+        with self._lock:
+            self.running += 1
+        try:
+            record = _process_question(session, next(self._row_ids), question)
+        finally:
+            with self._lock:
+                self.running -= 1
+            self.sessions.put(session)
+        elapsed = time.perf_counter() - start
+        result = {
+            "ids": record["ids"],
+            "path": record.get("path", "agents"),
+            "time_s": round(elapsed, 3),
+            "coalesced": False,
+            "raw_response": record.get("raw_response", ""),
+            **{k: record[k] for k in ("zero_cause", "deadline_hit") if k in record},
+        }
+        self.metrics.answer(result["path"], elapsed, result["ids"], coalesced=False)
+        return result
+
+    def health(self) -> dict:
+        with self._lock:
+            return {
+                "status": "ok",
+                "sessions": self.workers,
+                "idle_sessions": self.sessions.qsize(),
+                "running": self.running,
+                "in_flight_questions": len(self._in_flight),
+            }
+
+    def gauges(self) -> dict[str, float]:
+        health = self.health()
+        return {
+            "sessions": health["sessions"],
+            "sessions_idle": health["idle_sessions"],
+            "questions_running": health["running"],
+            "questions_in_flight": health["in_flight_questions"],
+        }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "AnswerServer"
+
+    def do_GET(self):
+        service = self.server.service
+        if self.path == "/health":
+            self._send_json(200, service.health())
+        elif self.path == "/metrics":
+            self._send(200, service.metrics.render(service.gauges()).encode("utf-8"),
+                       "text/plain; version=0.0.4; charset=utf-8")
+        else:
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/answer":
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > SERVE_MAX_BODY_BYTES:
+            self._send_json(413, {"error": "Request body too large"})
+            return
+        try:
+            question = str(json.loads(self.rfile.read(length) or b"{}").get("question", "")).strip()
+        except (json.JSONDecodeError, AttributeError):
+            self._send_json(400, {"error": "Body must be a JSON object with a 'question' field"})
+            return
+        if not question:
+            self._send_json(400, {"error": "Missing 'question'"})
+            return
+        try:
+            result = self.server.service.answer(question)
+        except Exception as e:
+            self._send_json(500, {"error": f"{type(e).__name__}: {e}"})
+            return
+        if result is None:
+            self._send_json(503, {"error": "Server busy, retry later"}, headers={"Retry-After": "1"})
+            return
+        self._send_json(200, result)
+
+    def _send_json(self, status: int, body: dict, headers: dict | None = None):
+        self._send(status, json.dumps(body, ensure_ascii=False).encode("utf-8"), "application/json", headers)
+
+    def _send(self, status: int, data: bytes, content_type: str, headers: dict | None = None):
+        endpoint = self.path if self.path in ("/answer", "/health", "/metrics") else "other"
+        self.server.service.metrics.request(endpoint, status)
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+class AnswerServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Listen backlog: the default of 5 resets connections under a burst of clients
+    request_queue_size = 128
+
+    def __init__(self, host: str, port: int, service: AnswerService):
+        super().__init__((host, port), _Handler)
+        self.service = service
+
+
+def warm_caches():
+    """Load the shared data indexes before the first request."""
+    from hackapizza_solution import classification
+    from hackapizza_solution.entity_linker import build_linker
+    from hackapizza_solution.tools import distance_tools, menu_tools, output_tools, rag_tools
+    from hackapizza_solution.tools.memo import start_run
+
+    start_run()
+    menu_tools._load_menus()
+    output_tools._load_mapping()
+    distance_tools._load_distances()
+    build_linker()
+    if classification.is_enabled():
+        classification.get_index()
+    try:
+        rag_tools._get_embedder()
+        rag_tools._get_retriever()
+    except Exception as e:
+        print(f"  RAG clients not ready ({type(e).__name__}: {e}); they will be created on first use")
+
+
+def install_fake_llm(latency_s: float):
+    """Offline stand-ins (scripted LLM, hash embedder, in-memory vector store) for load tests."""
+    from hackapizza_solution.benchmarks.throughput import install_fakes
+
+    install_fakes(latency_s, strong_factor=2.0, embed_latency_s=0.05, search_latency_s=0.01, real_limits=False)
+
+
+def serve(host: str, port: int, workers: int, fake_llm: bool = False, llm_latency_s: float = 0.3):
+    start = time.perf_counter()
+    if fake_llm:
+        install_fake_llm(llm_latency_s)
+    warm_caches()
+    service = AnswerService(workers)
+    server = AnswerServer(host, port, service)
+    print(f"Serving on http://{host}:{server.server_address[1]} with {workers} warm sessions "
+          f"(queue depth {SERVE_QUEUE_DEPTH}{', fake LLM' if fake_llm else ''}), "
+          f"ready in {time.perf_counter() - start:.1f}s")
+    print("  POST /answer {\"question\": ...}   GET /health   GET /metrics")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down")
+    finally:
+        server.server_close()
+        service.close()
@@ -1,4 +1,8 @@
-"""Wraps question_classifier.py as a datapizza @tool for the orchestrator."""
+"""Wraps question_classifier.py as a datapizza @tool for the orchestrator.
+
+The output also lists the entities linked in the question (entity_linker.py), so
+the orchestrator can pass exact names to the agents instead of searching for them.
+"""
 
 import sys
 from pathlib import Path
@@ -6,14 +10,20 @@ from pathlib import Path
 from datapizza.tools import tool
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
-from question_classifier import classify, CATEGORIES
+from question_classifier import CATEGORIES
+from hackapizza_solution.classification import classify
+from hackapizza_solution.entity_linker import format_mentions, link_entities
+from hackapizza_solution.tools.memo import memoize
 
 
 @tool
+@memoize()
 def classify_question(question: str) -> str:
     """Classify a hackathon question into categories (A-L) with confidence scores.
-    Returns the categories, their descriptions, confidence scores, and required data sources."""
-    result = classify(question, use_embeddings=False)
+    Returns the categories, their descriptions, confidence scores, required data sources,
+    and the known entities (ingredients, techniques, dishes, restaurants, planets,
+    licenses, orders) mentioned in the question."""
+    result = classify(question)
     lines = []
     for code in sorted(result.categories, key=lambda c: -result.categories[c]):
         cat = CATEGORIES[code]
@@ -24,4 +34,8 @@ def classify_question(question: str) -> str:
         )
     composite = "COMPOSITE" if result.is_composite else "SINGLE"
     header = f"Classification: {composite}\nRelevant categories:"
-    return header + "\n" + "\n".join(lines)
+    output = header + "\n" + "\n".join(lines)
+    mentions = link_entities(question)
+    if mentions:
+        output += "\nEntities in question (exact names from the data):\n" + format_mentions(mentions)
+    return output
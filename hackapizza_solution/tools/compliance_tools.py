@@ -8,6 +8,7 @@ from datapizza.tools import tool
 import sys
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
 from hackapizza_solution.config import BLOGPOST_PCT_JSON
+from hackapizza_solution.tools.memo import memoize, resets_on_change
 
 _pct_cache: dict[str, dict[str, float]] | None = None
 
@@ -19,7 +20,14 @@ def _load_percentages() -> dict[str, dict[str, float]]:
     return _pct_cache
 
 
+@resets_on_change(BLOGPOST_PCT_JSON)
+def _reset_percentages():
+    global _pct_cache
+    _pct_cache = None
+
+
 @tool
+@memoize(depends_on=(BLOGPOST_PCT_JSON,))
 def get_ingredient_percentages(dish_name: str) -> str:
     """Get the ingredient percentages for a dish as reported in blogpost reviews.
     Only available for dishes reviewed in the two blogposts.
@@ -40,6 +48,7 @@ def get_ingredient_percentages(dish_name: str) -> str:
 
 
 @tool
+@memoize()
 def get_substance_limits(substance: str) -> str:
     """Look up the legal limits for a regulated substance from the Codice Galattico.
     Returns a description of how to check compliance. The actual coefficients and
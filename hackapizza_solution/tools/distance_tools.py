@@ -8,6 +8,7 @@ from datapizza.tools import tool
 import sys
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
 from hackapizza_solution.config import DISTANZE_CSV
+from hackapizza_solution.tools.memo import memoize, resets_on_change
 
 _distances_cache: dict[str, dict[str, float]] | None = None
 
@@ -26,7 +27,14 @@ def _load_distances() -> dict[str, dict[str, float]]:
     return _distances_cache
 
 
+@resets_on_change(DISTANZE_CSV)
+def _reset_distances():
+    global _distances_cache
+    _distances_cache = None
+
+
 @tool
+@memoize(depends_on=(DISTANZE_CSV,))
 def get_planets_within_radius(origin: str, radius: float) -> str:
     """Get all planets within a given radius (in light-years) from the origin planet.
     Includes the origin planet itself (distance 0)."""
@@ -46,6 +54,7 @@ def get_planets_within_radius(origin: str, radius: float) -> str:
 
 
 @tool
+@memoize(depends_on=(DISTANZE_CSV,))
 def get_distance(planet_a: str, planet_b: str) -> str:
     """Get the distance in light-years between two planets."""
     distances = _load_distances()
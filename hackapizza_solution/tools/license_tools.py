@@ -8,6 +8,7 @@ from datapizza.tools import tool
 import sys
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
 from hackapizza_solution.config import MENUS_JSON
+from hackapizza_solution.tools.memo import memoize, resets_on_change
 
 _menus_cache: list[dict] | None = None
 
@@ -19,7 +20,14 @@ def _load_menus() -> list[dict]:
     return _menus_cache
 
 
+@resets_on_change(MENUS_JSON)
+def _reset_menus():
+    global _menus_cache
+    _menus_cache = None
+
+
 @tool
+@memoize(depends_on=(MENUS_JSON,))
 def get_chefs_with_license(license_type: str, min_grade: int) -> str:
     """Find all chefs who have at least the specified grade for a license type.
     License codes: P=Psionica, t=Temporale, G=Gravitazionale, e+=Antimateria,
@@ -42,6 +50,7 @@ def get_chefs_with_license(license_type: str, min_grade: int) -> str:
 
 
 @tool
+@memoize()
 def get_required_licenses_for_technique(technique: str) -> str:
     """Look up which licenses are required to use a specific cooking technique.
     This information comes from the Codice Galattico and Manuale di Cucina.
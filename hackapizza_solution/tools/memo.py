@@ -0,0 +1,233 @@
+"""Run-scoped memoization for @tool functions.
+
+Agents call the same tools with the same arguments many times in a batch
+(get_planets_within_radius('Namecc', 100), query_codice_galattico(...), ...).
+@memoize sits under @tool and:
+
+- keys calls by the normalized arguments: strings are stripped and whitespace
+  collapsed before the call (so the tool sees the same normalized value), and
+  case-folded in the key for tools declared case_insensitive; integral floats
+  equal their ints
+- records the signature (size, mtime) of the data files the tool reads; an entry
+  is dropped when one of them changes, and the loader caches of a changed file
+  (registered with resets_on_change, e.g. menu_tools._menus_cache) are reset so
+  the tool recomputes from the new contents
+- coalesces concurrent identical calls: workers asking for a key that is being
+  computed wait for that result instead of computing it again; when that call
+  fails, they compute it themselves rather than raise another question's error
+- counts per-tool hits, misses, coalesced calls and the time saved
+
+The cache lives for one run (start_run() clears it) and is bounded by
+TOOL_MEMO_MAX_ENTRIES (least recently used entries are evicted). warm() calls a
+memoized tool by name, so a pre-pass can fill the cache before agents need it.
+"""
+
+import functools
+import inspect
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+from hackapizza_solution.config import TOOL_MEMO_ENABLED, TOOL_MEMO_MAX_ENTRIES
+from hackapizza_solution.deadline import note_tool_result
+from hackapizza_solution.tracing import span
+
+
+class _Pending:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.failed = False
+        self.elapsed = 0.0
+
+
+_lock = threading.Lock()
+_entries: OrderedDict[tuple, tuple[object, tuple, float]] = OrderedDict()
+_in_flight: dict[tuple, _Pending] = {}
+_stats: dict[str, dict[str, float]] = {}
+_registry: dict[str, object] = {}
+_loader_resets: dict[Path, list] = {}
+_seen_signatures: dict[Path, object] = {}
+_enabled = TOOL_MEMO_ENABLED
+
+
+def set_enabled(enabled: bool):
+    global _enabled
+    _enabled = enabled
+
+
+def start_run():
+    """Start a new memoization scope (drops all entries and statistics)."""
+    with _lock:
+        _entries.clear()
+        _stats.clear()
+
+
+def _normalize_value(value):
+    if isinstance(value, str):
+        return re.sub(r"\s+", " ", value).strip()
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _file_signature(paths: tuple[Path, ...]) -> tuple:
+    signature = []
+    for path in paths:
+        try:
+            st = path.stat()
+            signature.append((st.st_size, st.st_mtime_ns))
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+
+def resets_on_change(*paths: Path):
+    """Register a function that drops a module-level loader cache derived from these files;
+    it is called when a memoized tool sees one of them change."""
+
+    def decorator(reset):
+        for path in paths:
+            _loader_resets.setdefault(path, []).append(reset)
+        return reset
+
+    return decorator
+
+
+def _reset_changed_loaders(paths: tuple[Path, ...], data_version: tuple):
+    """Reset the loader caches of the files whose signature changed since the last call."""
+    with _lock:
+        changed = [
+            path for path, file_signature in zip(paths, data_version)
+            if _seen_signatures.setdefault(path, file_signature) != file_signature
+        ]
+        for path, file_signature in zip(paths, data_version):
+            _seen_signatures[path] = file_signature
+    for path in changed:
+        for reset in _loader_resets.get(path, ()):
+            reset()
+
+
+def _count(name: str, key: str, amount: float = 1):
+    stats = _stats.setdefault(name, {"calls": 0, "hits": 0, "coalesced": 0, "misses": 0, "saved_s": 0.0})
+    stats[key] += amount
+
+
+def memoize(depends_on: tuple[Path, ...] = (), case_insensitive: bool = False):
+    """Memoize a tool function for the current run. depends_on lists the data files
+    the result is derived from; case_insensitive folds string arguments in the key."""
+
+    def decorator(fn):
+        signature = inspect.signature(fn)
+        name = fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span("tool", name) as attrs:
+                result = memoized_call(attrs, args, kwargs)
+            # Kept per question, for the partial answer when its deadline hits
+            note_tool_result(name, result)
+            return result
+
+        def memoized_call(attrs: dict, args: tuple, kwargs: dict):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = {k: _normalize_value(v) for k, v in bound.arguments.items()}
+            if not _enabled:
+                attrs["memo"] = "off"
+                return fn(**arguments)
+
+            key_args = tuple(
+                (k, v.casefold() if case_insensitive and isinstance(v, str) else v)
+                for k, v in arguments.items()
+            )
+            key = (name, key_args)
+            data_version = _file_signature(depends_on)
+            _reset_changed_loaders(depends_on, data_version)
+
+            with _lock:
+                _count(name, "calls")
+            while True:
+                with _lock:
+                    entry = _entries.get(key)
+                    if entry is not None and entry[1] == data_version:
+                        _entries.move_to_end(key)
+                        _count(name, "hits")
+                        _count(name, "saved_s", entry[2])
+                        attrs["memo"] = "hit"
+                        return entry[0]
+                    if entry is not None:
+                        del _entries[key]
+                    pending = _in_flight.get(key)
+                    owner = pending is None
+                    if owner:
+                        pending = _in_flight[key] = _Pending()
+                if owner:
+                    break
+                pending.done.wait()
+                if pending.failed:
+                    # The owner's error belongs to its own question (its deadline, an
+                    # interrupt): compute the value again, as the owner if nobody else is
+                    continue
+                with _lock:
+                    _count(name, "coalesced")
+                    _count(name, "saved_s", pending.elapsed)
+                attrs["memo"] = "coalesced"
+                return pending.result
+
+            attrs["memo"] = "miss"
+            start = time.perf_counter()
+            try:
+                result = fn(**arguments)
+            except BaseException:
+                pending.failed = True
+                raise
+            else:
+                pending.result = result
+                pending.elapsed = elapsed = time.perf_counter() - start
+                with _lock:
+                    _count(name, "misses")
+                    _entries[key] = (result, data_version, elapsed)
+                    while len(_entries) > TOOL_MEMO_MAX_ENTRIES:
+                        _entries.popitem(last=False)
+                return result
+            finally:
+                with _lock:
+                    _in_flight.pop(key, None)
+                pending.done.set()
+
+        wrapper.memoized = True
+        _registry[name] = wrapper
+        return wrapper
+
+    return decorator
+
+
+def warm(tool_name: str, *args, **kwargs):
+    """Call a memoized tool by name to populate the cache (e.g. batch prefetch)."""
+    return _registry[tool_name](*args, **kwargs)
+
+
+def memo_stats() -> dict[str, dict[str, float]]:
+    with _lock:
+        return {name: dict(stats) for name, stats in _stats.items()}
+
+
+def print_memo_summary():
+    stats = memo_stats()
+    if not stats:
+        return
+    print("\n--- TOOL MEMOIZATION ---")
+    for name, s in sorted(stats.items(), key=lambda kv: -kv[1]["calls"]):
+        reused = s["hits"] + s["coalesced"]
+        rate = reused / s["calls"] if s["calls"] else 0.0
+        print(f"  {name}: {int(s['calls'])} calls, {int(s['hits'])} hits, {int(s['coalesced'])} coalesced "
+              f"({rate:.0%}), saved {s['saved_s']:.2f}s")
+    total_calls = sum(s["calls"] for s in stats.values())
+    total_reused = sum(s["hits"] + s["coalesced"] for s in stats.values())
+    total_saved = sum(s["saved_s"] for s in stats.values())
+    print(f"  Total: {int(total_reused)}/{int(total_calls)} calls reused, {total_saved:.2f}s saved")
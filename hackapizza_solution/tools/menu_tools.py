@@ -8,6 +8,7 @@ from datapizza.tools import tool
 import sys
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
 from hackapizza_solution.config import MENUS_JSON
+from hackapizza_solution.tools.memo import memoize, resets_on_change
 
 _menus_cache: list[dict] | None = None
 
@@ -27,6 +28,12 @@ def _load_menus() -> list[dict]:
     return _menus_cache
 
 
+@resets_on_change(MENUS_JSON)
+def _reset_menus():
+    global _menus_cache
+    _menus_cache = None
+
+
 def _expand_ingredient_search_variants(search: str) -> set[str]:
     """Return search string and all spelling-equivalent variants for matching."""
     variants = {search.lower()}
@@ -38,7 +45,22 @@ def _expand_ingredient_search_variants(search: str) -> set[str]:
     return variants
 
 
+def _has_ingredient(dish: dict, search_variants: set[str]) -> bool:
+    """Case-insensitive partial match (either way round) of a dish ingredient against the variants."""
+    return any(
+        any(sv in i for sv in search_variants) or any(i in sv for sv in search_variants)
+        for i in (ing_item.lower() for ing_item in dish["ingredients"])
+    )
+
+
+def _has_technique(dish: dict, technique: str) -> bool:
+    """Case-insensitive partial match of the technique in the dish's techniques."""
+    technique_lower = technique.lower()
+    return any(technique_lower in tech.lower() for tech in dish["techniques"])
+
+
 @tool
+@memoize(depends_on=(MENUS_JSON,), case_insensitive=True)
 def search_dishes_by_ingredient(ingredient: str) -> str:
     """Find all dishes that contain a specific ingredient. Case-insensitive partial match.
     Uses INGREDIENT_SPELLING_EQUIVALENTS for known spelling variants (e.g. Magikarp/Magicarp)."""
@@ -47,11 +69,7 @@ def search_dishes_by_ingredient(ingredient: str) -> str:
     search_variants = _expand_ingredient_search_variants(ingredient)
     for menu in menus:
         for dish in menu["dishes"]:
-            ing_lower = [ing_item.lower() for ing_item in dish["ingredients"]]
-            if any(
-                any(sv in i for sv in search_variants) or any(i in sv for sv in search_variants)
-                for i in ing_lower
-            ):
+            if _has_ingredient(dish, search_variants):
                 results.append(
                     f"- {dish['name']} (restaurant: {menu['restaurant']}, planet: {menu['planet']})"
                 )
@@ -61,14 +79,14 @@ def search_dishes_by_ingredient(ingredient: str) -> str:
 
 
 @tool
+@memoize(depends_on=(MENUS_JSON,), case_insensitive=True)
 def search_dishes_by_technique(technique: str) -> str:
     """Find all dishes prepared with a specific technique. Case-insensitive partial match."""
     menus = _load_menus()
     results = []
-    technique_lower = technique.lower()
     for menu in menus:
         for dish in menu["dishes"]:
-            if any(technique_lower in tech.lower() for tech in dish["techniques"]):
+            if _has_technique(dish, technique):
                 results.append(
                     f"- {dish['name']} (restaurant: {menu['restaurant']}, planet: {menu['planet']})"
                 )
@@ -78,6 +96,7 @@ def search_dishes_by_technique(technique: str) -> str:
 
 
 @tool
+@memoize(depends_on=(MENUS_JSON,), case_insensitive=True)
 def filter_dishes_by_restaurant(restaurant: str) -> str:
     """Get all dishes from a specific restaurant. Case-insensitive partial match."""
     menus = _load_menus()
@@ -98,6 +117,7 @@ def filter_dishes_by_restaurant(restaurant: str) -> str:
 
 
 @tool
+@memoize(depends_on=(MENUS_JSON,), case_insensitive=True)
 def filter_dishes_by_planet(planet: str) -> str:
     """Get all dishes served on a specific planet. Case-insensitive match."""
     menus = _load_menus()
@@ -115,6 +135,7 @@ def filter_dishes_by_planet(planet: str) -> str:
 
 
 @tool
+@memoize(depends_on=(MENUS_JSON,), case_insensitive=True)
 def get_chef_info(restaurant: str) -> str:
     """Get chef name and licenses for a restaurant. Case-insensitive partial match."""
     menus = _load_menus()
@@ -132,6 +153,7 @@ def get_chef_info(restaurant: str) -> str:
 
 
 @tool
+@memoize(depends_on=(MENUS_JSON,))
 def get_all_dishes_with_details() -> str:
     """Get a complete dump of all dishes with ingredients and techniques.
     Use only for complex cross-cutting queries that need full data."""
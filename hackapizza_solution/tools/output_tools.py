@@ -8,6 +8,7 @@ from datapizza.tools import tool
 import sys
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
 from hackapizza_solution.config import DISH_MAPPING_JSON, MENUS_JSON
+from hackapizza_solution.tools.memo import memoize, resets_on_change
 
 _mapping_cache: dict[str, int] | None = None
 _menus_cache: list[dict] | None = None
@@ -27,6 +28,13 @@ def _load_menus() -> list[dict]:
     return _menus_cache or []
 
 
+@resets_on_change(DISH_MAPPING_JSON, MENUS_JSON)
+def _reset_caches():
+    global _mapping_cache, _menus_cache
+    _mapping_cache = None
+    _menus_cache = None
+
+
 def _find_dishes_by_ingredient_or_technique(search_str: str) -> list[str]:
     """Fallback: find dish names where search_str matches an ingredient or technique.
     Handles cases like 'Ravioli al Vaporeon in Brodo' matching ingredient 'Ravioli al Vaporeon'."""
@@ -56,6 +64,7 @@ def _find_dishes_by_ingredient_or_technique(search_str: str) -> list[str]:
 
 
 @tool
+@memoize(depends_on=(DISH_MAPPING_JSON, MENUS_JSON))
 def map_dishes_to_ids(dish_names: str) -> str:
     """Convert a comma-separated list of dish names to their numeric IDs.
     Uses dish_mapping.json. Returns ONLY the IDs as a comma-separated string.
@@ -1,10 +1,13 @@
-"""RAG query tool: embed a question and retrieve relevant chunks from Qdrant."""
+"""RAG query tool: embed a question and retrieve relevant chunks from Qdrant.
 
-import os
+The embedder and the Qdrant client are process-wide singletons shared by all
+agents and batch workers, so each keeps a single connection pool.
+"""
+
+import threading
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-from datapizza.embedders.cohere import CohereEmbedder
-from datapizza.vectorstores.qdrant import QdrantVectorstore
 from datapizza.tools import tool
 from dotenv import load_dotenv
 
@@ -14,44 +17,63 @@ from hackapizza_solution.config import (
     COHERE_API_KEY, COHERE_ENDPOINT, QDRANT_HOST, QDRANT_PORT,
     EMBED_MODEL, COLLECTION_CODICE, COLLECTION_MANUALE, COLLECTION_BLOG,
 )
+from hackapizza_solution import deadline
+from hackapizza_solution.tools.memo import memoize
+from hackapizza_solution.tracing import span
+
+if TYPE_CHECKING:
+    from datapizza.embedders.cohere import CohereEmbedder
+    from datapizza.vectorstores.qdrant import QdrantVectorstore
 
 load_dotenv()
 
 _embedder = None
 _retriever = None
+_clients_lock = threading.Lock()
 
 
-def _get_embedder() -> CohereEmbedder:
+def _get_embedder() -> "CohereEmbedder":
     global _embedder
-    if _embedder is None:
-        _embedder = CohereEmbedder(
-            api_key=COHERE_API_KEY,
-            base_url=COHERE_ENDPOINT,
-            model_name=EMBED_MODEL,
-            input_type="search_query",
-        )
+    # Imported on first use: the Cohere and Qdrant SDKs are slow to import and only
+    # the RAG-backed agents need them
+    from datapizza.embedders.cohere import CohereEmbedder
+
+    with _clients_lock:
+        if _embedder is None:
+            _embedder = CohereEmbedder(
+                api_key=COHERE_API_KEY,
+                base_url=COHERE_ENDPOINT,
+                model_name=EMBED_MODEL,
+                input_type="search_query",
+            )
     return _embedder
 
 
-def _get_retriever() -> QdrantVectorstore:
+def _get_retriever() -> "QdrantVectorstore":
     global _retriever
-    if _retriever is None:
-        _retriever = QdrantVectorstore(host=QDRANT_HOST, port=QDRANT_PORT)
+    from datapizza.vectorstores.qdrant import QdrantVectorstore
+
+    with _clients_lock:
+        if _retriever is None:
+            _retriever = QdrantVectorstore(host=QDRANT_HOST, port=QDRANT_PORT)
     return _retriever
 
 
 def _rag_query(query: str, collection_name: str, k: int = 5) -> str:
     """Embed query and retrieve top-k chunks from a Qdrant collection."""
+    deadline.check(f"RAG query ({collection_name})")
     embedder = _get_embedder()
     retriever = _get_retriever()
 
-    query_vector = embedder.run(text=query)
-    results = retriever.search(
-        collection_name=collection_name,
-        query_vector=query_vector,
-        vector_name="embedding_vector",
-        k=k,
-    )
+    with span("rag", "embed"):
+        query_vector = embedder.run(text=query)
+    with span("rag", "search", collection=collection_name, k=k):
+        results = retriever.search(
+            collection_name=collection_name,
+            query_vector=query_vector,
+            vector_name="embedding_vector",
+            k=k,
+        )
     if not results:
         return f"No result found in collection '{collection_name}' for: {query}"
 
@@ -62,6 +84,7 @@ def _rag_query(query: str, collection_name: str, k: int = 5) -> str:
 
 
 @tool
+@memoize()
 def query_codice_galattico(query: str) -> str:
     """Search the Codice Galattico for information about regulations, limits, licenses,
     protected orders, and legal requirements for intergalactic dining."""
@@ -69,6 +92,7 @@ def query_codice_galattico(query: str) -> str:
 
 
 @tool
+@memoize()
 def query_manuale_cucina(query: str) -> str:
     """Search the Manuale di Cucina di Sirius Cosmo for information about
     cooking techniques, technique categories, license types and levels,
@@ -77,6 +101,7 @@ def query_manuale_cucina(query: str) -> str:
 
 
 @tool
+@memoize()
 def query_blogposts(query: str) -> str:
     """Search the blogpost reviews for information about specific dishes,
     ingredient percentages, and restaurant reviews."""
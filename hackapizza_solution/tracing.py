@@ -0,0 +1,228 @@
+"""Per-question tracing of agent runs, LLM calls, tool calls and RAG phases.
+
+A trace is opened per question (start_trace) and held in a context variable, so
+every span() opened underneath it, in the same thread or in a thread started with
+run_in_context(), is attached to that question. Span kinds:
+
+- question   the whole question
+- agent      one Agent.run or a_run (orchestrator and sub-agents, see instrument_agent)
+- llm        one client call (model, cache hit, prompt/completion tokens)
+- llm_wait   time spent waiting on the scheduler's rate limits and backoff
+- llm_hedge  a duplicate request sent for a slow LLM call, until one attempt wins (see llm/hedging.py)
+- tool       one @tool call (memo hit/miss/coalesced, see tools/memo.py)
+- rag        _rag_query phases (embed, search)
+- cascade    one fast-then-strong agent run (confidence, escalation reason, see agents/cascade.py)
+- classify   one embed request of the hybrid classifier (see classification.py)
+- answer_cache  one answer cache lookup (exact, similar or miss, see answer_cache.py)
+
+Each finished trace is written to TRACE_DIR/q<row_id>.json in Chrome trace event
+format (open in chrome://tracing or Perfetto); span and parent ids are kept in the
+event args in OpenTelemetry style. print_trace_summary() reports p50/p95 per span
+kind, per agent/tool name and per question category.
+
+When tracing is disabled (the default) span() costs one context-variable lookup.
+"""
+
+import contextvars
+import json
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from hackapizza_solution.config import TRACE_DIR, TRACE_ENABLED
+
+_current_trace: contextvars.ContextVar["Trace | None"] = contextvars.ContextVar("trace", default=None)
+_current_span: contextvars.ContextVar[str | None] = contextvars.ContextVar("span", default=None)
+
+_enabled = TRACE_ENABLED
+_finished: list[dict] = []
+_finished_lock = threading.Lock()
+
+
+def set_enabled(enabled: bool):
+    global _enabled
+    _enabled = enabled
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+class Trace:
+    def __init__(self, row_id, question: str, categories: list[str]):
+        self.trace_id = uuid.uuid4().hex
+        self.row_id = row_id
+        self.question = question
+        self.categories = categories
+        self.start_ns = time.perf_counter_ns()
+        self.spans: list[dict] = []
+        self._lock = threading.Lock()
+
+    def add(self, span: dict):
+        with self._lock:
+            self.spans.append(span)
+
+    def breakdown(self) -> dict[str, float]:
+        """Total seconds per span kind (agent spans include the LLM and tool spans inside them)."""
+        totals: dict[str, float] = {}
+        for s in self.spans:
+            totals[s["kind"]] = totals.get(s["kind"], 0.0) + s["dur_ns"] / 1e9
+        return {k: round(v, 3) for k, v in totals.items()}
+
+    def to_chrome(self) -> dict:
+        events = [
+            {
+                "name": s["name"],
+                "cat": s["kind"],
+                "ph": "X",
+                "ts": (s["start_ns"] - self.start_ns) / 1000,
+                "dur": s["dur_ns"] / 1000,
+                "pid": 1,
+                "tid": s["thread"],
+                "args": {"span_id": s["span_id"], "parent_id": s["parent_id"], **s["attrs"]},
+            }
+            for s in self.spans
+        ]
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {
+                "trace_id": self.trace_id,
+                "row_id": self.row_id,
+                "question": self.question,
+                "categories": self.categories,
+            },
+        }
+
+
+@contextmanager
+def span(kind: str, name: str, **attrs):
+    """Time a block as a span of the current trace. Yields a dict the block can add
+    attributes to (e.g. token counts). No-op outside a trace."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield attrs
+        return
+    span_id = uuid.uuid4().hex[:16]
+    parent_id = _current_span.get()
+    token = _current_span.set(span_id)
+    start = time.perf_counter_ns()
+    try:
+        yield attrs
+    except BaseException as e:
+        attrs["error"] = f"{type(e).__name__}: {e}"[:200]
+        raise
+    finally:
+        _current_span.reset(token)
+        trace.add({
+            "kind": kind,
+            "name": name,
+            "span_id": span_id,
+            "parent_id": parent_id,
+            "start_ns": start,
+            "dur_ns": time.perf_counter_ns() - start,
+            "thread": threading.get_ident(),
+            "attrs": attrs,
+        })
+
+
+@contextmanager
+def start_trace(row_id, question: str, categories: list[str] | None = None):
+    """Open a trace for one question (no-op when tracing is disabled). Yields the Trace or None."""
+    if not _enabled:
+        yield None
+        return
+    trace = Trace(row_id, question, categories or [])
+    token = _current_trace.set(trace)
+    try:
+        with span("question", f"q{row_id}", categories=",".join(trace.categories)):
+            yield trace
+    finally:
+        _current_trace.reset(token)
+        _finish(trace)
+
+
+def _finish(trace: Trace):
+    TRACE_DIR.mkdir(parents=True, exist_ok=True)
+    path = TRACE_DIR / f"q{trace.row_id}.json"
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(trace.to_chrome(), ensure_ascii=False), encoding="utf-8")
+    tmp.replace(path)
+    with _finished_lock:
+        _finished.append({
+            "categories": trace.categories,
+            "spans": [(s["kind"], s["name"], s["dur_ns"] / 1e9) for s in trace.spans],
+        })
+
+
+def collect_finished(clear: bool = False) -> list[dict]:
+    """Summaries of the traces finished so far: {"categories", "spans": [(kind, name, seconds)]}."""
+    with _finished_lock:
+        finished = list(_finished)
+        if clear:
+            _finished.clear()
+    return finished
+
+
+def run_in_context(fn):
+    """Wrap fn so that, when run on another thread (e.g. a pool), its spans go to the
+    caller's trace."""
+    ctx = contextvars.copy_context()
+    return lambda *args, **kwargs: ctx.run(fn, *args, **kwargs)
+
+
+def instrument_agent(agent):
+    """Record every run (run or a_run) of this agent instance as an "agent" span."""
+    run = agent.run
+    a_run = agent.a_run
+    name = getattr(agent, "name", type(agent).__name__)
+
+    def traced_run(*args, **kwargs):
+        with span("agent", name):
+            return run(*args, **kwargs)
+
+    async def traced_a_run(*args, **kwargs):
+        with span("agent", name):
+            return await a_run(*args, **kwargs)
+
+    agent.run = traced_run
+    agent.a_run = traced_a_run
+    return agent
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _print_table(title: str, groups: dict[str, list[float]]):
+    print(f"  {title}:")
+    for key, values in sorted(groups.items(), key=lambda kv: -sum(kv[1])):
+        print(f"    {key:<40} n={len(values):<5} p50={_percentile(values, 50):7.2f}s "
+              f"p95={_percentile(values, 95):7.2f}s total={sum(values):8.1f}s")
+
+
+def print_trace_summary():
+    finished = collect_finished()
+    if not finished:
+        return
+    by_kind: dict[str, list[float]] = {}
+    by_name: dict[str, list[float]] = {}
+    by_category: dict[str, list[float]] = {}
+    for trace in finished:
+        for kind, name, dur in trace["spans"]:
+            by_kind.setdefault(kind, []).append(dur)
+            if kind in ("agent", "tool", "llm", "rag"):
+                by_name.setdefault(f"{kind}:{name}", []).append(dur)
+            if kind == "question":
+                category = "+".join(sorted(trace["categories"])) or "?"
+                by_category.setdefault(category, []).append(dur)
+    print(f"\n--- TRACING ({len(finished)} questions, traces in {TRACE_DIR}) ---")
+    _print_table("Per span kind", by_kind)
+    _print_table("Per agent / tool / model", by_name)
+    _print_table("Per question category", by_category)
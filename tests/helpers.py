@@ -0,0 +1,48 @@
+"""Scripted datapizza clients for agent tests (no API calls)."""
+
+from datapizza.clients import MockClient
+from datapizza.core.clients import ClientResponse
+from datapizza.memory.memory import Memory
+from datapizza.type import FunctionCallBlock, FunctionCallResultBlock, TextBlock
+
+
+def _input_text(input) -> str:
+    if isinstance(input, str):
+        return input
+    return next((b.content for b in input or [] if isinstance(b, TextBlock)), "")
+
+
+class ReplyClient(MockClient):
+    """Answers every request with the same text and records the inputs it received."""
+
+    def __init__(self, reply: str):
+        super().__init__()
+        self.reply = reply
+        self.inputs: list[str] = []
+
+    def _invoke(self, input, tools=None, memory=None, **kwargs):
+        self.inputs.append(_input_text(input))
+        return ClientResponse(content=[TextBlock(content=self.reply)])
+
+    async def _a_invoke(self, input, tools=None, memory=None, **kwargs):
+        return self._invoke(input, tools=tools, memory=memory, **kwargs)
+
+
+class DelegatingClient(MockClient):
+    """Orchestrator client: calls the tool named `target` with the task, then answers with its result."""
+
+    def __init__(self, target: str):
+        super().__init__()
+        self.target = target
+
+    def _invoke(self, input, tools=None, memory=None, **kwargs):
+        last = memory[-1].blocks[-1] if isinstance(memory, Memory) and len(memory) else None
+        if isinstance(last, FunctionCallResultBlock):
+            return ClientResponse(content=[TextBlock(content=last.result)])
+        tool = next(t for t in tools or [] if t.name == self.target)
+        return ClientResponse(content=[
+            FunctionCallBlock(id="call-1", arguments={"input_task": _input_text(input)}, name=tool.name, tool=tool)
+        ])
+
+    async def _a_invoke(self, input, tools=None, memory=None, **kwargs):
+        return self._invoke(input, tools=tools, memory=memory, **kwargs)
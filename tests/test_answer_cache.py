@@ -0,0 +1,82 @@
+import json
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from hackapizza_solution import answer_cache, classification, entity_linker
+from hackapizza_solution.answer_cache import AnswerCache, signature
+from hackapizza_solution.benchmarks.fakes import HashEmbedder
+from hackapizza_solution.entity_linker import EntityLinker
+
+data_version = answer_cache.data_version
+
+
+@pytest.fixture(autouse=True)
+def offline(monkeypatch):
+    """Linker on a small vocabulary, a fixed classification and hashed embeddings."""
+    monkeypatch.setattr(entity_linker, "_linker", EntityLinker({
+        "ingredient": {"Carne di Drago", "Polvere di Stelle"}, "planet": {"Pandora", "Asgard"},
+    }))
+    monkeypatch.setattr(classification, "classify", lambda question: SimpleNamespace(categories={"E": 1.0}))
+    embedder = HashEmbedder(dim=256)
+    monkeypatch.setattr(classification, "embed_texts",
+                        lambda texts: np.asarray([embedder.embed(t) for t in texts], dtype=np.float32))
+    monkeypatch.setattr(answer_cache, "data_version", lambda: "v1")
+
+
+@pytest.mark.parametrize("question, other", [
+    ("Quali piatti sono entro 3 anni luce da Pandora?", "Quali piatti sono entro 5 anni luce da Pandora?"),
+    ("Quali piatti sono preparati senza Carne di Drago?", "Quali piatti sono preparati con Carne di Drago?"),
+    ("Quali piatti usano la Carne di Drago?", "Quali piatti usano la Polvere di Stelle?"),
+    ("Piatti di Pandora con Carne di Drago", "Piatti di Asgard con Carne di Drago"),
+])
+def test_signatures_tell_apart_questions_with_different_answers(question, other):
+    assert signature(question) != signature(other)
+
+
+def test_paraphrases_share_the_signature():
+    assert signature("Quali piatti usano la Carne di Drago?") == signature("Quali sono i piatti che usano carne di drago")
+
+
+def test_exact_and_paraphrased_lookups(tmp_path):
+    cache = AnswerCache(tmp_path / "answers.sqlite", min_similarity=0.8)
+    cache.store("Quali piatti sono entro 3 anni luce da Pandora?", "4,7")
+    exact = cache.lookup("  quali piatti sono ENTRO 3 anni luce da pandora ")
+    assert (exact.ids, exact.match) == ("4,7", "exact")
+    similar = cache.lookup("Quali sono i piatti entro 3 anni luce da Pandora?")
+    assert (similar.ids, similar.match) == ("4,7", "similar")
+    assert similar.similarity >= 0.8
+    # Near-identical text and embedding, different number: never a hit
+    assert cache.lookup("Quali piatti sono entro 5 anni luce da Pandora?") is None
+    assert cache.stats["exact"] == cache.stats["similar"] == cache.stats["misses"] == 1
+
+
+def test_empty_answers_are_not_stored(tmp_path):
+    cache = AnswerCache(tmp_path / "answers.sqlite")
+    cache.store("Quali piatti usano la Carne di Drago?", "0")
+    assert cache.lookup("Quali piatti usano la Carne di Drago?") is None
+    assert cache.stats["stores"] == 0
+
+
+def test_entries_of_another_data_version_are_dropped(tmp_path, monkeypatch):
+    AnswerCache(tmp_path / "answers.sqlite").store("Quali piatti usano la Carne di Drago?", "1,2")
+    monkeypatch.setattr(answer_cache, "data_version", lambda: "v2")
+    cache = AnswerCache(tmp_path / "answers.sqlite")
+    assert cache.lookup("Quali piatti usano la Carne di Drago?") is None
+    assert cache.stats["invalidated"] == 1
+
+
+def test_the_data_version_follows_re_ingested_content(tmp_path, monkeypatch):
+    manifest = tmp_path / "rag_manifest.json"
+    monkeypatch.setattr(answer_cache, "_DATA_FILES", (tmp_path / "menus.json", manifest))
+    monkeypatch.setattr(answer_cache, "_collection_sizes", lambda: "codice=10,manuale=20,blog=30")
+    (tmp_path / "menus.json").write_text("[]", encoding="utf-8")
+    manifest.write_text(json.dumps({"blog": {"sources": "aaaa", "files": 2}}), encoding="utf-8")
+    before = data_version()
+    # Same point counts, different contents
+    manifest.write_text(json.dumps({"blog": {"sources": "bbbb", "files": 2}}), encoding="utf-8")
+    assert data_version() != before
+
+    monkeypatch.setattr(answer_cache, "_collection_sizes", lambda: None)
+    assert data_version() is None
@@ -0,0 +1,45 @@
+from datapizza.type import FunctionCallBlock, TextBlock
+
+from hackapizza_solution.benchmarks.fakes import HashEmbedder, InMemoryVectorstore, ScriptedLLMClient
+from hackapizza_solution.config import MODEL_FAST
+from hackapizza_solution.llm.client import response_tokens
+from hackapizza_solution.prompts import formatter
+
+
+def test_hash_embedder_is_deterministic_and_unit_length():
+    embedder = HashEmbedder(dim=64)
+    vector = embedder.embed("Carne di Drago e Polvere di Stelle")
+
+    assert vector == HashEmbedder(dim=64).embed("carne di drago e polvere di stelle")
+    assert abs(sum(v * v for v in vector) - 1.0) < 1e-5
+    assert embedder.embed("") == [0.0] * 64
+
+
+def test_vectorstore_returns_the_closest_text_first():
+    embedder = HashEmbedder(dim=256)
+    store = InMemoryVectorstore()
+    texts = ["licenza psionica di livello tre", "distanza tra Namecc e Pandora", "cottura a vapore sonico"]
+    store.add_texts("manuale", texts[:2], embedder)
+    store.add_texts("manuale", texts[2:], embedder)
+
+    results = store.search("manuale", embedder.embed("distanza Namecc Pandora"), k=2)
+
+    assert [chunk.text for chunk in results][0] == texts[1]
+    assert len(results) == 2
+    assert store.collection_sizes() == {"manuale": 3}
+    assert store.search("codice", embedder.embed("distanza")) == []
+
+
+def test_scripted_client_replays_the_plan_with_token_usage():
+    client = ScriptedLLMClient(MODEL_FAST, latency_s=0.0)
+    map_tool = type("MapTool", (), {"name": "map_dishes_to_ids", "properties": {"dish_names": {}}})()
+
+    call = client._invoke(input="Piatti trovati:\n- Sinfonia Cosmica", tools=[map_tool],
+                          system_prompt=formatter.SYSTEM_PROMPT)
+    block, = call.content
+    assert isinstance(block, FunctionCallBlock)
+    assert block.arguments == {"dish_names": "Sinfonia Cosmica"}
+    assert all(tokens > 0 for tokens in response_tokens(call))
+
+    nothing = client._invoke(input="Piatti trovati:\nNessun piatto trovato.", system_prompt=formatter.SYSTEM_PROMPT)
+    assert [b.content for b in nothing.content if isinstance(b, TextBlock)] == ["0"]
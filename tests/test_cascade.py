@@ -0,0 +1,59 @@
+import pytest
+from datapizza.agents import Agent
+
+from hackapizza_solution.agents import cascade
+from hackapizza_solution.agents.registry import delegation_tool
+from helpers import DelegatingClient, ReplyClient
+
+
+def _orchestrated(fast_reply: str, check=lambda task, answer: None, via="delegation_tool"):
+    strong_client = ReplyClient("risposta forte")
+    sub_agent = cascade.cascade_agent(
+        Agent(name="order_expert", client=ReplyClient(fast_reply), system_prompt="fast"),
+        Agent(name="order_expert", client=strong_client, system_prompt="strong"),
+        check=check,
+        min_confidence=0.7,
+    )
+    if via == "can_call":
+        orchestrator = Agent(name="orchestrator", client=DelegatingClient("order_expert"), system_prompt="orchestrator")
+        orchestrator.can_call([sub_agent])
+    else:
+        # How create_orchestrator registers its sub-agents
+        orchestrator = Agent(name="orchestrator", client=DelegatingClient("order_expert"), system_prompt="orchestrator",
+                             tools=[delegation_tool(sub_agent)])
+    return orchestrator, strong_client
+
+
+orchestration_paths = pytest.mark.parametrize("via", ["delegation_tool", "can_call"])
+
+
+def test_parse_confidence_strips_the_confidence_line():
+    assert cascade.parse_confidence("risposta\nCONFIDENZA: 0,8") == (0.8, "risposta")
+    assert cascade.parse_confidence("risposta\n**CONFIDENZA**: 85%") == (0.85, "risposta")
+    assert cascade.parse_confidence("risposta") == (None, "risposta")
+
+
+@orchestration_paths
+def test_confident_answer_reaches_the_orchestrator_without_confidence_line(via):
+    orchestrator, strong_client = _orchestrated("risposta veloce\nCONFIDENZA: 0.9", via=via)
+    result = orchestrator.run("ordine di Andromeda")
+    assert result.text == "risposta veloce"
+    assert strong_client.inputs == []
+
+
+@orchestration_paths
+def test_low_confidence_escalates(via):
+    orchestrator, strong_client = _orchestrated("risposta veloce\nCONFIDENZA: 0.3", via=via)
+    result = orchestrator.run("ordine di Andromeda")
+    assert result.text == "risposta forte"
+    assert strong_client.inputs == ["ordine di Andromeda"]
+
+
+@orchestration_paths
+def test_failed_check_escalates(via):
+    orchestrator, strong_client = _orchestrated(
+        "risposta veloce\nCONFIDENZA: 0.9", check=lambda task, answer: "order not addressed", via=via
+    )
+    assert orchestrator.run("ordine di Andromeda").text == "risposta forte"
+    assert len(strong_client.inputs) == 1
+    assert cascade.cascade_stats()["order_expert"]["reasons"]["inconsistent"] >= 1
@@ -0,0 +1,133 @@
+import numpy as np
+import pytest
+
+from hackapizza_solution import classification
+from hackapizza_solution.benchmarks.fakes import HashEmbedder
+from hackapizza_solution.classification import CentroidIndex, EmbeddingCache, embed_texts, score_matrix
+from hackapizza_solution.config import CLASSIFIER_RULE_WEIGHT, EMBED_MODEL
+
+_EXEMPLARS = {
+    "A": ["Quali piatti usano la Carne di Drago?", "Quali piatti contengono Polvere di Stelle?"],
+    "I": ["Quali piatti sono entro 3 anni luce da Pandora?", "Ristoranti a meno di 5 anni luce da Asgard"],
+}
+
+
+class BatchEmbedder:
+    """Cohere-style embed(list of texts) over HashEmbedder; records the size of every request."""
+
+    def __init__(self):
+        self.requests: list[int] = []
+        self._hash = HashEmbedder(dim=256)
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        self.requests.append(len(texts))
+        return [self._hash.embed(t) for t in texts]
+
+
+@pytest.fixture
+def embedder(tmp_path, monkeypatch):
+    fake = BatchEmbedder()
+    monkeypatch.setattr(classification, "_embedder", fake)
+    monkeypatch.setattr(classification, "_cache", EmbeddingCache(tmp_path / "embeddings.sqlite"))
+    monkeypatch.setattr(classification, "_index", None)
+    monkeypatch.setattr(classification, "_index_loaded", False)
+    monkeypatch.setattr(classification, "CATEGORY_CENTROIDS_NPZ", tmp_path / "centroids.npz")
+    return fake
+
+
+def test_score_matrix_blends_rules_with_the_softmax_of_the_similarities():
+    rules = np.array([[0.0, 0.0], [0.9, 0.0]], dtype=np.float32)
+    similarities = np.array([[0.6, 0.2], [0.4, 0.4]], dtype=np.float32)
+    scores = score_matrix(rules, similarities)
+    # Without rule scores the softmax alone decides; equal similarities split it evenly
+    assert scores[0].argmax() == 0
+    assert scores[1].tolist() == pytest.approx([CLASSIFIER_RULE_WEIGHT * 0.9 + (1 - CLASSIFIER_RULE_WEIGHT) / 2,
+                                                (1 - CLASSIFIER_RULE_WEIGHT) / 2])
+    assert scores.sum(axis=1) == pytest.approx(CLASSIFIER_RULE_WEIGHT * rules.sum(axis=1) + 1 - CLASSIFIER_RULE_WEIGHT)
+
+
+def test_embedding_cache_round_trip(tmp_path):
+    vectors = {"Quali piatti usano la Carne di Drago?": np.array([0.6, 0.8], dtype=np.float32)}
+    EmbeddingCache(tmp_path / "embeddings.sqlite").put_many(vectors)
+    cache = EmbeddingCache(tmp_path / "embeddings.sqlite")
+    found = cache.get_many(["  Quali piatti usano la Carne di Drago? ", "Altra domanda"])
+    assert list(found) == ["  Quali piatti usano la Carne di Drago? "]
+    assert found["  Quali piatti usano la Carne di Drago? "].tolist() == pytest.approx([0.6, 0.8])
+    assert cache.stats == {"hits": 1, "misses": 1, "writes": 0}
+
+
+def test_embed_texts_sends_only_uncached_texts_in_batches(embedder, monkeypatch):
+    monkeypatch.setattr(classification, "CLASSIFIER_EMBED_BATCH", 2)
+    texts = [*_EXEMPLARS["A"], *_EXEMPLARS["I"], _EXEMPLARS["A"][0]]
+    vectors = embed_texts(texts)
+    assert vectors.shape == (5, 256)
+    assert embedder.requests == [2, 2]
+    assert np.linalg.norm(vectors, axis=1) == pytest.approx(1.0)
+    assert (vectors[0] == vectors[4]).all()
+    embed_texts(texts[::-1])
+    assert embedder.requests == [2, 2]
+
+
+def test_centroids_are_built_saved_and_loaded(embedder, monkeypatch, tmp_path):
+    monkeypatch.setattr(classification, "_exemplars", lambda: _EXEMPLARS)
+    built = classification.build_centroids(tmp_path / "centroids.npz")
+    loaded = CentroidIndex.load(tmp_path / "centroids.npz")
+    assert loaded.codes == ["A", "I"] and loaded.model == EMBED_MODEL
+    assert loaded.centroids == pytest.approx(built.centroids)
+    assert np.linalg.norm(loaded.centroids, axis=1) == pytest.approx(1.0)
+    # Each exemplar is closer to its own category's centroid
+    similarities = embed_texts(_EXEMPLARS["A"] + _EXEMPLARS["I"]) @ loaded.centroids.T
+    assert similarities.argmax(axis=1).tolist() == [0, 0, 1, 1]
+
+
+def test_missing_centroids_fall_back_to_rules(embedder):
+    assert classification.get_index() is None
+
+
+def test_centroids_of_another_model_fall_back_to_rules(embedder, monkeypatch, tmp_path):
+    CentroidIndex(["A", "I"], np.eye(2, dtype=np.float32), "embed-v3.0").save(tmp_path / "centroids.npz")
+    assert classification.get_index() is None
+    CentroidIndex(["A", "I"], np.eye(2, dtype=np.float32), EMBED_MODEL).save(tmp_path / "centroids.npz")
+    monkeypatch.setattr(classification, "_index_loaded", False)
+    assert classification.get_index().codes == ["A", "I"]
+
+
+class TestClassifyMany:
+    """Needs the rule classifier (question_classifier) installed."""
+
+    @pytest.fixture(autouse=True)
+    def hybrid(self, embedder, monkeypatch):
+        self.rules = pytest.importorskip("question_classifier")
+        monkeypatch.setattr(classification, "_enabled", True)
+        monkeypatch.setattr(classification, "_exemplars", lambda: _EXEMPLARS)
+        classification.build_centroids(classification.CATEGORY_CENTROIDS_NPZ)
+        self.embedder = embedder
+
+    def test_one_embed_request_for_all_questions(self, monkeypatch):
+        monkeypatch.setattr(classification, "CLASSIFIER_RULE_WEIGHT", 0.0)
+        questions = ["Quali piatti sono entro 3 anni luce da Pandora?", "Quali piatti contengono Polvere di Stelle?",
+                     "Piatti a meno di 5 anni luce da Asgard?"]
+        requests_before = len(self.embedder.requests)
+        results = classification.classify_many(questions)
+        assert len(self.embedder.requests) == requests_before + 1
+        assert [sorted(r.categories) for r in results[:2]] == [["I"], ["A"]]
+        assert all(r.rule_categories == self.rules.classify(q, use_embeddings=False).categories
+                   for q, r in zip(questions, results))
+
+    def test_embedding_failures_fall_back_to_rules(self, monkeypatch):
+        def fail(texts):
+            raise ConnectionError("provider down")
+
+        monkeypatch.setattr(self.embedder, "embed", fail)
+        question = "Quali piatti usano la Muffa Lunare?"
+        fallbacks = classification._stats["fallbacks"]
+        result, = classification.classify_many([question])
+        assert result.categories == self.rules.classify(question, use_embeddings=False).categories
+        assert classification._stats["fallbacks"] == fallbacks + 1
+
+    def test_disabled_returns_the_rules(self, monkeypatch):
+        monkeypatch.setattr(classification, "_enabled", False)
+        requests_before = len(self.embedder.requests)
+        result, = classification.classify_many(["Quali piatti usano la Muffa Lunare?"])
+        assert not isinstance(result, classification.HybridResult)
+        assert len(self.embedder.requests) == requests_before
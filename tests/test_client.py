@@ -0,0 +1,14 @@
+from hackapizza_solution.config import HTTP_POOL, MODEL_FAST
+from hackapizza_solution.llm import client as llm_client
+
+
+def test_scheduler_is_the_only_retry_layer(monkeypatch):
+    monkeypatch.setattr(llm_client, "OPENAI_API_KEY", "test-key")
+    built = llm_client.create_client(MODEL_FAST)
+    built._set_a_client()
+
+    assert built.max_retries == 0
+    assert built.client.max_retries == 0
+    assert built.a_client.max_retries == 0
+    assert built.client.timeout.read == HTTP_POOL["timeout_s"]
+    assert built.client.timeout.connect == HTTP_POOL["connect_timeout_s"]
@@ -0,0 +1,22 @@
+import threading
+import time
+
+from hackapizza_solution.agents.dag import DagSession
+
+
+def _dag_threads() -> int:
+    return sum(1 for t in threading.enumerate() if t.name.startswith("dag"))
+
+
+def test_close_releases_the_session_threads():
+    before = _dag_threads()
+    session = DagSession(None, {})
+    assert [f.result() for f in [session.pool.submit(lambda: "nodo") for _ in range(3)]] == ["nodo"] * 3
+    assert _dag_threads() > before
+
+    session.close()
+    for _ in range(100):
+        if _dag_threads() == before:
+            break
+        time.sleep(0.01)
+    assert _dag_threads() == before
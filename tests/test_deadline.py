@@ -0,0 +1,154 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from datapizza.agents import Agent
+
+from hackapizza_solution import deadline, main
+from hackapizza_solution.tools import output_tools
+from helpers import DelegatingClient, ReplyClient
+
+
+class StepsClient(ReplyClient):
+    """Records the step limit of its agent at every request."""
+
+    def __init__(self):
+        super().__init__("- Piatto")
+        self.agent = None
+        self.max_steps_seen: list[int | None] = []
+
+    def _invoke(self, input, tools=None, memory=None, **kwargs):
+        self.max_steps_seen.append(self.agent._max_steps)
+        return super()._invoke(input, tools=tools, memory=memory, **kwargs)
+
+
+@pytest.fixture
+def budget(monkeypatch):
+    monkeypatch.setattr(deadline, "_budget_s", 25.0)
+    monkeypatch.setattr(deadline, "_step_estimate_s", 10.0)
+
+
+def _bound_sub_agent(max_steps=12):
+    client = StepsClient()
+    client.agent = deadline.bound_agent(
+        Agent(name="menu_search", client=client, system_prompt="menu", max_steps=max_steps)
+    )
+    return client.agent, client
+
+
+def test_a_run_through_can_call_caps_the_step_limit(budget):
+    sub_agent, client = _bound_sub_agent()
+    orchestrator = Agent(name="orchestrator", client=DelegatingClient("menu_search"), system_prompt="orchestrator")
+    orchestrator.can_call([sub_agent])
+
+    with deadline.question_deadline():
+        assert asyncio.run(orchestrator.a_run("domanda")).text == "- Piatto"
+    assert client.max_steps_seen == [2]
+    assert sub_agent._max_steps == 12
+
+
+def test_run_caps_the_step_limit(budget):
+    sub_agent, client = _bound_sub_agent()
+    with deadline.question_deadline():
+        sub_agent.run("domanda")
+    sub_agent.run("domanda")
+    assert client.max_steps_seen == [2, 12]
+
+
+def test_a_run_past_the_deadline_does_not_start(budget):
+    sub_agent, client = _bound_sub_agent()
+    with deadline.question_deadline() as current:
+        current.expires_at = time.monotonic() - 1
+        with pytest.raises(deadline.DeadlineExceeded):
+            asyncio.run(sub_agent.a_run("domanda"))
+        assert current.hit_at == "agent menu_search"
+    assert client.max_steps_seen == []
+
+
+def test_an_interrupted_batch_stops_agents_without_a_deadline():
+    sub_agent, client = _bound_sub_agent()
+    deadline.cancel_all()
+    try:
+        with pytest.raises(deadline.BatchInterrupted):
+            sub_agent.run("domanda")
+        with pytest.raises(deadline.BatchInterrupted, match="before RAG query"):
+            deadline.check("RAG query (menus)")
+    finally:
+        deadline.resume_all()
+    sub_agent.run("domanda")
+    assert client.max_steps_seen == [12]
+
+
+def test_interrupting_a_concurrent_batch_stops_the_running_questions(monkeypatch):
+    started = threading.Barrier(3)
+    stopped = []
+
+    def process_question(session, row_id, question):
+        if row_id > 1:
+            started.wait(timeout=5)
+            try:
+                while True:
+                    deadline.check("LLM call")
+                    time.sleep(0.01)
+            except deadline.BatchInterrupted:
+                stopped.append(row_id)
+                return {"row_id": row_id, "ids": "0", "time_s": 0.0}
+        started.wait(timeout=5)
+        return {"row_id": row_id, "ids": "1", "time_s": 0.0}
+
+    journaled = []
+
+    def on_result(result):
+        journaled.append(result["row_id"])
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr("hackapizza_solution.agents.session.create_session", _IdleSession)
+    monkeypatch.setattr(main, "_process_question", process_question)
+    with pytest.raises(KeyboardInterrupt):
+        main._run_concurrent([(1, "a"), (2, "b"), (3, "c"), (4, "d")], 3, on_result)
+    # Rows 2 and 3 were running and stopped at their next check, row 4 never started;
+    # none of them reached the journal
+    assert journaled == [1]
+    assert sorted(stopped) == [2, 3]
+    deadline.check("LLM call")
+
+
+class _IdleSession:
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def mapping(monkeypatch):
+    monkeypatch.setattr(output_tools, "_mapping_cache", {"Pane Cosmico": 1, "Zuppa di Vega": 2, "Sfera Lunare": 3})
+
+
+def _partial(*tool_results):
+    current = deadline.Deadline(10.0)
+    for name, text in tool_results:
+        current.note_tool_result(name, text)
+    return current.partial_ids(), current.partial_source
+
+
+_ALL_DISHES = "- Pane Cosmico (restaurant: Alfa)\n- Zuppa di Vega (restaurant: Alfa)\n- Sfera Lunare (restaurant: Beta)"
+
+
+def test_partial_ids_prefer_the_mapped_ids(mapping):
+    assert _partial(("search_dishes_by_ingredient", "- Zuppa di Vega"),
+                    ("map_dishes_to_ids", "IDS: 2,3"),
+                    ("get_chef_info", "Chef Alfa")) == ("2,3", "map_dishes_to_ids")
+
+
+def test_partial_ids_never_come_from_the_full_dish_list(mapping):
+    assert _partial(("get_all_dishes_with_details", _ALL_DISHES)) == (None, None)
+    assert _partial(("search_dishes_by_technique", "- Sfera Lunare (restaurant: Beta)"),
+                    ("get_all_dishes_with_details", _ALL_DISHES)) == ("3", "search_dishes_by_technique")
+
+
+def test_partial_ids_use_a_menu_filter_only_as_the_last_step(mapping):
+    planet = ("filter_dishes_by_planet", "- Pane Cosmico (planet: Namecc)\n- Zuppa di Vega (planet: Namecc)")
+    assert _partial(planet) == ("1,2", "filter_dishes_by_planet")
+    assert _partial(planet, ("get_chef_info", "Chef Alfa")) == (None, None)
+    assert _partial(("search_dishes_by_ingredient", "- Zuppa di Vega"), planet,
+                    ("get_chef_info", "Chef Alfa")) == ("2", "search_dishes_by_ingredient")
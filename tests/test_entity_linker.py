@@ -0,0 +1,82 @@
+import pytest
+
+from hackapizza_solution.entity_linker import EntityLinker, normalize
+
+
+@pytest.fixture(scope="module")
+def linker():
+    return EntityLinker({
+        "ingredient": {"Carne di Drago", "Carne", "Polvere di Stelle", "Farina di Nettuno", "Muffa Lunare"},
+        "technique": {"Cottura Sottovuoto"},
+        "dish": {"Sinfonia Galattica"},
+        "restaurant": {"L'Etère del Gusto"},
+        "planet": {"Pandora", "Asgard"},
+    })
+
+
+def _linked(linker, question, **kwargs):
+    return [(m.kind, m.name, m.fuzzy) for m in linker.link(question, **kwargs)]
+
+
+def test_normalize():
+    assert normalize("  L’Ètere   del\tGUSTO ") == "l'etere del gusto"
+
+
+@pytest.mark.parametrize("question", [
+    "Quali piatti usano la CARNE DI DRAGO?",
+    "Quali piatti usano la càrne di dràgo?",
+])
+def test_case_and_accents_are_ignored(linker, question):
+    assert _linked(linker, question) == [("ingredient", "Carne di Drago", False)]
+
+
+def test_apostrophes_and_whitespace_are_unified(linker):
+    assert _linked(linker, "I piatti de L’Etere   del Gusto") == [("restaurant", "L'Etère del Gusto", False)]
+
+
+def test_overlapping_matches_keep_the_longest(linker):
+    mentions = linker.link("Sinfonia Galattica con Carne di Drago e carne")
+    assert [(m.name, m.surface) for m in mentions] == [
+        ("Sinfonia Galattica", "sinfonia galattica"), ("Carne di Drago", "carne di drago"), ("Carne", "carne"),
+    ]
+
+
+@pytest.mark.parametrize("question", ["Il Carnevale di Asgardia", "Piatti pandoriani"])
+def test_names_inside_longer_words_are_not_linked(linker, question):
+    assert _linked(linker, question, fuzzy=False) == []
+
+
+def test_licenses_and_orders(linker):
+    assert _linked(linker, "Licenza Psionica e Ordine di Andromeda") == [
+        ("license", "Psionica", False), ("order", "Ordine di Andromeda", False),
+    ]
+    # "luce" alone is the unit of "anni luce"
+    assert _linked(linker, "A 3 anni luce da Pandora", kinds=("license",)) == []
+    assert _linked(linker, "con la licenza Luce", kinds=("license",)) == [("license", "Luce", False)]
+
+
+@pytest.mark.parametrize("question, name, surface", [
+    ("Piatti con Polvere di Stele", "Polvere di Stelle", "polvere di stele"),
+    # The span stops before "e": names never start or end with a stopword or a short connector
+    ("Piatti con Farina di Netuno e Carne", "Farina di Nettuno", "farina di netuno"),
+    ("Piatti dell'Etre del Gusto", "L'Etère del Gusto", "dell'etre del gusto"),
+])
+def test_misspellings_are_linked_as_fuzzy(linker, question, name, surface):
+    fuzzy = [m for m in linker.link(question) if m.fuzzy]
+    assert [(m.name, m.surface) for m in fuzzy] == [(name, surface)]
+    assert _linked(linker, question, fuzzy=False) == [m for m in _linked(linker, question) if not m[2]]
+
+
+def test_a_misspelled_name_wins_over_the_exact_name_it_extends(linker):
+    assert _linked(linker, "Piatti con Carne di Dragho") == [("ingredient", "Carne di Drago", True)]
+    assert _linked(linker, "Piatti con Carne di Dragho", fuzzy=False) == [("ingredient", "Carne", False)]
+
+
+def test_exact_matches_are_not_replaced_by_fuzzy_ones(linker):
+    assert _linked(linker, "Sinfonia Galattica Notturna su Pandora") == [
+        ("dish", "Sinfonia Galattica", False), ("planet", "Pandora", False),
+    ]
+
+
+def test_kinds_restrict_the_result(linker):
+    assert _linked(linker, "Carne di Drago su Pandora", kinds=("planet",)) == [("planet", "Pandora", False)]
@@ -0,0 +1,45 @@
+from hackapizza_solution.entity_linker import Mention, normalize
+from hackapizza_solution.fast_path import _query
+
+MENUS = [{
+    "restaurant": "Da Mario",
+    "planet": "Tatooine",
+    "dishes": [
+        {"name": "Pane", "ingredients": ["Farina di Luna", "Sale"], "techniques": ["Cottura al Forno Quantico"]},
+        {"name": "Zuppa", "ingredients": ["Sale", "Alghe"], "techniques": ["Bollitura"]},
+        {"name": "Crudo", "ingredients": ["Alghe"], "techniques": []},
+    ],
+}]
+
+
+def _mentions(question: str, *names: tuple[str, str]) -> list[Mention]:
+    text = normalize(question)
+    mentions = []
+    for kind, name in names:
+        start = text.index(normalize(name))
+        mentions.append(Mention(start, start + len(name), kind, name, name))
+    return mentions
+
+
+def _ask(question: str, code: str, *names: tuple[str, str]):
+    return _query(question, code, MENUS, _mentions(question, *names))
+
+
+def test_negation_excludes_the_ingredients_named_after_it():
+    assert _ask("Quali piatti non usano Sale?", "D", ("ingredient", "Sale")) == ["Crudo"]
+    assert _ask("Quali piatti con Alghe non usano Sale?", "D",
+                ("ingredient", "Alghe"), ("ingredient", "Sale")) == ["Crudo"]
+    assert _ask("Quali piatti non contengono Sale e Farina?", "D",
+                ("ingredient", "Sale"), ("ingredient", "Farina")) == ["Crudo"]
+
+
+def test_positive_requirement_after_the_negation_falls_back_to_the_agents():
+    assert _ask("Quali piatti non usano Farina ma usano Sale?", "D",
+                ("ingredient", "Farina"), ("ingredient", "Sale")) is None
+    assert _ask("Quali piatti sono senza Farina, con Alghe?", "D",
+                ("ingredient", "Farina"), ("ingredient", "Alghe")) is None
+
+
+def test_matching_is_partial_like_the_tools():
+    assert _ask("Quali piatti usano la Farina?", "A", ("ingredient", "Farina")) == ["Pane"]
+    assert _ask("Quali piatti usano la Cottura al Forno?", "B", ("technique", "Cottura al Forno")) == ["Pane"]
@@ -0,0 +1,63 @@
+import time
+
+import pytest
+
+from hackapizza_solution import deadline
+from hackapizza_solution.config import HEDGE_MIN_SAMPLES
+from hackapizza_solution.llm.hedging import Hedger
+from hackapizza_solution.llm.scheduler import LLMScheduler
+
+
+def _slow(seconds: float, result: str = "ok"):
+    def fn():
+        time.sleep(seconds)
+        return result
+
+    return fn
+
+
+def test_scheduler_reports_the_provider_latency_without_rate_limit_waits():
+    scheduler = LLMScheduler({"m": {"rpm": 60, "tpm": 100_000, "max_concurrency": 2}})
+    scheduler.for_model("m").requests.level = -0.3  # 0.3s of rate-limit wait before the call
+    latencies = []
+
+    started = time.monotonic()
+    assert scheduler.call("m", _slow(0.02), on_latency=latencies.append) == "ok"
+    assert time.monotonic() - started >= 0.3
+    assert len(latencies) == 1 and latencies[0] < 0.2
+
+
+def test_hedge_delay_comes_from_recorded_provider_latencies():
+    hedger = Hedger(min_delay_s=0.0)
+    assert hedger.hedge_delay("m") is None
+    for _ in range(HEDGE_MIN_SAMPLES):
+        hedger.record_latency("m", 0.5)
+    assert hedger.hedge_delay("m") == 0.5
+
+
+def test_slow_primary_is_hedged():
+    hedger = Hedger(min_delay_s=0.0)
+    for _ in range(HEDGE_MIN_SAMPLES):
+        hedger.record_latency("m", 0.05)
+    calls = []
+
+    def fn():
+        calls.append(time.monotonic())
+        return _slow(1.0 if len(calls) == 1 else 0.01, f"attempt {len(calls)}")()
+
+    assert hedger.call("m", fn) == "attempt 2"
+    assert hedger.for_model("m").stats["hedge_wins"] == 1
+
+
+def test_first_wait_is_bounded_by_the_deadline(monkeypatch):
+    monkeypatch.setattr(deadline, "_budget_s", 0.2)
+    hedger = Hedger(min_delay_s=0.0)
+    for _ in range(HEDGE_MIN_SAMPLES):
+        hedger.record_latency("m", 2.0)
+
+    started = time.monotonic()
+    with deadline.question_deadline():
+        with pytest.raises(deadline.DeadlineExceeded):
+            hedger.call("m", _slow(0.6))
+    assert time.monotonic() - started < 0.5
+    assert hedger.for_model("m").stats["hedged"] == 0
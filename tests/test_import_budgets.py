@@ -0,0 +1,46 @@
+"""Startup budgets of benchmarks/importtime.py, as tests (each import runs in a fresh interpreter).
+
+Which modules get imported is checked in every run. The wall-clock budgets depend on the
+machine and its load, so they only run with IMPORT_BUDGETS=1 (e.g. on a quiet CI runner).
+"""
+
+import importlib.util
+import os
+
+import pytest
+
+from hackapizza_solution.benchmarks.importtime import check_module, measure_imports, time_to_first_request
+from hackapizza_solution.config import (
+    FIRST_REQUEST_BUDGET_S, IMPORT_TIME_BUDGETS_MS, MENUS_JSON, STARTUP_LAZY_MODULES,
+)
+
+# Best of five fresh interpreters: a single slow run on a busy machine is not a regression
+RUNS = 5
+wall_clock = pytest.mark.skipif(os.getenv("IMPORT_BUDGETS") != "1",
+                                reason="wall-clock budget, set IMPORT_BUDGETS=1 to run")
+
+
+@pytest.mark.parametrize("module", list(IMPORT_TIME_BUDGETS_MS))
+def test_import_does_not_load_the_lazy_sdks(module):
+    imports = measure_imports(module)
+    assert [name for name in STARTUP_LAZY_MODULES if name in imports] == []
+
+
+def test_cli_entry_point_does_not_load_the_agents():
+    imports = measure_imports("hackapizza_solution.main")
+    loaded = [name for name in ("hackapizza_solution.agents.orchestrator", "openai", *STARTUP_LAZY_MODULES)
+              if name in imports]
+    assert loaded == []
+
+
+@wall_clock
+@pytest.mark.parametrize("module", list(IMPORT_TIME_BUDGETS_MS))
+def test_import_time_within_budget(module):
+    assert check_module(module, IMPORT_TIME_BUDGETS_MS[module], runs=RUNS, top=8)
+
+
+@wall_clock
+@pytest.mark.skipif(importlib.util.find_spec("question_classifier") is None or not MENUS_JSON.exists(),
+                    reason="needs question_classifier and menus.json")
+def test_time_to_first_llm_request_within_budget():
+    assert time_to_first_request("Quali piatti usano la Carne di Drago?", RUNS) <= FIRST_REQUEST_BUDGET_S
@@ -0,0 +1,38 @@
+import json
+
+from hackapizza_solution.journal import BatchJournal, select_rows
+
+
+def _record(row_id: int, ids: str) -> dict:
+    return {"row_id": row_id, "question": f"domanda {row_id}", "ids": ids}
+
+
+def test_append_after_a_crash_mid_write_keeps_the_new_record(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    path.write_text(json.dumps(_record(1, "3,4")) + "\n" + json.dumps(_record(2, "5"))[:20], encoding="utf-8")
+
+    journal = BatchJournal(path)
+    assert set(journal.load()) == {1}
+    journal.append(_record(3, "7"))
+    journal.close()
+
+    records = BatchJournal(path).load()
+    assert set(records) == {1, 3}
+    assert records[3]["ids"] == "7"
+    assert path.read_text(encoding="utf-8").count("\n") == 2
+
+
+def test_append_to_a_complete_journal_keeps_every_record(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = BatchJournal(path)
+    journal.append(_record(1, "0"))
+    journal.close()
+    journal = BatchJournal(path)
+    journal.append(_record(1, "2"))
+    journal.append(_record(2, "9"))
+    journal.close()
+
+    records = BatchJournal(path).load()
+    assert records[1]["ids"] == "2"
+    questions = [(1, "domanda 1"), (2, "domanda 2"), (3, "domanda 3")]
+    assert select_rows(questions, records, resume=True) == [(3, "domanda 3")]
@@ -0,0 +1,95 @@
+import json
+import threading
+import time
+
+import pytest
+
+from hackapizza_solution.deadline import DeadlineExceeded
+from hackapizza_solution.tools import memo
+
+
+@pytest.fixture
+def data_tool(tmp_path, monkeypatch):
+    """A memoized tool reading a JSON file through a module-level-style loader cache."""
+    monkeypatch.setattr(memo, "_enabled", True)
+    path = tmp_path / "menus.json"
+    path.write_text(json.dumps(["Pane"]), encoding="utf-8")
+    cache = {}
+    loads = []
+
+    def load():
+        if "menus" not in cache:
+            loads.append(path)
+            cache["menus"] = json.loads(path.read_text(encoding="utf-8"))
+        return cache["menus"]
+
+    @memo.resets_on_change(path)
+    def reset():
+        cache.clear()
+
+    @memo.memoize(depends_on=(path,), case_insensitive=True)
+    def find_dish(name: str) -> str:
+        return "si" if name.lower() in {d.lower() for d in load()} else "no"
+
+    memo.start_run()
+    yield path, find_dish, loads
+    memo._loader_resets.pop(path, None)
+
+
+def test_hits_and_normalized_arguments(data_tool):
+    _, find_dish, loads = data_tool
+    assert find_dish("Pane") == "si"
+    assert find_dish("  pane ") == "si"
+    stats = memo.memo_stats()["find_dish"]
+    assert (stats["misses"], stats["hits"]) == (1, 1)
+    assert len(loads) == 1
+
+
+def test_changed_file_drops_the_entry_and_resets_the_loader(data_tool):
+    path, find_dish, loads = data_tool
+    assert find_dish("Zuppa") == "no"
+    path.write_text(json.dumps(["Pane", "Zuppa"]), encoding="utf-8")
+    assert find_dish("Zuppa") == "si"
+    assert len(loads) == 2
+    assert find_dish("Zuppa") == "si"
+    assert len(loads) == 2
+
+
+def test_waiter_recomputes_when_the_owner_hits_its_deadline(monkeypatch):
+    monkeypatch.setattr(memo, "_enabled", True)
+    owner_started, release_owner = threading.Event(), threading.Event()
+    calls = []
+
+    @memo.memoize()
+    def slow_lookup(planet: str) -> str:
+        calls.append(planet)
+        if len(calls) == 1:
+            owner_started.set()
+            release_owner.wait(5)
+            raise DeadlineExceeded("Question deadline exceeded at tool (0.0s of 1s left)")
+        return f"vicino a {planet}"
+
+    memo.start_run()
+    owner_errors, waiter_results = [], []
+
+    def owner():
+        try:
+            slow_lookup("Namecc")
+        except DeadlineExceeded as e:
+            owner_errors.append(e)
+
+    owner_thread = threading.Thread(target=owner)
+    owner_thread.start()
+    owner_started.wait(5)
+    waiter = threading.Thread(target=lambda: waiter_results.append(slow_lookup("Namecc")))
+    waiter.start()
+    while memo.memo_stats()["slow_lookup"]["calls"] < 2:
+        time.sleep(0.001)
+    time.sleep(0.05)  # the waiter is blocked on the owner's call
+    release_owner.set()
+    owner_thread.join(5)
+    waiter.join(5)
+
+    assert len(owner_errors) == 1
+    assert waiter_results == ["vicino a Namecc"]
+    assert calls == ["Namecc", "Namecc"]
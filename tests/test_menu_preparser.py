@@ -0,0 +1,60 @@
+import pytest
+
+from hackapizza_solution.data_preparation.menu_preparser import (
+    PreParsedMenu, extract_licenses, merge_preparsed, parse_grade, roman_to_int,
+)
+
+
+@pytest.mark.parametrize("numeral, value", [
+    ("I", 1), ("IV", 4), ("IX", 9), ("XIII", 13), ("XIV", 14), ("XL", 40), ("XC", 90), ("xcix", 99),
+])
+def test_roman_to_int(numeral, value):
+    assert roman_to_int(numeral) == value
+
+
+@pytest.mark.parametrize("raw", ["", "IIZ", "4a"])
+def test_invalid_grades_are_rejected(raw):
+    with pytest.raises(ValueError):
+        parse_grade(raw)
+
+
+@pytest.mark.parametrize("text, licenses", [
+    ("Licenza Psionica di grado III", {"P": 3}),
+    ("Psionica II e Temporale 4", {"P": 2, "t": 4}),
+    ("LTK XIII", {"LTK": 13}),
+    ("Quantum level 5, Light 2", {"Q": 5, "c": 2}),
+    # "beyond level X" and its Italian forms mean X+1
+    ("licenza Gravitazionale oltre il livello V", {"G": 6}),
+    ("Antimateria superiore al grado 2", {"e+": 3}),
+    ("Quantum beyond level IX", {"Q": 10}),
+    ("Magnetic superior to 3", {"Mx": 4}),
+    # The highest grade of a license mentioned twice wins
+    ("psionica 3, poi Psionica di livello VI", {"P": 6}),
+    # Lowercase "i" is an Italian word, not a grade; grades have at most two digits
+    ("Magnetica: i piatti del giorno", {}),
+    ("Temporale livello 100", {}),
+    ("Nessuna licenza richiesta", {}),
+])
+def test_extract_licenses(text, licenses):
+    assert extract_licenses(text) == licenses
+
+
+def _llm_menu(planet="Namecc", licenses=None):
+    return {"restaurant": "Stella Nova", "planet": planet, "chef": {"name": "Aldo", "licenses": licenses or {}},
+            "dishes": []}
+
+
+def test_merge_fills_what_the_llm_left_out():
+    pre = PreParsedMenu(planet="Namecc", licenses={"P": 3, "t": 2})
+    menu, conflicts = merge_preparsed(_llm_menu(planet="", licenses={"P": 3, "G": 1}), pre)
+    assert menu["planet"] == "Namecc"
+    assert menu["chef"]["licenses"] == {"P": 3, "G": 1, "t": 2}
+    assert conflicts == []
+
+
+def test_merge_keeps_the_llm_value_on_a_disagreement():
+    pre = PreParsedMenu(planet="Asgard", licenses={"P": 5})
+    menu, conflicts = merge_preparsed(_llm_menu(planet="Namecc", licenses={"P": 3}), pre)
+    assert menu["planet"] == "Namecc"
+    assert menu["chef"]["licenses"] == {"P": 3}
+    assert conflicts == ["license P: LLM=3 regex=5", "planet: LLM=Namecc regex=Asgard"]
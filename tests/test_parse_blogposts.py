@@ -0,0 +1,112 @@
+import json
+
+import pytest
+
+from hackapizza_solution.config import BLOGPOST_DIR, MENUS_JSON
+from hackapizza_solution.data_preparation import parse_blogposts
+
+# Known-good values, extracted by hand from the two blogposts of the dataset before the parser existed
+# blog_etere_del_gusto.html (reviewer: Cassandra Stellaris, restaurant: L'Etere del Gusto, Pandora)
+# blog_sapore_del_dune.html (reviewer: Marco Stellaris, restaurant: Sapore del Dune)
+BLOGPOST_PERCENTAGES: dict[str, dict[str, float]] = {
+    # --- Blog: L'Etere del Gusto ---
+    "Il Risveglio del Drago Celeste": {"Carne di Drago": 8.0},
+    "Cosmic Harmony Infusion": {"Petali di Eco": 3.0},
+    "Sinfonia Multiversale in Otto Movimenti": {"Muffa Lunare": 2.0},
+    # --- Blog: Sapore del Dune ---
+    "Sinfonia Quantistica delle Stelle": {"Sale Temporale": 1.0, "Nettare di Sirena": 0.1},
+    "Galassia di Sapore Quantico": {"Polvere di Stelle": 1.0, "Carne di Drago": 1.0},
+    "Evanescenza Quantica": {"Cristalli di Memoria": 0.1, "Petali di Eco": 0.1},
+    "Pioggia di Dimensioni Galattiche": {"Essenza di Vuoto": 3.0, "Nettare di Sirena": 0.1},
+    "Sinfonia Galattica": {"Funghi dell'Etere": 2.0, "Carne di Drago": 2.0},
+}
+_BLOGPOSTS = ("blog_etere_del_gusto.html", "blog_sapore_del_dune.html")
+
+_MENUS = [{"restaurant": "L'Etere del Gusto", "planet": "Pandora", "chef": {"name": "Aldo", "licenses": {}},
+           "dishes": [
+               {"name": "Sinfonia Galattica", "ingredients": ["Carne di Drago", "Funghi dell'Etere"], "techniques": []},
+               {"name": "Sinfonia Galattica Notturna", "ingredients": ["Muffa Lunare", "Petali di Eco"],
+                "techniques": []},
+           ]}]
+_HTML = """<html><body>
+<h2>Sinfonia Galattica</h2>
+<p>Un piatto audace: 2% di Funghi dell&rsquo;Etere e una punta di Carne di Drago (2 %).</p>
+<p>Poi la Sinfonia Galattica Notturna. La Muffa Lunare resta sotto l'1,5% del totale.</p>
+<p>Il servizio era impeccabile al 100%.</p>
+</body></html>"""
+
+
+@pytest.fixture
+def menus_index():
+    parse_blogposts._init_worker(parse_blogposts.build_dish_index(_MENUS))
+    yield
+    parse_blogposts._init_worker({})
+
+
+def test_percentages_are_resolved_to_the_dish_and_the_closest_ingredient(menus_index):
+    assert parse_blogposts.extract_percentages(_HTML) == {
+        "Sinfonia Galattica": {"Funghi dell'Etere": 2.0, "Carne di Drago": 2.0},
+        "Sinfonia Galattica Notturna": {"Muffa Lunare": 1.5},
+    }
+
+
+@pytest.mark.skipif(not MENUS_JSON.exists() or not all((BLOGPOST_DIR / name).exists() for name in _BLOGPOSTS),
+                    reason="needs menus.json and the dataset blogposts")
+def test_dataset_blogposts_reproduce_the_hand_extracted_values():
+    parse_blogposts._init_worker(parse_blogposts.build_dish_index(json.loads(MENUS_JSON.read_text(encoding="utf-8"))))
+    try:
+        files = {name: {"percentages": parse_blogposts.extract_percentages(
+            (BLOGPOST_DIR / name).read_text(encoding="utf-8"))} for name in _BLOGPOSTS}
+    finally:
+        parse_blogposts._init_worker({})
+    assert parse_blogposts._merge(files) == BLOGPOST_PERCENTAGES
+
+
+def test_run_parses_only_new_files_and_everything_when_the_menus_change(tmp_path, monkeypatch):
+    blog_dir = tmp_path / "Blogpost"
+    blog_dir.mkdir()
+    for i in range(5):
+        (blog_dir / f"blog_{i}.html").write_text(_HTML.replace("2%", f"{i + 1}%"), encoding="utf-8")
+    menus = tmp_path / "menus.json"
+    menus.write_text(json.dumps(_MENUS), encoding="utf-8")
+    for name, value in (("DATA_DIR", tmp_path), ("BLOGPOST_DIR", blog_dir), ("MENUS_JSON", menus),
+                        ("BLOGPOST_MANIFEST_JSON", tmp_path / "manifest.json"),
+                        ("BLOGPOST_PCT_JSON", tmp_path / "percentages.json")):
+        monkeypatch.setattr(parse_blogposts, name, value)
+    parsed = []
+    process_file = parse_blogposts._process_file
+    monkeypatch.setattr(parse_blogposts, "ProcessPoolExecutor", _InlinePool)
+    monkeypatch.setattr(parse_blogposts, "_process_file", lambda path: parsed.append(path.name) or process_file(path))
+
+    parse_blogposts.run(workers=1)
+    assert parsed == [f"blog_{i}.html" for i in range(5)]
+    result = json.loads((tmp_path / "percentages.json").read_text(encoding="utf-8"))
+    assert result["Sinfonia Galattica"]["Funghi dell'Etere"] == 5.0  # later files win
+
+    parsed.clear()
+    parse_blogposts.run(workers=1)
+    assert parsed == []
+
+    menus.write_text(json.dumps(_MENUS, indent=1), encoding="utf-8")
+    parse_blogposts.run(workers=1)
+    assert len(parsed) == 5
+
+
+class _InlinePool:
+    """ProcessPoolExecutor stand-in that runs each file in this process when submitted."""
+
+    def __init__(self, max_workers, initializer, initargs):
+        initializer(*initargs)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        parse_blogposts._init_worker({})
+
+    def submit(self, fn, *args):
+        from concurrent.futures import Future
+
+        future = Future()
+        future.set_result(fn(*args))
+        return future
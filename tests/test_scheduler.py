@@ -0,0 +1,97 @@
+import time
+
+import pytest
+
+from hackapizza_solution import deadline
+from hackapizza_solution.llm.scheduler import CircuitOpenError, LLMScheduler
+
+
+class Transient(Exception):
+    status_code = 503
+
+
+def _scheduler():
+    scheduler = LLMScheduler({"m": {"rpm": 60, "tpm": 100_000, "max_concurrency": 2}}, max_attempts=1)
+    return scheduler, scheduler.for_model("m")
+
+
+def _cooled_down_open_breaker(ms):
+    ms.breaker.failures = ms.breaker.threshold
+    ms.breaker.opened_at = time.monotonic() - ms.breaker.cooldown_s - 1
+
+
+def test_breaker_opens_after_consecutive_transient_failures():
+    scheduler, ms = _scheduler()
+    ms.breaker.threshold = 2
+
+    def fail():
+        raise Transient("unavailable")
+
+    for _ in range(2):
+        with pytest.raises(Transient):
+            scheduler.call("m", fail)
+    with pytest.raises(CircuitOpenError):
+        scheduler.call("m", lambda: "ok")
+    assert ms.breaker.state == "open"
+
+
+def test_probe_stopped_by_the_deadline_is_released(monkeypatch):
+    monkeypatch.setattr(deadline, "_budget_s", 5.0)
+    scheduler, ms = _scheduler()
+    _cooled_down_open_breaker(ms)
+    ms.requests.level = -120  # two minutes of requests owed: the rate-limit wait exceeds the budget
+
+    with deadline.question_deadline():
+        with pytest.raises(deadline.DeadlineExceeded):
+            scheduler.call("m", lambda: "never called")
+    assert not ms.breaker.probing
+    assert ms.limiter.in_flight == 0
+
+    ms.requests.level = ms.requests.capacity
+    assert scheduler.call("m", lambda: "ok") == "ok"
+    assert ms.breaker.state == "closed"
+
+
+def test_probe_interrupted_during_the_call_is_released():
+    scheduler, ms = _scheduler()
+    _cooled_down_open_breaker(ms)
+
+    def interrupted():
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        scheduler.call("m", interrupted)
+    assert not ms.breaker.probing
+    assert ms.limiter.in_flight == 0
+
+    assert scheduler.call("m", lambda: "ok") == "ok"
+    assert ms.breaker.state == "closed"
+
+
+def test_failed_probe_reopens_the_circuit():
+    scheduler, ms = _scheduler()
+    _cooled_down_open_breaker(ms)
+
+    def fail():
+        raise Transient("unavailable")
+
+    with pytest.raises(Transient):
+        scheduler.call("m", fail)
+    assert ms.breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        scheduler.call("m", lambda: "ok")
+
+
+@pytest.mark.parametrize("exc", [Transient("unavailable"), ValueError("bad request"), KeyboardInterrupt()])
+def test_limiter_slot_is_released_however_the_call_ends(exc):
+    scheduler, ms = _scheduler()
+
+    def fail():
+        assert ms.limiter.in_flight == 1
+        raise exc
+
+    with pytest.raises(type(exc)):
+        scheduler.call("m", fail)
+    assert ms.limiter.in_flight == 0
+    assert scheduler.call("m", lambda: "ok") == "ok"
+    assert ms.limiter.in_flight == 0
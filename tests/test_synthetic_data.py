@@ -0,0 +1,37 @@
+import csv
+import json
+
+from hackapizza_solution.benchmarks.synthetic_data import (
+    BASE_DISHES, BASE_MENUS, BASE_PLANETS, generate, write_dataset,
+)
+
+
+def test_generate_scales_and_is_reproducible():
+    menus, mapping, planets, distances = generate(2, seed=1)
+
+    assert len(menus) == 2 * BASE_MENUS
+    assert sum(len(menu["dishes"]) for menu in menus) == 2 * BASE_DISHES
+    assert len(planets) == 2 * BASE_PLANETS
+    assert (menus, mapping) == generate(2, seed=1)[:2]
+    assert sorted(mapping.values()) == list(range(2 * BASE_DISHES))
+    assert {menu["planet"] for menu in menus} <= set(planets)
+
+
+def test_distances_are_a_symmetric_matrix_over_the_planets():
+    _, _, planets, distances = generate(1)
+
+    assert all(len(row) == len(planets) for row in distances)
+    for i, row in enumerate(distances):
+        assert row[i] == 0
+        assert all(row[j] == distances[j][i] for j in range(len(planets)))
+
+
+def test_write_dataset_uses_the_real_file_formats(tmp_path):
+    paths = write_dataset(1, tmp_path)
+
+    menus = json.loads(paths["menus"].read_text(encoding="utf-8"))
+    mapping = json.loads(paths["mapping"].read_text(encoding="utf-8"))
+    with open(paths["distances"], encoding="utf-8", newline="") as f:
+        header, *rows = list(csv.reader(f))
+    assert len(menus) == BASE_MENUS and len(mapping) == BASE_DISHES
+    assert header[0] == "/" and [row[0] for row in rows] == header[1:]
@@ -0,0 +1,41 @@
+import asyncio
+
+from datapizza.agents import Agent
+
+from hackapizza_solution import tracing
+from hackapizza_solution.agents.registry import delegation_tool
+from helpers import DelegatingClient, ReplyClient
+
+
+def _agent_spans(monkeypatch, tmp_path, run) -> list[str]:
+    monkeypatch.setattr(tracing, "TRACE_DIR", tmp_path)
+    monkeypatch.setattr(tracing, "_enabled", True)
+    with tracing.start_trace("t", "domanda") as trace:
+        run()
+    return [s["name"] for s in trace.spans if s["kind"] == "agent"]
+
+
+def _sub_agent():
+    return tracing.instrument_agent(Agent(name="menu_search", client=ReplyClient("- Piatto"), system_prompt="menu"))
+
+
+def test_a_run_delegation_through_can_call_records_the_sub_agent(monkeypatch, tmp_path):
+    orchestrator = Agent(name="orchestrator", client=DelegatingClient("menu_search"), system_prompt="orchestrator")
+    orchestrator.can_call([_sub_agent()])
+    orchestrator = tracing.instrument_agent(orchestrator)
+
+    spans = _agent_spans(monkeypatch, tmp_path, lambda: asyncio.run(orchestrator.a_run("domanda")))
+    assert sorted(spans) == ["menu_search", "orchestrator"]
+
+
+def test_delegation_tool_keeps_the_trace_of_a_synchronous_run(monkeypatch, tmp_path):
+    orchestrator = tracing.instrument_agent(Agent(
+        name="orchestrator",
+        client=DelegatingClient("menu_search"),
+        system_prompt="orchestrator",
+        tools=[delegation_tool(_sub_agent())],
+    ))
+
+    spans = _agent_spans(monkeypatch, tmp_path, lambda: orchestrator.run("domanda"))
+    assert sorted(spans) == ["menu_search", "orchestrator"]
+    assert orchestrator.run("domanda").text == "- Piatto"